@@ -1,7 +1,80 @@
 from django.contrib import admin
+from django.db.models import Q
+
 from .models import *
 
-admin.site.register(Customer)
-admin.site.register(SubRegistrarOffice)
-admin.site.register(Transaction)
-admin.site.register(SubRegistrar)
\ No newline at end of file
+
+class IndexedSearchMixin:
+    """
+    Search by exact value on indexed columns instead of the default
+    icontains over every search field, which scans the whole table.
+    `search_fields` only switches the search box on.
+    """
+
+    indexed_search_fields = ()
+
+    def normalize_search_value(self, field, term):
+        return term
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        q = Q()
+        for field in self.indexed_search_fields:
+            if field == "pk":
+                if term.isdigit():
+                    q |= Q(pk=int(term))
+            else:
+                q |= Q(**{field: self.normalize_search_value(field, term)})
+        return (queryset.filter(q) if q else queryset.none()), False
+
+
+@admin.register(Customer)
+class CustomerAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ("__str__", "adhar_no", "phone_no", "office", "created_at")
+    list_select_related = ("user", "office")
+    raw_id_fields = ("user",)
+    autocomplete_fields = ("office",)
+    search_fields = ("adhar_no", "phone_no", "email", "user__username")
+    indexed_search_fields = ("pk", "adhar_no", "phone_no", "email", "user__username")
+    search_help_text = "Exact id, Aadhaar number, phone, email or username"
+    show_full_result_count = False
+
+
+@admin.register(SubRegistrarOffice)
+class SubRegistrarOfficeAdmin(admin.ModelAdmin):
+    # a few hundred rows: plain search is fine and feeds the office autocompletes
+    list_display = ("name", "locality", "district", "telephone")
+    list_filter = ("district",)
+    search_fields = ("name", "locality", "district")
+    ordering = ("district", "name")
+    show_full_result_count = False
+
+
+@admin.register(SubRegistrar)
+class SubRegistrarAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "status", "contact_number", "created_at")
+    list_select_related = ("user", "office")
+    list_filter = ("status", "office__district")
+    raw_id_fields = ("user",)
+    autocomplete_fields = ("office",)
+    search_fields = ("user__username", "user__first_name", "user__last_name", "office__name")
+    show_full_result_count = False
+
+
+@admin.register(Transaction)
+class TransactionAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ("__str__", "customer", "office", "submission_date", "chain_status")
+    list_select_related = ("customer__user", "office")
+    list_filter = ("status", "deed_type", "office")
+    raw_id_fields = ("customer", "anchor_batch")
+    autocomplete_fields = ("office", "verified_by")
+    search_fields = ("legacy_ref", "survey_number", "deed_hash", "blockchain_hash")
+    indexed_search_fields = ("pk", "legacy_ref", "survey_number", "deed_hash", "blockchain_hash")
+    search_help_text = "Exact id, legacy reference, survey number, deed hash or anchor transaction hash"
+    show_full_result_count = False
+
+    def normalize_search_value(self, field, term):
+        # deed hashes are stored as bare lowercase hex
+        return term.lower().removeprefix("0x") if field == "deed_hash" else term
@@ -0,0 +1,12 @@
+from .services.fragments import FragmentVersions
+
+
+def fragment_cache(request):
+    """Role and data versions used as {% cache %} keys by the dashboards."""
+    role = getattr(request, "role", None)
+    if role is None or not getattr(request, "user", None) or not request.user.is_authenticated:
+        kind, office_id = "anonymous", None
+    else:
+        kind = "superuser" if role.is_superuser else "registrar" if role.is_registrar else "customer"
+        office_id = role.office.pk if role.office else None
+    return {"fragment_role": kind, "fragment_versions": FragmentVersions(office_id)}
@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from Home.services import anchoring, gas
+from Home.services.chain import ChainError
+
+
+class Command(BaseCommand):
+    help = 'Anchor approved transactions on chain in Merkle batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=anchoring.BATCH_SIZE)
+        parser.add_argument('--max-wait', type=int, default=int(anchoring.MAX_WAIT.total_seconds()),
+                            help='Seconds an approval may wait before a partial batch is sent')
+        parser.add_argument('--loop', action='store_true', help='Keep running, checking every --interval seconds')
+        parser.add_argument('--interval', type=int, default=30)
+
+    def handle(self, *args, **options):
+        max_wait = timedelta(seconds=options['max_wait'])
+
+        while True:
+            for batch in anchoring.anchor_due(options['batch_size'], max_wait):
+                if batch.status == 'failed':
+                    self.stderr.write(f'Batch #{batch.pk} failed: {batch.error}')
+                else:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Batch #{batch.pk}: {batch.leaf_count} deeds, root {batch.merkle_root[:16]}…, tx {batch.tx_hash}'
+                    ))
+            try:
+                for batch in gas.replace_stuck():
+                    self.stdout.write(f'Batch #{batch.pk}: replaced stuck anchor, now {batch.tx_hash}')
+            except ChainError as e:
+                self.stderr.write(f'Could not check for stuck anchors: {e}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Home.services.exports import FORMATS, export_chunks, export_queryset
+
+
+class Command(BaseCommand):
+    help = 'Stream transactions to a CSV or JSONL file for reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--out', help='Output file (default: stdout)')
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--office', type=int)
+        parser.add_argument('--status')
+        parser.add_argument('--deed-type')
+        parser.add_argument('--date-from', help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--date-to', help='YYYY-MM-DD, inclusive')
+
+    def handle(self, *args, **options):
+        try:
+            qs = export_queryset(
+                office=options['office'],
+                status=options['status'],
+                deed_type=options['deed_type'],
+                date_from=options['date_from'],
+                date_to=options['date_to'],
+            )
+            chunks = export_chunks(qs, options['format'], options['gzip'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        out = open(options['out'], 'wb') if options['out'] else sys.stdout.buffer
+        try:
+            written = 0
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['out']:
+                out.close()
+        if options['out']:
+            self.stdout.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['out']}"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from Home.models import StoredDocument
+from Home.services.previews import build_previews
+
+
+class Command(BaseCommand):
+    help = 'Create thumbnails and extracted text for stored documents that have none'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate previews for every document')
+
+    def handle(self, *args, **options):
+        docs = StoredDocument.objects.all()
+        if not options['all']:
+            docs = docs.filter(previews_generated_at__isnull=True)
+
+        done = failed = 0
+        for doc in docs.iterator():
+            try:
+                build_previews(doc)
+                done += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'{doc.path}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(f'Previews generated for {done} documents ({failed} failed).'))
@@ -1,48 +1,120 @@
 import csv
-from django.core.management.base import BaseCommand
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from Home.models import SubRegistrarOffice
 
+
+district_map = {
+    'trivandrum': 'thiruvananthapuram',
+    'thiruvananthapuram': 'thiruvananthapuram',
+    'kollam': 'kollam',
+    'pathanamthitta': 'pathanamthitta',
+    'alappuzha': 'alappuzha',
+    'kottayam': 'kottayam',
+    'idukki': 'idukki',
+    'ernakulam': 'ernakulam',
+    'thrissur': 'thrissur',
+    'palakkad': 'palakkad',
+    'malappuram': 'malappuram',
+    'kozhikode': 'kozhikode',
+    'wayanad': 'wayanad',
+    'kannur': 'kannur',
+    'kasaragod': 'kasaragod',
+}
+
+NATURAL_KEY = ['district', 'name', 'locality']
+DETAIL_FIELDS = ['address', 'designated_officer', 'telephone']
+
+
+def _clean(value):
+    # the published list wraps long cells over several lines
+    return ' '.join((value or '').split())
+
+
+def office_from_row(row):
+    district_key = row['District in which Office located'].strip().lower()
+    district = district_map.get(district_key, district_key)
+
+    # Split office name and locality from the column
+    office_full = _clean(row['Name& Location of Office'])
+    if ',' in office_full:
+        name, locality = [part.strip() for part in office_full.split(',', 1)]
+    else:
+        name, locality = office_full, ''
+    # an office without one is named after its locality, which is how the
+    # existing rows were stored and what the locality dropdowns show
+    locality = locality or name
+
+    return SubRegistrarOffice(
+        district=district,
+        name=name,
+        locality=locality,
+        address=_clean(row.get('Address for Communication')),
+        designated_officer=_clean(row.get('Designated Officer')),
+        telephone=_clean(row.get('Telephone Number')),
+    )
+
+
+def _key(office):
+    return tuple(getattr(office, f) for f in NATURAL_KEY)
+
+
 class Command(BaseCommand):
-    help = 'Import districts and localities from CSV'
-
-    def handle(self, *args, **kwargs):
-        with open('Home/subregistrars.csv', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-
-            district_map = {
-                'trivandrum': 'thiruvananthapuram',
-                'thiruvananthapuram': 'thiruvananthapuram',
-                'kollam': 'kollam',
-                'pathanamthitta': 'pathanamthitta',
-                'alappuzha': 'alappuzha',
-                'kottayam': 'kottayam',
-                'idukki': 'idukki',
-                'ernakulam': 'ernakulam',
-                'thrissur': 'thrissur',
-                'palakkad': 'palakkad',
-                'malappuram': 'malappuram',
-                'kozhikode': 'kozhikode',
-                'wayanad': 'wayanad',
-                'kannur': 'kannur',
-                'kasaragod': 'kasaragod',
-            }
-
-            for row in reader:
-                district_key = row['District in which Office located'].strip().lower()
-                district = district_map.get(district_key, district_key)
-
-                # Split office name and locality from the column
-                office_full = row['Name& Location of Office'].strip()
-                if ',' in office_full:
-                    name, locality = [part.strip() for part in office_full.split(',', 1)]
-                else:
-                    name = office_full
-                    locality = ''  # blank if no locality info
-
-                SubRegistrarOffice.objects.create(
-                    name=name,
-                    district=district,
-                    locality=locality
-                )
+    help = 'Import districts and localities from CSV (safe to re-run: offices are upserted)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='Home/subregistrars.csv', help='CSV of the statewide office list')
+        parser.add_argument('--batch-size', type=int, default=500)
 
-        self.stdout.write(self.style.SUCCESS('CSV imported successfully!'))
+    def handle(self, *args, **options):
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        try:
+            with open(options['path'], newline='', encoding='utf-8') as csvfile:
+                batch = {}
+                for row in csv.DictReader(csvfile):
+                    office = office_from_row(row)
+                    if not office.name:
+                        continue
+                    batch[_key(office)] = office  # a later row for the same office wins
+                    if len(batch) >= options['batch_size']:
+                        self._sync(batch, counts)
+                        batch = {}
+                if batch:
+                    self._sync(batch, counts)
+        except FileNotFoundError:
+            raise CommandError(f"No such file: {options['path']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"CSV imported: {counts['inserted']} inserted, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged."
+        ))
+
+    def _sync(self, batch, counts):
+        existing = {
+            _key(office): office
+            for office in SubRegistrarOffice.objects.filter(
+                district__in={k[0] for k in batch}, name__in={k[1] for k in batch},
+            ).only(*NATURAL_KEY, *DETAIL_FIELDS)
+        }
+
+        changed = []
+        for key, office in batch.items():
+            current = existing.get(key)
+            if current is None:
+                counts['inserted'] += 1
+            elif any(getattr(current, f) != getattr(office, f) for f in DETAIL_FIELDS):
+                counts['updated'] += 1
+            else:
+                counts['unchanged'] += 1
+                continue
+            changed.append(office)
+
+        if changed:
+            with transaction.atomic():
+                SubRegistrarOffice.objects.bulk_create(
+                    changed,
+                    update_conflicts=True,
+                    unique_fields=NATURAL_KEY,
+                    update_fields=DETAIL_FIELDS,
+                )
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Home.services import indexer
+from Home.services.chain import ChainError
+
+
+class Command(BaseCommand):
+    help = 'Follow land registry contract events into the local ChainEvent table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep following the chain head')
+        parser.add_argument('--interval', type=int, default=5)
+        parser.add_argument('--max-range', type=int, default=indexer.MAX_RANGE,
+                            help='Most blocks requested in one eth_getLogs call')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                start, end, added = indexer.index_once(max_range=options['max_range'])
+            except ChainError as e:
+                self.stderr.write(f'Indexer error: {e}')
+                if not options['loop']:
+                    raise SystemExit(1)
+                time.sleep(options['interval'])
+                continue
+
+            caught_up = end < start
+            if not caught_up:
+                self.stdout.write(f'Blocks {start}-{end}: {added} events')
+            if not options['loop']:
+                break
+            if caught_up:
+                time.sleep(options['interval'])
@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from Home.services import stats
+from Home.services.ingest import ingest
+
+
+def _run_shard(options, shard, shards, rebuild_stats=True):
+    reject_path = options['rejects'] if shards == 1 else f"{options['rejects']}.{shard}"
+    try:
+        with open(reject_path, 'w', encoding='utf-8') as rejects:
+            return ingest(
+                options['path'],
+                fmt=options['format'],
+                shard=shard,
+                shards=shards,
+                batch_size=options['batch_size'],
+                default_status=options['status'],
+                reject_file=rejects,
+                rebuild_stats=rebuild_stats,
+            )
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Bulk load historical deeds from a legacy registry export (CSV or JSONL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Default: from the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--status', default='approved', help='Status for rows without one')
+        parser.add_argument('--rejects', help='JSONL file for rejected rows (default: <path>.rejects.jsonl)')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes to start; each owns a disjoint bucket of legacy_ref keys')
+        parser.add_argument('--shard', help='Run only bucket I of N, as "I/N", e.g. to spread work over hosts')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['path']):
+            raise CommandError(f"No such file: {options['path']}")
+        options['rejects'] = options['rejects'] or f"{options['path']}.rejects.jsonl"
+
+        if options['shard']:
+            try:
+                shard, shards = (int(part) for part in options['shard'].split('/'))
+            except ValueError:
+                raise CommandError('--shard must look like I/N')
+            if not 0 <= shard < shards:
+                raise CommandError('--shard index must be between 0 and N-1')
+            results = [_run_shard(options, shard, shards)]
+        elif options['workers'] > 1:
+            # forked workers must not share the parent's database connection
+            connections.close_all()
+            shards = options['workers']
+            with multiprocessing.get_context('fork').Pool(shards) as pool:
+                results = pool.starmap(_run_shard, [(options, i, shards, False) for i in range(shards)])
+            # one rebuild over every shard's dates, after all of them have committed
+            ranges = [r['dates'] for r in results if r['dates']]
+            if ranges:
+                stats.reconcile(min(first for first, _last in ranges), max(last for _first, last in ranges))
+        else:
+            results = [_run_shard(options, 0, 1)]
+
+        totals = {key: sum(r[key] for r in results) for key in ('inserted', 'skipped', 'rejected')}
+        self.stdout.write(self.style.SUCCESS(
+            f"Inserted {totals['inserted']}, skipped {totals['skipped']} already present, "
+            f"rejected {totals['rejected']}."
+        ))
+        if totals['rejected']:
+            self.stdout.write(f"Rejected rows written to {options['rejects']}*")
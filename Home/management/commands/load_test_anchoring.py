@@ -0,0 +1,221 @@
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from Home.models import AnchorBatch, Customer, SubRegistrar, SubRegistrarOffice, Transaction
+from Home.services import anchoring, chain, confirmations, gas
+from Home.services.simchain import SimulatedChain
+
+
+TERMINAL_STATES = ('confirmed', 'reverted', 'dropped')
+
+
+class Command(BaseCommand):
+    help = (
+        'Push approvals through application_approve and the anchoring pipeline '
+        'against a simulated chain, in a throwaway database, and report throughput. '
+        'Run with LAND_DB_PROFILE=production to measure the deployed SQLite settings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--approvals', type=int, default=2000)
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent approving registrars')
+        parser.add_argument('--batch-size', type=int, default=anchoring.BATCH_SIZE)
+        parser.add_argument('--max-wait', type=float, default=1.0,
+                            help='Seconds before a partial Merkle batch is sent')
+        parser.add_argument('--block-time', type=float, default=0.2)
+        parser.add_argument('--latency', type=float, default=0.0, help='Simulated RPC round trip, seconds')
+        parser.add_argument('--drop-rate', type=float, default=0.0)
+        parser.add_argument('--revert-rate', type=float, default=0.0)
+        parser.add_argument('--reorg-rate', type=float, default=0.0)
+        parser.add_argument('--reorg-depth', type=int, default=2)
+        parser.add_argument('--stuck-after', type=float, default=5.0,
+                            help='Seconds before an unmined anchor is replaced')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--timeout', type=float, default=600.0)
+
+    def handle(self, *args, **options):
+        from Home.services.fill_certificate import TEMPLATE
+
+        if not os.path.exists(TEMPLATE):
+            raise CommandError(f'Certificate template {TEMPLATE} is missing; approvals cannot complete.')
+        if settings.DB_PROFILE != 'production':
+            self.stderr.write(self.style.WARNING(
+                'LAND_DB_PROFILE is not "production": without WAL and IMMEDIATE transactions '
+                'the concurrent writers will fail with "database is locked".'
+            ))
+
+        sim = SimulatedChain(
+            block_time=options['block_time'],
+            seed=options['seed'],
+            drop_rate=options['drop_rate'],
+            revert_rate=options['revert_rate'],
+            reorg_rate=options['reorg_rate'],
+            reorg_depth=options['reorg_depth'],
+            latency=options['latency'],
+        )
+
+        with tempfile.TemporaryDirectory() as workdir:
+            # a file database, so concurrent threads behave as they would in production
+            connections['default'].settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(workdir, 'load.sqlite3')
+            setup_test_environment()
+            old_config = setup_databases(verbosity=0, interactive=False)
+            previous_client = chain.set_client(sim)
+            try:
+                with override_settings(
+                    CHAIN_SERVER_ANCHORING=True,
+                    CHAIN_ANCHOR_ACCOUNT=sim.accounts[0],
+                    CHAIN_ANCHOR_ADDRESS=sim.accounts[0],
+                    MEDIA_ROOT=workdir,
+                ):
+                    report = self._run(sim, options)
+            finally:
+                sim.stop()
+                chain.set_client(previous_client)
+                teardown_databases(old_config, verbosity=0)
+                teardown_test_environment()
+
+        self._print(report)
+
+    # ---- fixtures ----
+    def _seed(self, count, workers):
+        office = SubRegistrarOffice.objects.create(name='Load Test SRO', district='load', locality='test')
+        registrars = []
+        for i in range(workers):
+            user = User.objects.create_user(f'load-registrar-{i}', password=None)
+            SubRegistrar.objects.create(user=user, office=office)
+            registrars.append(user)
+
+        customer = Customer.objects.create(
+            user=User.objects.create_user('load-customer', password=None),
+            adhar_no='0' * 12,
+            phone_no='0000000000',
+        )
+        txs = []
+        for i in range(count):
+            tx = Transaction(
+                customer=customer, office=office, deed_type='sale', survey_number=f'{i}/1',
+                location='load test', valuation=1000 + i, party_name='party', party_contact='0',
+                party_id=f'P{i}', status='pending',
+            )
+            tx.refresh_deed_hash()
+            txs.append(tx)
+        Transaction.objects.bulk_create(txs, batch_size=500)
+        return registrars, list(Transaction.objects.order_by('pk').values_list('pk', flat=True))
+
+    # ---- load ----
+    def _approve(self, user, pks, latencies, errors):
+        client = Client()
+        client.force_login(user)
+        try:
+            for pk in pks:
+                started = time.perf_counter()
+                response = client.post(f'/applications/{pk}/approve/', data='{}', content_type='application/json')
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors.append(f'#{pk}: HTTP {response.status_code}')
+        finally:
+            close_old_connections()
+
+    def _pipeline(self, sim, options, done, marks):
+        max_wait = timedelta(seconds=options['max_wait'])
+        stuck_after = timedelta(seconds=options['stuck_after'])
+        try:
+            while not done.is_set():
+                anchoring.anchor_due(options['batch_size'], max_wait, client=sim)
+                confirmations.poll_once(sim)
+                gas.replace_stuck(sim, older_than=stuck_after)
+
+                if 'approved' in marks:
+                    # all approvals are in; watch the queue drain
+                    if not anchoring.pending_transactions().exists():
+                        marks.setdefault('anchored', time.monotonic())
+                    if not Transaction.objects.exclude(chain_status__in=TERMINAL_STATES).exists():
+                        marks['settled'] = time.monotonic()
+                        return
+                time.sleep(options['block_time'])
+        finally:
+            close_old_connections()
+
+    def _run(self, sim, options):
+        registrars, pks = self._seed(options['approvals'], options['workers'])
+        latencies, errors, marks = [], [], {}
+        done = threading.Event()
+
+        sim.start()
+        pipeline = threading.Thread(target=self._pipeline, args=(sim, options, done, marks))
+        approvers = [
+            threading.Thread(target=self._approve, args=(user, pks[i::len(registrars)], latencies, errors))
+            for i, user in enumerate(registrars)
+        ]
+
+        started = time.monotonic()
+        pipeline.start()
+        for t in approvers:
+            t.start()
+        for t in approvers:
+            t.join()
+        marks['approved'] = time.monotonic()
+
+        pipeline.join(timeout=options['timeout'])
+        timed_out = pipeline.is_alive()
+        done.set()
+        pipeline.join()
+
+        statuses = dict(
+            Transaction.objects.order_by().values('chain_status').annotate(n=Count('pk')).values_list('chain_status', 'n')
+        )
+        return {
+            'approvals': len(latencies),
+            'errors': errors,
+            'started': started,
+            'marks': marks,
+            'timed_out': timed_out,
+            'latencies': sorted(latencies),
+            'statuses': statuses,
+            'batches': AnchorBatch.objects.filter(status='submitted').count(),
+            'failed_batches': AnchorBatch.objects.filter(status='failed').count(),
+            'replacements': sum(AnchorBatch.objects.values_list('replacements', flat=True)),
+            'blocks': sim.head,
+            'rpc_requests': sim.requests_sent,
+            'reorgs': sim.reorgs,
+            'dropped': sim.dropped,
+        }
+
+    # ---- report ----
+    def _print(self, r):
+        marks, started, lat = r['marks'], r['started'], r['latencies']
+        approve_time = marks['approved'] - started
+        self.stdout.write(f"Approvals: {r['approvals']} in {approve_time:.1f}s "
+                          f"({r['approvals'] / approve_time:.0f}/s), {len(r['errors'])} errors")
+        if lat:
+            self.stdout.write(
+                f"Approve latency ms: p50 {statistics.median(lat) * 1000:.0f}, "
+                f"p95 {lat[int(len(lat) * 0.95) - 1] * 1000:.0f}, max {lat[-1] * 1000:.0f}"
+            )
+        for label, key in (('All anchored', 'anchored'), ('All settled', 'settled')):
+            if key in marks:
+                self.stdout.write(f'{label} after {marks[key] - started:.1f}s')
+        self.stdout.write(
+            f"Batches: {r['batches']} submitted, {r['failed_batches']} failed, {r['replacements']} replacements"
+        )
+        self.stdout.write(
+            f"Chain: {r['blocks']} blocks, {r['rpc_requests']} RPC requests, "
+            f"{r['reorgs']} reorgs, {r['dropped']} dropped"
+        )
+        self.stdout.write('Chain status: ' + ', '.join(f'{k or "untracked"}={v}' for k, v in sorted(r['statuses'].items())))
+        for error in r['errors'][:10]:
+            self.stderr.write(error)
+        if r['timed_out']:
+            self.stderr.write('Timed out before every approval reached a final chain status.')
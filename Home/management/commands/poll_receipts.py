@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Home.services import confirmations
+from Home.services.chain import ChainError
+
+
+class Command(BaseCommand):
+    help = 'Track mining and confirmation depth of stored blockchain hashes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling every --interval seconds')
+        parser.add_argument('--interval', type=int, default=15)
+        parser.add_argument('--max-backoff', type=int, default=300,
+                            help='Longest wait between attempts while the node is unreachable')
+        parser.add_argument('--batch-size', type=int, default=confirmations.RPC_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        delay = options['interval']
+        while True:
+            try:
+                summary = confirmations.poll_once(batch_size=options['batch_size'])
+                if summary:
+                    self.stdout.write(', '.join(f'{k}: {v}' for k, v in sorted(summary.items())))
+                delay = options['interval']
+            except ChainError as e:
+                self.stderr.write(f'Node unreachable: {e}')
+                delay = min(delay * 2, options['max_backoff'])
+                if not options['loop']:
+                    raise SystemExit(1)
+
+            if not options['loop']:
+                break
+            time.sleep(delay)
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from Home.models import StoredDocument
+from Home.services.uploads import prune_abandoned_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete stored documents that no transaction references any more, and abandoned uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-hours', type=int, default=24,
+                            help='Keep unreferenced documents and unfinished uploads touched more recently than this')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['older_than_hours'])
+        orphans = StoredDocument.objects.filter(ref_count=0, last_used_at__lt=cutoff)
+
+        removed = 0
+        for pk in list(orphans.values_list('pk', flat=True)):
+            with transaction.atomic():
+                # re-check under the row lock: a new reference may have arrived
+                doc = orphans.select_for_update().filter(pk=pk).first()
+                if doc is None:
+                    continue
+                doc.delete()
+            for name in (doc.path, doc.preview_path, doc.text_path):
+                if name:
+                    default_storage.delete(name)
+            removed += 1
+
+        uploads, staged = prune_abandoned_uploads(cutoff)
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {removed} unreferenced documents, {uploads} abandoned uploads and {staged} staged files.'
+        ))
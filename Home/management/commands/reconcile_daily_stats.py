@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Home.services import stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily transaction statistics from the transactions table (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help='Rebuild this many most recent days')
+        parser.add_argument('--all', action='store_true', help='Rebuild every day')
+
+    def handle(self, *args, **options):
+        start = None if options['all'] else timezone.localdate() - timedelta(days=options['days'] - 1)
+        wrong = stats.reconcile(start=start)
+        scope = 'all days' if start is None else f'since {start}'
+
+        if start is not None:
+            # older days whose totals drifted, e.g. history loaded with bulk_create
+            older = [day for day in stats.stale_dates() if day < start]
+            for first, last in stats.date_ranges(older):
+                wrong += stats.reconcile(first, last)
+            if older:
+                scope += f' and {len(older)} older days that were out of date'
+        self.stdout.write(self.style.SUCCESS(f'Daily statistics rebuilt for {scope}; {wrong} buckets corrected.'))
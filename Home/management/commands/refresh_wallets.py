@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Home.services import wallets
+from Home.services.chain import ChainError
+
+
+class Command(BaseCommand):
+    help = 'Refresh cached balances and nonces of customer wallets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep refreshing every --interval seconds')
+        parser.add_argument('--interval', type=int, default=60)
+        parser.add_argument('--all', action='store_true', help='Refresh every wallet, not only stale ones')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                count = wallets.refresh_wallets(stale_only=not options['all'])
+                if count:
+                    self.stdout.write(f'Refreshed {count} wallets.')
+            except ChainError as e:
+                self.stderr.write(f'Wallet refresh failed: {e}')
+                if not options['loop']:
+                    raise SystemExit(1)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from Home.models import Transaction
+
+
+class Command(BaseCommand):
+    help = 'Recompute deed hashes and report rows whose deed data changed without save()'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report, do not store new hashes')
+
+    def handle(self, *args, **options):
+        changed = []
+        for tx in Transaction.objects.all().iterator(chunk_size=1000):
+            if tx.refresh_deed_hash():
+                changed.append(tx)
+                self.stdout.write(f'Transaction #{tx.id}: deed hash changed'
+                                  + (' (already anchored)' if tx.anchor_batch_id else ''))
+
+        if changed and not options['dry_run']:
+            Transaction.objects.bulk_update(changed, ['deed_hash', 'deed_hash_version'], batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(f'{len(changed)} transactions had stale deed hashes.'))
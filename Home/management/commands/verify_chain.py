@@ -0,0 +1,112 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+
+from Home.models import Transaction
+from Home.services.chain import get_client
+from Home.services.verification import verify_chunk
+
+
+class Command(BaseCommand):
+    help = 'Audit approved transactions against the chain and write a resumable mismatch report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--report', default='chain_audit.jsonl', help='JSONL file for mismatches and checkpoints')
+        parser.add_argument('--resume', action='store_true', help='Continue after the last checkpoint in --report')
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=4, help='Batched RPC requests in flight at once')
+
+    def handle(self, *args, **options):
+        start_after, reported = self._read_report(options['report']) if options['resume'] else (0, set())
+        mode = 'a' if options['resume'] else 'w'
+        with open(options['report'], mode, encoding='utf-8') as report:
+            checked, problems, elapsed = asyncio.run(self._run(report, start_after, reported, options))
+
+        rate = checked / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} transactions in {elapsed:.1f}s ({rate:.0f}/s), {problems} mismatches.'
+        ))
+
+    @staticmethod
+    def _read_report(path):
+        """
+        The last checkpoint in an earlier report and the transaction ids it
+        already flagged. Chunks after the checkpoint are checked again, and
+        some of their mismatches may have been written before the run stopped.
+        A last line cut short when the run was killed is cut off.
+        """
+        last, reported = 0, set()
+        try:
+            with open(path, 'r+b') as fh:
+                complete = 0
+                for line in fh:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    complete += len(line)
+                    if 'checkpoint' in record:
+                        last = max(last, record['checkpoint'])
+                    elif 'id' in record:
+                        reported.add(record['id'])
+                fh.truncate(complete)
+        except FileNotFoundError:
+            pass
+        return last, reported
+
+    @staticmethod
+    def _load_chunk(after_id, size):
+        return list(
+            Transaction.objects
+            .filter(status='approved', blockchain_hash__isnull=False, pk__gt=after_id)
+            .exclude(blockchain_hash='')
+            .select_related('anchor_batch')
+            .order_by('pk')[:size]
+        )
+
+    async def _run(self, report, start_after, reported, options):
+        client = get_client()
+        sem = asyncio.Semaphore(options['concurrency'])
+        started = time.monotonic()
+        checked = problems = 0
+
+        # chunks finish out of order; only checkpoint the contiguous prefix
+        finished, order, next_checkpoint = {}, [], 0
+
+        async def verify(seq, chunk):
+            nonlocal checked, problems, next_checkpoint
+            async with sem:
+                found = await asyncio.to_thread(verify_chunk, client, chunk)
+            found = [problem for problem in found if problem['id'] not in reported]
+            for problem in found:
+                report.write(json.dumps(problem) + '\n')
+            checked += len(chunk)
+            problems += len(found)
+            finished[seq] = chunk[-1].pk
+            while next_checkpoint < len(order) and next_checkpoint in finished:
+                report.write(json.dumps({'checkpoint': finished.pop(next_checkpoint)}) + '\n')
+                next_checkpoint += 1
+            report.flush()
+            if seq % 10 == 0:
+                rate = checked / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(f'  {checked} checked, {problems} mismatches, {rate:.0f}/s')
+
+        tasks, after = [], start_after
+        while True:
+            chunk = await sync_to_async(self._load_chunk)(after, options['chunk_size'])
+            if not chunk:
+                break
+            after = chunk[-1].pk
+            order.append(after)
+            # keep at most `concurrency` chunks waiting so memory stays flat
+            while len([t for t in tasks if not t.done()]) >= options['concurrency'] * 2:
+                await asyncio.sleep(0.01)
+            tasks.append(asyncio.create_task(verify(len(order) - 1, chunk)))
+
+        await asyncio.gather(*tasks)
+        return checked, problems, time.monotonic() - started
@@ -0,0 +1,76 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .routers import end_request, start_request
+from .services.roles import get_role
+
+
+PIN_COOKIE = "land_primary"
+
+
+class ReplicaPinningMiddleware:
+    """
+    Route this request's reads to the replica unless the client wrote
+    recently. The marker is a short-lived cookie rather than a session key so
+    pinning never adds a session write.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _start(self, request):
+        return start_request(pinned=PIN_COOKIE in request.COOKIES or request.method not in ("GET", "HEAD"))
+
+    def _finish(self, response, wrote):
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE, "1",
+                max_age=getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 10),
+                httponly=True, samesite="Lax",
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = end_request(token)
+        return self._finish(response, wrote)
+
+    async def __acall__(self, request):
+        token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            wrote = end_request(token)
+        return self._finish(response, wrote)
+
+
+class RoleMiddleware:
+    """
+    Expose the user's role and profile as request.role, resolved on first use
+    and shared with is_admin_user, so a registrar page looks it up once.
+    Must come after AuthenticationMiddleware. The lazy lookup is synchronous:
+    async views call aget_role() instead.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.role = SimpleLazyObject(lambda: get_role(request.user))
+        return self.get_response(request)
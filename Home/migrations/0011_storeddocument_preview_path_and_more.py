@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0010_storeddocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storeddocument',
+            name='preview_path',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='storeddocument',
+            name='previews_generated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='storeddocument',
+            name='text_path',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0012_anchorbatch_transaction_merkle_index_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='chain_block_number',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='chain_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='chain_confirmations',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='chain_status',
+            field=models.CharField(blank=True, choices=[('', 'Not checked'), ('pending', 'Awaiting mining'), ('mined', 'Mined'), ('confirmed', 'Confirmed'), ('dropped', 'Dropped'), ('reverted', 'Reverted')], default='', max_length=10),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0013_transaction_chain_block_number_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexedBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.BigIntegerField(unique=True)),
+                ('hash', models.CharField(max_length=66)),
+                ('timestamp', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='IndexerCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('block_number', models.BigIntegerField(default=-1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ChainEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('block_number', models.BigIntegerField()),
+                ('block_hash', models.CharField(max_length=66)),
+                ('tx_hash', models.CharField(db_index=True, max_length=66)),
+                ('log_index', models.PositiveIntegerField()),
+                ('contract_address', models.CharField(max_length=42)),
+                ('topic0', models.CharField(blank=True, db_index=True, max_length=66)),
+                ('topics', models.JSONField(default=list)),
+                ('data', models.TextField(blank=True)),
+                ('anchor_batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='chain_events', to='Home.anchorbatch')),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='chain_events', to='Home.transaction')),
+            ],
+            options={
+                'ordering': ['block_number', 'log_index'],
+                'indexes': [models.Index(fields=['contract_address', 'block_number'], name='Home_chaine_contrac_88c62e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tx_hash', 'log_index'), name='unique_chain_event')],
+            },
+        ),
+    ]
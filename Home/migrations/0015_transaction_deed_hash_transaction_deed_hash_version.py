@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:50
+
+import hashlib
+import json
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def deed_hash_v1(tx):
+    """Version 1 of Home.services.deed_hash, frozen as it stood when this migration was written."""
+    payload = {
+        "v": 1,
+        "deed_type": tx.deed_type or "",
+        "survey_number": (tx.survey_number or "").strip(),
+        "location": (tx.location or "").strip(),
+        "valuation": str(Decimal(tx.valuation or 0).quantize(Decimal("0.01"))),
+        "parties": {
+            "customer": str(tx.customer_id or ""),
+            "name": (tx.party_name or "").strip(),
+            "contact": (tx.party_contact or "").strip(),
+            "id": (tx.party_id or "").strip(),
+        },
+        "office": str(tx.office_id or ""),
+        "documents": [str(d) for d in (tx.documents or [])],
+    }
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def backfill_deed_hashes(apps, schema_editor):
+    Transaction = apps.get_model("Home", "Transaction")
+    batch = []
+    for tx in Transaction.objects.all().iterator(chunk_size=1000):
+        tx.deed_hash = deed_hash_v1(tx)
+        tx.deed_hash_version = 1
+        batch.append(tx)
+        if len(batch) >= 1000:
+            Transaction.objects.bulk_update(batch, ["deed_hash", "deed_hash_version"])
+            batch = []
+    Transaction.objects.bulk_update(batch, ["deed_hash", "deed_hash_version"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0014_indexedblock_indexercheckpoint_chainevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='deed_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='deed_hash_version',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.RunPython(backfill_deed_hashes, migrations.RunPython.noop),
+    ]
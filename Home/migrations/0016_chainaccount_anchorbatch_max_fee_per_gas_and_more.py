@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0015_transaction_deed_hash_transaction_deed_hash_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChainAccount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=42, unique=True)),
+                ('next_nonce', models.BigIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='anchorbatch',
+            name='max_fee_per_gas',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='anchorbatch',
+            name='max_priority_fee_per_gas',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='anchorbatch',
+            name='nonce',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='anchorbatch',
+            name='replacements',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:01
+
+from django.db import migrations, models
+
+
+def merge_duplicate_offices(apps, schema_editor):
+    """
+    Collapse offices that share (district, name, locality) once whitespace is
+    normalised, pointing customers, registrars and deeds at the oldest row.
+    Repeated runs of the old import command left one copy per run.
+    """
+    Office = apps.get_model("Home", "SubRegistrarOffice")
+    referencing = [
+        apps.get_model("Home", "Customer"),
+        apps.get_model("Home", "SubRegistrar"),
+        apps.get_model("Home", "Transaction"),
+    ]
+
+    keep = {}
+    for office in Office.objects.order_by("pk").iterator():
+        name, locality = " ".join(office.name.split()), " ".join(office.locality.split())
+        key = (office.district, name, locality)
+        if key not in keep:
+            keep[key] = office.pk
+            if (name, locality) != (office.name, office.locality):
+                Office.objects.filter(pk=office.pk).update(name=name, locality=locality)
+            continue
+        for model in referencing:
+            model.objects.filter(office_id=office.pk).update(office_id=keep[key])
+        office.delete()
+
+
+class Migration(migrations.Migration):
+    """
+    Not atomic, so the merge commits in its own transaction before the unique
+    constraint is added: PostgreSQL refuses ALTER TABLE while the merge's
+    deferred foreign key checks are still pending.
+    """
+
+    atomic = False
+
+    dependencies = [
+        ('Home', '0017_walletsnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_offices, migrations.RunPython.noop, atomic=True),
+        migrations.AddField(
+            model_name='subregistraroffice',
+            name='address',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='subregistraroffice',
+            name='designated_officer',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='subregistraroffice',
+            name='telephone',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='subregistraroffice',
+            constraint=models.UniqueConstraint(fields=('district', 'name', 'locality'), name='unique_office_natural_key'),
+        ),
+    ]
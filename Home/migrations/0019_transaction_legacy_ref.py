@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0018_subregistraroffice_natural_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='legacy_ref',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:05
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def build_rollup(apps, schema_editor):
+    Transaction = apps.get_model("Home", "Transaction")
+    DailyTransactionStat = apps.get_model("Home", "DailyTransactionStat")
+    rows = (
+        Transaction.objects.order_by()
+        .annotate(day=TruncDate("submission_date"))
+        .values("day", "office_id", "deed_type", "status")
+        .annotate(n=Count("id"), total=Sum("valuation"))
+    )
+    DailyTransactionStat.objects.bulk_create([
+        DailyTransactionStat(
+            date=row["day"], office_id=row["office_id"], deed_type=row["deed_type"],
+            status=row["status"], count=row["n"], valuation_sum=row["total"] or 0,
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0019_transaction_legacy_ref'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTransactionStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('deed_type', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('valuation_sum', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=24)),
+                ('office', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='Home.subregistraroffice')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'date'], name='Home_dailyt_status_07d58b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'office', 'deed_type', 'status'), name='unique_daily_stat_bucket')],
+            },
+        ),
+        migrations.RunPython(build_rollup, migrations.RunPython.noop),
+    ]
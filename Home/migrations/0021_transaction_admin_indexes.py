@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0020_dailytransactionstat'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='blockchain_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='survey_number',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['-submission_date'], name='transaction_submiss_861923_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', '-submission_date'], name='transaction_status_28cc39_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['deed_type', '-submission_date'], name='transaction_deed_ty_9a563b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['office', '-submission_date'], name='transaction_office__01879d_idx'),
+        ),
+    ]
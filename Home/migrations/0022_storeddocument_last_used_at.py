@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0021_transaction_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storeddocument',
+            name='last_used_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
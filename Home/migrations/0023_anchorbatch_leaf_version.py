@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0022_storeddocument_last_used_at'),
+    ]
+
+    operations = [
+        # batches anchored so far committed to the bare deed_hash
+        migrations.AddField(
+            model_name='anchorbatch',
+            name='leaf_version',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.AlterField(
+            model_name='anchorbatch',
+            name='leaf_version',
+            field=models.PositiveSmallIntegerField(default=2),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0023_anchorbatch_leaf_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='anchorbatch',
+            name='superseded_hashes',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0024_anchorbatch_superseded_hashes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='document_names',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
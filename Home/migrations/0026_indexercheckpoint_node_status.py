@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0025_transaction_document_names'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indexercheckpoint',
+            name='node_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='indexercheckpoint',
+            name='node_error',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='indexercheckpoint',
+            name='node_gas_price_wei',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='indexercheckpoint',
+            name='node_head',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
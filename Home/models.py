@@ -1,8 +1,11 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User, Group
 from django.utils import timezone
 from decimal import Decimal
 
+from .services.deed_hash import DEED_HASH_VERSION, HASHED_FIELDS, compute_deed_hash
+
 
 # ---------------------------
 #   ROLE HELPERS
@@ -50,6 +53,42 @@ class Customer(models.Model):
     def __str__(self):
         return self.user.get_full_name() or self.user.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored wallet: rows from before address validation
+        # may hold a malformed one, which only blocks a save once edited
+        instance._loaded_eth_address = instance.__dict__.get("eth_address")
+        return instance
+
+    def eth_address_changed(self):
+        return self.eth_address != getattr(self, "_loaded_eth_address", None)
+
+    def clean(self):
+        super().clean()
+        if self.eth_address_changed():
+            self.eth_address = self.checksummed_eth_address()
+
+    def save(self, *args, **kwargs):
+        # store wallets in EIP-55 form so lookups and the balance cache agree
+        if self.eth_address_changed():
+            self.eth_address = self.checksummed_eth_address()
+        super().save(*args, **kwargs)
+        self._loaded_eth_address = self.eth_address
+
+    def checksummed_eth_address(self):
+        """eth_address in EIP-55 form; raises ValidationError if it is not a valid address."""
+        if not self.eth_address:
+            return self.eth_address
+        from .services.wallets import to_checksum_address, validate_eth_address
+
+        address = self.eth_address.strip()
+        try:
+            validate_eth_address(address)
+        except ValidationError as e:
+            raise ValidationError({"eth_address": e.messages})
+        return to_checksum_address(address)
+
     @property
     def group(self):
         return "Resident"
@@ -66,6 +105,16 @@ class SubRegistrarOffice(models.Model):
     district = models.CharField(max_length=64)
     locality = models.CharField(max_length=255, blank=True)
 
+    # contact details from the statewide office list (import_subregistrars)
+    address = models.TextField(blank=True)
+    designated_officer = models.CharField(max_length=255, blank=True)
+    telephone = models.CharField(max_length=64, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["district", "name", "locality"], name="unique_office_natural_key"),
+        ]
+
     def __str__(self):
         return f"{self.district}, {self.locality} - {self.name}"
 
@@ -131,7 +180,7 @@ class Transaction(models.Model):
     )
 
     deed_type = models.CharField(max_length=20, choices=DEED_TYPE_CHOICES)
-    survey_number = models.CharField(max_length=100)
+    survey_number = models.CharField(max_length=100, db_index=True)
     location = models.CharField(max_length=255)
 
     valuation = models.DecimalField(max_digits=18, decimal_places=2)
@@ -146,6 +195,9 @@ class Transaction(models.Model):
     certificate_file = models.FileField(upload_to="certificates/", null=True, blank=True)
 
     documents = models.JSONField(default=list, blank=True)
+    # path -> the filename this applicant uploaded it under; identical
+    # files from different applicants share one StoredDocument
+    document_names = models.JSONField(default=dict, blank=True)
 
     verified_by = models.ForeignKey(
         SubRegistrar,
@@ -177,17 +229,324 @@ class Transaction(models.Model):
     )
 
     # blockchain result
-    blockchain_hash = models.CharField(max_length=100, blank=True, null=True)
+    blockchain_hash = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     blockchain_anchored_at = models.DateTimeField(null=True, blank=True)
 
+    # canonical digest of the deed fields (Home.services.deed_hash), kept current by save()
+    deed_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    deed_hash_version = models.PositiveSmallIntegerField(default=DEED_HASH_VERSION)
+
+    # receipt tracking, written by the poll_receipts worker only
+    CHAIN_STATUS_CHOICES = [
+        ("", "Not checked"),
+        ("pending", "Awaiting mining"),
+        ("mined", "Mined"),
+        ("confirmed", "Confirmed"),
+        ("dropped", "Dropped"),
+        ("reverted", "Reverted"),
+    ]
+    chain_status = models.CharField(max_length=10, choices=CHAIN_STATUS_CHOICES, default="", blank=True)
+    chain_block_number = models.BigIntegerField(null=True, blank=True)
+    chain_confirmations = models.PositiveIntegerField(default=0)
+    chain_checked_at = models.DateTimeField(null=True, blank=True)
+
+    # Merkle batch anchoring (Home.services.anchoring)
+    anchor_batch = models.ForeignKey(
+        "Home.AnchorBatch",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="transactions",
+    )
+    merkle_index = models.PositiveIntegerField(null=True, blank=True)
+    merkle_proof = models.JSONField(default=list, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     contract_address = models.CharField(max_length=200, blank=True, null=True)
+
+    # record id in the legacy registry this deed was migrated from (ingest_transactions)
+    legacy_ref = models.CharField(max_length=100, unique=True, null=True, blank=True)
+
     class Meta:
         ordering = ["-submission_date"]
         db_table = "transactions"
         verbose_name = "Transaction"
         verbose_name_plural = "Transactions"
+        # the admin changelist and dashboards filter on these and sort newest first
+        indexes = [
+            models.Index(fields=["-submission_date"]),
+            models.Index(fields=["status", "-submission_date"]),
+            models.Index(fields=["deed_type", "-submission_date"]),
+            models.Index(fields=["office", "-submission_date"]),
+        ]
 
     def __str__(self):
         return f"Transaction #{self.id} - {self.deed_type} ({self.status})"
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or HASHED_FIELDS.intersection(update_fields):
+            self.refresh_deed_hash()
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | {"deed_hash", "deed_hash_version"}
+        super().save(*args, **kwargs)
+
+    def refresh_deed_hash(self):
+        """Recompute the deed hash; returns True if it changed."""
+        digest = compute_deed_hash(self)
+        changed = digest != self.deed_hash or self.deed_hash_version != DEED_HASH_VERSION
+        self.deed_hash, self.deed_hash_version = digest, DEED_HASH_VERSION
+        return changed
+
+    @property
+    def deed_hash_is_current(self):
+        return self.deed_hash == compute_deed_hash(self, self.deed_hash_version)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember what was stored so signals can adjust document ref counts
+        instance._loaded_documents = list(instance.__dict__.get("documents") or [])
+        # ... and which daily statistics bucket the row was counted in
+        instance._loaded_stat = instance.stat_bucket() if not instance.get_deferred_fields() & STAT_FIELDS else None
+        return instance
+
+    def stat_bucket(self):
+        """(day, office_id, deed_type, status, valuation) as counted in DailyTransactionStat."""
+        return (
+            timezone.localdate(self.submission_date) if self.submission_date else None,
+            self.office_id,
+            self.deed_type,
+            self.status,
+            Decimal(self.valuation or 0),
+        )
+
+
+# fields that decide a transaction's DailyTransactionStat bucket
+STAT_FIELDS = {"submission_date", "office_id", "deed_type", "status", "valuation"}
+
+
+# ---------------------------
+#   RESUMABLE DOCUMENT UPLOADS
+# ---------------------------
+class ChunkedUpload(models.Model):
+    upload_id = models.CharField(max_length=32, unique=True)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="chunked_uploads")
+
+    filename = models.CharField(max_length=255)
+    total_bytes = models.BigIntegerField(default=0)
+    received_bytes = models.BigIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.total_bytes})"
+
+    @property
+    def is_complete(self):
+        return self.total_bytes > 0 and self.received_bytes == self.total_bytes
+
+
+# ---------------------------
+#   CONTENT-ADDRESSED DOCUMENTS
+# ---------------------------
+class StoredDocument(models.Model):
+    """
+    One physical copy of an uploaded document, keyed by its SHA-256.
+    ref_count is the number of transactions whose `documents` list the path.
+    `filename` is the first uploader's name for it; each transaction keeps
+    its own in Transaction.document_names.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    path = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    filename = models.CharField(max_length=255, blank=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    # last time an upload matched this digest or a reference was dropped;
+    # prune_documents only removes unreferenced copies idle for a while
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    # small derived files written next to the original by Home.services.previews
+    preview_path = models.CharField(max_length=255, blank=True)
+    text_path = models.CharField(max_length=255, blank=True)
+    previews_generated_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} refs)"
+
+
+# ---------------------------
+#   MERKLE ANCHOR BATCHES
+# ---------------------------
+class AnchorBatch(models.Model):
+    """One on-chain transaction committing to the Merkle root of many deeds."""
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("submitted", "Submitted"),
+        ("failed", "Failed"),
+    ]
+
+    # 1: leaf = deed_hash; 2: leaf = 8-byte big-endian transaction id || deed_hash
+    LEAF_VERSION = 2
+
+    merkle_root = models.CharField(max_length=64)
+    leaf_count = models.PositiveIntegerField()
+    leaf_version = models.PositiveSmallIntegerField(default=LEAF_VERSION)
+
+    tx_hash = models.CharField(max_length=100, blank=True, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    error = models.TextField(blank=True)
+
+    # fee and nonce used for tx_hash; a replacement keeps the nonce, raises the fees
+    nonce = models.BigIntegerField(null=True, blank=True)
+    max_fee_per_gas = models.BigIntegerField(null=True, blank=True)
+    max_priority_fee_per_gas = models.BigIntegerField(null=True, blank=True)
+    replacements = models.PositiveIntegerField(default=0)
+    # earlier hashes sent with the same nonce; whichever one is mined wins
+    superseded_hashes = models.JSONField(default=list, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Batch #{self.id} ({self.leaf_count} deeds, {self.status})"
+
+
+class ChainAccount(models.Model):
+    """Server-side sending account; next_nonce is handed out under a row lock."""
+    address = models.CharField(max_length=42, unique=True)
+    next_nonce = models.BigIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.address} (next nonce {self.next_nonce})"
+
+
+# ---------------------------
+#   LOCAL CHAIN EVENT INDEX
+# ---------------------------
+class ChainEvent(models.Model):
+    """A log emitted by the land registry contract, copied from the chain by index_chain_events."""
+    block_number = models.BigIntegerField()
+    block_hash = models.CharField(max_length=66)
+    tx_hash = models.CharField(max_length=66, db_index=True)
+    log_index = models.PositiveIntegerField()
+
+    contract_address = models.CharField(max_length=42)
+    topic0 = models.CharField(max_length=66, blank=True, db_index=True)
+    topics = models.JSONField(default=list)
+    data = models.TextField(blank=True)
+
+    transaction = models.ForeignKey(
+        Transaction,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="chain_events",
+    )
+    anchor_batch = models.ForeignKey(
+        AnchorBatch,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="chain_events",
+    )
+
+    class Meta:
+        ordering = ["block_number", "log_index"]
+        constraints = [
+            models.UniqueConstraint(fields=["tx_hash", "log_index"], name="unique_chain_event"),
+        ]
+        indexes = [
+            models.Index(fields=["contract_address", "block_number"]),
+        ]
+
+    def __str__(self):
+        return f"{self.tx_hash}#{self.log_index} @ {self.block_number}"
+
+
+class IndexedBlock(models.Model):
+    """Recent block hashes the indexer has seen, kept for reorg detection."""
+    number = models.BigIntegerField(unique=True)
+    hash = models.CharField(max_length=66)
+    timestamp = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-number"]
+
+    def __str__(self):
+        return f"#{self.number} {self.hash[:12]}"
+
+
+class IndexerCheckpoint(models.Model):
+    name = models.CharField(max_length=64, unique=True)
+    block_number = models.BigIntegerField(default=-1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # what the node reported on the indexer's last pass, so pages never ask it
+    node_head = models.BigIntegerField(null=True, blank=True)
+    node_gas_price_wei = models.BigIntegerField(null=True, blank=True)
+    node_error = models.CharField(max_length=255, blank=True)
+    node_checked_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name}: #{self.block_number}"
+
+
+# ---------------------------
+#   WALLET BALANCE CACHE
+# ---------------------------
+class WalletSnapshot(models.Model):
+    """Balance and nonce of a wallet, refreshed in the background by refresh_wallets."""
+    address = models.CharField(max_length=42, unique=True)
+    balance_wei = models.DecimalField(max_digits=40, decimal_places=0, null=True, blank=True)
+    nonce = models.BigIntegerField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.address}: {self.balance_eth} ETH"
+
+    @property
+    def balance_eth(self):
+        if self.balance_wei is None:
+            return None
+        return Decimal(self.balance_wei) / Decimal(10**18)
+
+    @property
+    def is_stale(self):
+        from .services.wallets import WALLET_TTL
+        return self.refreshed_at is None or self.refreshed_at < timezone.now() - WALLET_TTL
+
+
+# ---------------------------
+#   DAILY STATISTICS ROLLUP
+# ---------------------------
+class DailyTransactionStat(models.Model):
+    """
+    Transactions submitted per day, office, deed type and current status.
+    Kept up to date by signals on Transaction (Home.services.stats) and
+    rebuilt by the reconcile_daily_stats command.
+    """
+    date = models.DateField()
+    office = models.ForeignKey(SubRegistrarOffice, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    deed_type = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+    valuation_sum = models.DecimalField(max_digits=24, decimal_places=2, default=Decimal("0"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "office", "deed_type", "status"], name="unique_daily_stat_bucket"),
+        ]
+        indexes = [models.Index(fields=["status", "date"])]
+
+    def __str__(self):
+        return f"{self.date} {self.office_id} {self.deed_type}/{self.status}: {self.count}"
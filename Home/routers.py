@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+PRIMARY = "default"
+
+# None -> not inside a routed request (commands, workers): always primary.
+# Inside a request this holds {"pinned": bool, "wrote": bool}.
+_request_state = ContextVar("land_db_routing", default=None)
+
+
+def replica_alias():
+    alias = getattr(settings, "DATABASE_REPLICA_ALIAS", None)
+    return alias if alias in settings.DATABASES else None
+
+
+def start_request(pinned):
+    return _request_state.set({"pinned": bool(pinned), "wrote": False})
+
+
+def end_request(token):
+    """Reset routing state; returns True if the request wrote to primary."""
+    state = _request_state.get()
+    _request_state.reset(token)
+    return bool(state and state["wrote"])
+
+
+def _pinned():
+    state = _request_state.get()
+    return state is None or state["pinned"]
+
+
+def pin_primary():
+    state = _request_state.get()
+    if state is not None:
+        state["pinned"] = state["wrote"] = True
+
+
+@contextmanager
+def use_primary():
+    """Force primary reads inside the block, e.g. right before a write decision."""
+    state = _request_state.get()
+    if state is None:
+        yield
+        return
+    was_pinned, state["pinned"] = state["pinned"], True
+    try:
+        yield
+    finally:
+        # a write inside the block keeps the request pinned
+        state["pinned"] = was_pinned or state["wrote"]
+
+
+class PrimaryReplicaRouter:
+    """
+    Reads go to settings.DATABASE_REPLICA_ALIAS, writes go to primary.
+
+    A write pins the rest of the request to primary, and
+    ReplicaPinningMiddleware keeps the user's following requests there for
+    DATABASE_REPLICA_PIN_SECONDS so they read their own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = replica_alias()
+        if replica is None or _pinned():
+            return PRIMARY
+        return replica
+
+    def db_for_write(self, model, **hints):
+        pin_primary()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {PRIMARY, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == replica_alias():
+            return False
+        return None
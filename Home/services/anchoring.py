@@ -0,0 +1,157 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from Home.models import AnchorBatch, Transaction
+from .chain import ChainError, get_client
+from .gas import send_anchor
+from .merkle import all_proofs, build_levels
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, "ANCHOR_BATCH_SIZE", 256)
+MAX_WAIT = timedelta(seconds=getattr(settings, "ANCHOR_MAX_WAIT_SECONDS", 600))
+# a batch still unsubmitted after this long was orphaned by a crashed worker
+ORPHAN_AFTER = timedelta(seconds=getattr(settings, "ANCHOR_ORPHAN_AFTER_SECONDS", 300))
+
+
+def canonical_leaf(tx, version=AnchorBatch.LEAF_VERSION):
+    """
+    The bytes the tree commits to for one deed: its id and stored canonical
+    hash, so two deeds with identical fields still get distinct leaves.
+    Batches anchored before the id was added use version 1.
+    """
+    if not tx.deed_hash:
+        tx.refresh_deed_hash()
+    if version == 1:
+        return bytes.fromhex(tx.deed_hash)
+    if version == 2:
+        return tx.id.to_bytes(8, "big") + bytes.fromhex(tx.deed_hash)
+    raise ValueError(f"Unknown leaf version {version}")
+
+
+def pending_transactions():
+    """
+    Approved deeds not yet in a batch nor already anchored by a direct
+    transfer. Deeds imported from the legacy registry (legacy_ref set) are
+    vouched for by that registry and are not anchored.
+    """
+    return (
+        Transaction.objects
+        .filter(status="approved", anchor_batch__isnull=True, legacy_ref__isnull=True)
+        .filter(Q(blockchain_hash__isnull=True) | Q(blockchain_hash=""))
+        .order_by("verified_at", "id")
+    )
+
+
+def window_is_due(batch_size=BATCH_SIZE, max_wait=MAX_WAIT, now=None):
+    """A batch goes out when it is full or its oldest approval has waited max_wait."""
+    queue = pending_transactions()
+    waiting = queue[:batch_size].count()
+    if waiting == 0:
+        return False
+    if waiting >= batch_size:
+        return True
+    oldest = queue.values_list("verified_at", flat=True).first()
+    return oldest is None or oldest <= (now or timezone.now()) - max_wait
+
+
+def submit_root(batch, client=None):
+    """Send one transaction whose calldata is the batch's Merkle root. Returns the tx hash."""
+    client = client or get_client()
+    sender = getattr(settings, "CHAIN_ANCHOR_ACCOUNT", None) or client.call("eth_accounts")[0]
+    return send_anchor(
+        batch,
+        sender=sender,
+        to=getattr(settings, "CHAIN_ANCHOR_ADDRESS", None) or sender,
+        data="0x" + batch.merkle_root,
+        client=client,
+    )
+
+
+def anchor_batch(batch_size=BATCH_SIZE, client=None):
+    """
+    Build a Merkle tree over up to `batch_size` approved, unanchored
+    transactions, anchor its root in one chain transaction and store each
+    deed's inclusion proof. Returns the AnchorBatch, or None if nothing was due.
+    """
+    with db_transaction.atomic():
+        txs = list(pending_transactions().select_for_update()[:batch_size])
+        if not txs:
+            return None
+
+        levels = build_levels([canonical_leaf(tx) for tx in txs])
+        root_hex = levels[-1][0].hex()
+        batch = AnchorBatch.objects.create(merkle_root=root_hex, leaf_count=len(txs))
+
+        for index, (tx, proof) in enumerate(zip(txs, all_proofs(levels))):
+            tx.anchor_batch = batch
+            tx.merkle_index = index
+            tx.merkle_proof = proof
+        Transaction.objects.bulk_update(txs, ["anchor_batch", "merkle_index", "merkle_proof"])
+
+    try:
+        tx_hash = submit_root(batch, client)
+    except ChainError as e:
+        logger.warning("Anchoring batch %s failed: %s", batch.pk, e)
+        # release the deeds so the next run retries them in a fresh batch
+        release_batch(batch, str(e))
+        return batch
+
+    now = timezone.now()
+    batch.tx_hash = tx_hash
+    batch.status = "submitted"
+    batch.submitted_at = now
+    batch.save(update_fields=[
+        "tx_hash", "status", "submitted_at", "nonce", "max_fee_per_gas", "max_priority_fee_per_gas",
+    ])
+    batch.transactions.filter(Q(blockchain_hash__isnull=True) | Q(blockchain_hash="")).update(blockchain_hash=tx_hash)
+    batch.transactions.update(blockchain_anchored_at=now, chain_status="pending")
+    return batch
+
+
+def release_batch(batch, error):
+    """Mark `batch` failed and hand its deeds back to the queue."""
+    batch.transactions.update(anchor_batch=None, merkle_index=None, merkle_proof=[])
+    batch.status = "failed"
+    batch.error = error
+    batch.save(update_fields=["status", "error"])
+
+
+def recover_orphans(older_than=ORPHAN_AFTER, now=None):
+    """
+    Release batches a worker built but never submitted, e.g. because it
+    crashed between committing the batch and sending its root. Their deeds
+    go back to the queue; if the root did reach the chain the deeds are
+    simply anchored again. Returns the recovered batches.
+    """
+    cutoff = (now or timezone.now()) - older_than
+    recovered = []
+    with db_transaction.atomic():
+        orphans = AnchorBatch.objects.select_for_update().filter(
+            status="pending", tx_hash__isnull=True, created_at__lt=cutoff,
+        )
+        for batch in orphans:
+            logger.warning("Batch %s was never submitted; releasing its deeds", batch.pk)
+            release_batch(batch, "Never submitted; deeds released for a new batch")
+            recovered.append(batch)
+    return recovered
+
+
+def anchor_due(batch_size=BATCH_SIZE, max_wait=MAX_WAIT, client=None):
+    """Anchor full batches, then a final partial one if its window has expired."""
+    recover_orphans()
+    batches = []
+    while window_is_due(batch_size, max_wait):
+        batch = anchor_batch(batch_size, client)
+        if batch is None:
+            break
+        batches.append(batch)
+        if batch.status == "failed":
+            break
+    return batches
@@ -0,0 +1,286 @@
+import http.client
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class ChainError(Exception):
+    """A JSON-RPC call failed or the node returned an error object."""
+
+
+# results that can never change once they exist
+ALWAYS_IMMUTABLE = {"eth_chainId", "eth_getBlockByHash", "net_version"}
+# results that are immutable once buried under enough blocks
+DEPTH_IMMUTABLE = {"eth_getTransactionReceipt", "eth_getTransactionByHash", "eth_getBlockByNumber"}
+# state-changing calls are always sent, even if an identical one is in flight
+WRITE_METHODS = {"eth_sendTransaction", "eth_sendRawTransaction"}
+
+
+class ChainBackend:
+    """
+    What the anchoring, confirmation and indexing services need from a chain.
+
+    A backend implements batch(); call(), many() and receipts() are built on
+    it. settings.CHAIN_BACKEND picks the one get_client() returns: "rpc" for
+    a JSON-RPC node, "simulated" for the in-process chain in
+    Home.services.simchain, or a dotted path to another ChainBackend.
+    """
+
+    def batch(self, calls):
+        raise NotImplementedError
+
+    def call(self, method, params=None):
+        result = self.batch([(method, params)])[0]
+        if isinstance(result, ChainError):
+            raise result
+        return result
+
+    def many(self, method, params_list):
+        """Same method over many parameter lists in one round trip."""
+        return self.batch([(method, params) for params in params_list])
+
+    def receipts(self, tx_hashes):
+        return self.many("eth_getTransactionReceipt", [[h] for h in tx_hashes])
+
+
+class _LRU:
+    def __init__(self, size):
+        self.size = size
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.data:
+                self.data.move_to_end(key)
+                return True, self.data[key]
+        return False, None
+
+    def put(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+
+class JsonRpcClient(ChainBackend):
+    """
+    Shared Ethereum JSON-RPC client.
+
+    - keep-alive HTTP connections shared by all threads (pool_size kept idle)
+    - batch() sends many calls as one JSON-RPC batch request
+    - identical calls already in flight on another thread are awaited, not resent
+    - immutable results (mined receipts, buried blocks, chain id) are cached
+    - transport failures on read-only requests are retried with exponential
+      backoff; a request carrying a write is sent once, since the node may
+      have accepted it before the connection failed
+
+    Works against a local Ganache/Anvil node as well as a real endpoint.
+    """
+
+    def __init__(self, url, timeout=10, retries=3, backoff=0.5, pool_size=8,
+                 cache_size=10000, cache_min_depth=12):
+        parts = urlsplit(url)
+        self.url = url
+        self.scheme = parts.scheme or "http"
+        self.netloc = parts.netloc
+        self.path = parts.path or "/"
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_min_depth = cache_min_depth
+        self.head = None
+        self.requests_sent = 0
+        self._sent_lock = threading.Lock()
+
+        self._ids = itertools.count(1)
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._cache = _LRU(cache_size)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    # ---- transport ----
+    def _new_connection(self):
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return cls(self.netloc, timeout=self.timeout)
+
+    def _checkout(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._new_connection()
+
+    def _checkin(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _post(self, payload, retry=True):
+        body = json.dumps(payload).encode("utf-8")
+        delay = self.backoff
+        retries = self.retries if retry else 0
+        for attempt in range(retries + 1):
+            conn = self._checkout()
+            try:
+                conn.request("POST", self.path, body, {"Content-Type": "application/json"})
+                resp = conn.getresponse()
+                data = resp.read()
+                if resp.status >= 500:
+                    raise ChainError(f"HTTP {resp.status}")
+                self._checkin(conn)
+                with self._sent_lock:
+                    self.requests_sent += 1
+                return json.loads(data.decode("utf-8"))
+            except (OSError, http.client.HTTPException, ChainError) as e:
+                conn.close()
+                if attempt == retries:
+                    raise ChainError(str(e)) from e
+                time.sleep(delay)
+                delay *= 2
+
+    def _payload(self, method, params):
+        return {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params or []}
+
+    @staticmethod
+    def _result(method, body):
+        if body.get("error"):
+            raise ChainError(f"{method}: {body['error'].get('message', body['error'])}")
+        return body.get("result")
+
+    # ---- caching ----
+    @staticmethod
+    def _key(method, params):
+        return method + json.dumps(params or [], sort_keys=True)
+
+    def _cacheable(self, method, params, result):
+        if result is None or isinstance(result, ChainError):
+            return False
+        if method in ALWAYS_IMMUTABLE:
+            return True
+        if method not in DEPTH_IMMUTABLE or self.head is None:
+            return False
+        if method == "eth_getBlockByNumber" and not str(params[0]).startswith("0x"):
+            return False  # "latest", "pending", ...
+        block = result.get("blockNumber") or result.get("number") if isinstance(result, dict) else None
+        return block is not None and self.head - int(block, 16) + 1 >= self.cache_min_depth
+
+    def _remember(self, method, params, result):
+        if method == "eth_blockNumber" and isinstance(result, str):
+            self.head = int(result, 16)
+        elif self._cacheable(method, params, result):
+            self._cache.put(self._key(method, params), result)
+
+    # ---- public API ----
+    def batch(self, calls):
+        """
+        Send [(method, params), ...] as one JSON-RPC batch request.
+
+        Results come back in the same order. Cached and duplicate calls are
+        not sent, and a failed entry is returned as a ChainError instance
+        rather than raised, so one bad hash doesn't sink the whole batch.
+        """
+        results = [None] * len(calls)
+        to_send = OrderedDict()   # key -> (method, params, Future)
+        waiting = []              # (index, Future) owned by another thread
+
+        with self._inflight_lock:
+            for i, (method, params) in enumerate(calls):
+                key = self._key(method, params)
+                if method in WRITE_METHODS:
+                    key += f"#{next(self._ids)}"
+                hit, value = self._cache.get(key)
+                if hit:
+                    results[i] = value
+                elif key in to_send:
+                    waiting.append((i, to_send[key][2]))
+                elif key in self._inflight:
+                    waiting.append((i, self._inflight[key]))
+                else:
+                    future = Future()
+                    self._inflight[key] = future
+                    to_send[key] = (method, params, future)
+                    waiting.append((i, future))
+
+        if to_send:
+            self._send(to_send)
+
+        for i, future in waiting:
+            results[i] = future.result()
+        return results
+
+    def _send(self, to_send):
+        entries = list(to_send.items())
+        payloads = [self._payload(method, params) for _key, (method, params, _f) in entries]
+        try:
+            body = self._post(payloads, retry=not any(p["method"] in WRITE_METHODS for p in payloads))
+            if isinstance(body, dict):
+                # some nodes answer a whole batch with a single error object
+                raise ChainError(str(body.get("error", body)))
+            by_id = {item.get("id"): item for item in body}
+            for (key, (method, params, future)), payload in zip(entries, payloads):
+                try:
+                    result = self._result(method, by_id.get(payload["id"], {}))
+                except ChainError as e:
+                    result = e
+                self._remember(method, params, result)
+                future.set_result(result)
+        except Exception as e:
+            # never leave another thread blocked on one of these futures
+            error = e if isinstance(e, ChainError) else ChainError(str(e))
+            for _key, (_m, _p, future) in entries:
+                if not future.done():
+                    future.set_result(error)
+        finally:
+            with self._inflight_lock:
+                for key, _entry in entries:
+                    self._inflight.pop(key, None)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _build_client():
+    backend = getattr(settings, "CHAIN_BACKEND", "rpc")
+    if backend == "simulated":
+        from .simchain import SimulatedChain
+
+        chain = SimulatedChain.from_settings()
+        chain.start()
+        return chain
+    if backend != "rpc":
+        return import_string(backend)()
+    return JsonRpcClient(
+        getattr(settings, "CHAIN_RPC_URL", "http://127.0.0.1:8545"),
+        timeout=getattr(settings, "CHAIN_RPC_TIMEOUT", 10),
+        pool_size=getattr(settings, "CHAIN_RPC_POOL_SIZE", 8),
+        cache_size=getattr(settings, "CHAIN_RPC_CACHE_SIZE", 10000),
+        cache_min_depth=getattr(settings, "CHAIN_REQUIRED_CONFIRMATIONS", 12),
+    )
+
+
+def get_client():
+    """The process-wide backend, so every caller shares its pool and cache."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = _build_client()
+        return _client
+
+
+def set_client(client):
+    """Install `client` as the process-wide backend; returns the previous one."""
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+        return previous
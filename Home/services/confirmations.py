@@ -0,0 +1,127 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Min
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from Home.models import AnchorBatch, Transaction
+from .chain import ChainError, get_client
+
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_CONFIRMATIONS = getattr(settings, "CHAIN_REQUIRED_CONFIRMATIONS", 12)
+DROP_AFTER = timedelta(seconds=getattr(settings, "CHAIN_DROP_AFTER_SECONDS", 1800))
+RPC_BATCH_SIZE = getattr(settings, "CHAIN_RPC_BATCH_SIZE", 100)
+
+# hashes in these states still need watching; "" is a row from before tracking
+OPEN_STATES = ("", "pending", "mined")
+
+
+def open_hashes():
+    """Distinct blockchain_hash values still awaiting confirmation, with when they were sent."""
+    return (
+        Transaction.objects
+        .filter(blockchain_hash__isnull=False, chain_status__in=OPEN_STATES)
+        .exclude(blockchain_hash="")
+        .order_by()
+        .values("blockchain_hash")
+        .annotate(sent_at=Min(Coalesce("blockchain_anchored_at", "verified_at", "updated_at")))
+    )
+
+
+def _superseded_receipts(client, hashes):
+    """
+    For anchors replaced by gas.replace_stuck(), receipts of the earlier
+    hashes that were mined instead: {current hash: (mined hash, receipt)}.
+    """
+    batches = (
+        AnchorBatch.objects
+        .filter(tx_hash__in=hashes)
+        .exclude(superseded_hashes=[])
+        .values_list("tx_hash", "superseded_hashes")
+    )
+    candidates = [(current, old) for current, olds in batches for old in olds]
+    if not candidates:
+        return {}
+    mined = {}
+    for (current, old), receipt in zip(candidates, client.receipts([old for _c, old in candidates])):
+        if isinstance(receipt, dict):
+            mined[current] = (old, receipt)
+    return mined
+
+
+def adopt_hash(current, mined):
+    """Point a batch and its deeds at the superseded hash that was actually mined."""
+    with db_transaction.atomic():
+        for batch in AnchorBatch.objects.select_for_update().filter(tx_hash=current):
+            batch.superseded_hashes = [h for h in batch.superseded_hashes if h != mined] + [current]
+            batch.tx_hash = mined
+            batch.save(update_fields=["tx_hash", "superseded_hashes"])
+        Transaction.objects.filter(blockchain_hash=current).update(blockchain_hash=mined)
+    logger.info("Anchor %s was mined in place of its replacement %s", mined, current)
+
+
+def _classify(receipt, known, sent_at, head, now):
+    if receipt is None:
+        if not known and sent_at and sent_at <= now - DROP_AFTER:
+            return "dropped", None, 0
+        return "pending", None, 0
+
+    block = int(receipt["blockNumber"], 16)
+    if receipt.get("status") == "0x0":
+        return "reverted", block, head - block + 1
+    depth = head - block + 1
+    return ("confirmed" if depth >= REQUIRED_CONFIRMATIONS else "mined"), block, depth
+
+
+def poll_once(client=None, batch_size=RPC_BATCH_SIZE):
+    """
+    Check every open hash: one eth_blockNumber, then receipts in JSON-RPC
+    batches of `batch_size`. Returns {status: count} for the hashes seen.
+    """
+    client = client or get_client()
+    pending = list(open_hashes())
+    if not pending:
+        return {}
+
+    head = int(client.call("eth_blockNumber"), 16)
+    now = timezone.now()
+    summary = {}
+
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        hashes = [row["blockchain_hash"] for row in chunk]
+        receipts = client.receipts(hashes)
+
+        # a missing receipt is either still in the mempool or gone for good
+        missing = [h for h, r in zip(hashes, receipts) if r is None]
+        known = dict(zip(missing, client.many("eth_getTransactionByHash", [[h] for h in missing])))
+        superseded = _superseded_receipts(client, missing) if missing else {}
+
+        for row, receipt in zip(chunk, receipts):
+            tx_hash = row["blockchain_hash"]
+            if isinstance(receipt, ChainError):
+                logger.warning("Receipt lookup for %s failed: %s", tx_hash, receipt)
+                continue
+            if receipt is None and tx_hash in superseded:
+                # the transaction this one replaced got mined first
+                mined_hash, receipt = superseded[tx_hash]
+                adopt_hash(tx_hash, mined_hash)
+                tx_hash = mined_hash
+            lookup = known.get(tx_hash)
+            status, block, depth = _classify(
+                receipt, lookup is not None and not isinstance(lookup, ChainError), row["sent_at"], head, now,
+            )
+            Transaction.objects.filter(blockchain_hash=tx_hash).update(
+                chain_status=status,
+                chain_block_number=block,
+                chain_confirmations=depth,
+                chain_checked_at=now,
+            )
+            summary[status] = summary.get(status, 0) + 1
+
+    return summary
@@ -0,0 +1,47 @@
+"""
+Canonical, versioned digest of the deed fields of a Transaction.
+
+The serialisation is compact JSON with sorted keys, plain strings for every
+value, valuation fixed to two decimals and documents kept in upload order.
+Anything that changes these bytes must bump DEED_HASH_VERSION so stored
+hashes of older rows can still be reproduced.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+
+DEED_HASH_VERSION = 1
+
+# fields whose change invalidates the stored hash
+HASHED_FIELDS = frozenset({
+    "deed_type", "survey_number", "location", "valuation",
+    "party_name", "party_contact", "party_id",
+    "customer", "customer_id", "office", "office_id", "documents",
+})
+
+
+def canonical_payload(tx, version=DEED_HASH_VERSION):
+    if version != 1:
+        raise ValueError(f"Unknown deed hash version {version}")
+
+    payload = {
+        "v": 1,
+        "deed_type": tx.deed_type or "",
+        "survey_number": (tx.survey_number or "").strip(),
+        "location": (tx.location or "").strip(),
+        "valuation": str(Decimal(tx.valuation or 0).quantize(Decimal("0.01"))),
+        "parties": {
+            "customer": str(tx.customer_id or ""),
+            "name": (tx.party_name or "").strip(),
+            "contact": (tx.party_contact or "").strip(),
+            "id": (tx.party_id or "").strip(),
+        },
+        "office": str(tx.office_id or ""),
+        "documents": [str(d) for d in (tx.documents or [])],
+    }
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def compute_deed_hash(tx, version=DEED_HASH_VERSION):
+    return hashlib.sha256(canonical_payload(tx, version)).hexdigest()
@@ -0,0 +1,128 @@
+"""
+Streaming CSV/JSONL export of Transaction rows for compliance reports.
+
+Rows are read with values_list().iterator(), so only one chunk of rows is
+in memory at a time however many the filters match, and output is produced
+as a generator of byte chunks for StreamingHttpResponse or a file.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from Home.models import Transaction
+
+
+EXPORT_FIELDS = [
+    ("id", "id"),
+    ("legacy_ref", "legacy_ref"),
+    ("submission_date", "submission_date"),
+    ("status", "status"),
+    ("deed_type", "deed_type"),
+    ("survey_number", "survey_number"),
+    ("location", "location"),
+    ("valuation", "valuation"),
+    ("party_name", "party_name"),
+    ("customer_id", "customer_id"),
+    ("office_id", "office_id"),
+    ("office_district", "office__district"),
+    ("office_name", "office__name"),
+    ("verified_at", "verified_at"),
+    ("deed_hash", "deed_hash"),
+    ("blockchain_hash", "blockchain_hash"),
+    ("chain_status", "chain_status"),
+]
+FORMATS = ("csv", "jsonl")
+ITER_CHUNK_SIZE = 2000
+# rows are joined into blocks of about this many bytes before being sent
+FLUSH_BYTES = 64 * 1024
+
+
+def _day_start(value, name):
+    day = parse_date(value) if isinstance(value, str) else value
+    if day is None:
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD)")
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_queryset(office=None, status=None, deed_type=None, date_from=None, date_to=None):
+    """
+    Transactions matching the report filters, oldest first. Dates filter
+    submission_date and are inclusive; ValueError on a malformed filter.
+    """
+    qs = Transaction.objects.all()
+    if office:
+        qs = qs.filter(office_id=int(office))
+    if status:
+        if status not in dict(Transaction.STATUS_CHOICES):
+            raise ValueError(f"Unknown status {status}")
+        qs = qs.filter(status=status)
+    if deed_type:
+        if deed_type not in dict(Transaction.DEED_TYPE_CHOICES):
+            raise ValueError(f"Unknown deed type {deed_type}")
+        qs = qs.filter(deed_type=deed_type)
+    # ranges rather than __date, so an index on submission_date can be used
+    if date_from:
+        qs = qs.filter(submission_date__gte=_day_start(date_from, "date_from"))
+    if date_to:
+        qs = qs.filter(submission_date__lt=_day_start(date_to, "date_to") + timedelta(days=1))
+    return qs.order_by("submission_date", "id")
+
+
+def _rows(qs):
+    return qs.values_list(*(lookup for _name, lookup in EXPORT_FIELDS)).iterator(chunk_size=ITER_CHUNK_SIZE)
+
+
+def _csv_lines(qs):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _lookup in EXPORT_FIELDS])
+    for row in _rows(qs):
+        writer.writerow(row)
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _jsonl_lines(qs):
+    names = [name for name, _lookup in EXPORT_FIELDS]
+    block = []
+    size = 0
+    for row in _rows(qs):
+        line = json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+        block.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield "".join(block).encode("utf-8")
+            block, size = [], 0
+    yield "".join(block).encode("utf-8")
+
+
+def gzip_chunks(chunks):
+    """Gzip a stream of byte chunks on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(qs, fmt="csv", compress=False):
+    """Byte chunks of the export of `qs` in `fmt`, gzipped if `compress`."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt}")
+    chunks = _csv_lines(qs) if fmt == "csv" else _jsonl_lines(qs)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def export_filename(fmt="csv", compress=False):
+    name = f"transactions-{timezone.localdate():%Y%m%d}.{fmt}"
+    return name + ".gz" if compress else name
@@ -1,8 +1,4 @@
 import os
-import qrcode
-from PyPDF2 import PdfReader, PdfWriter
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
 from django.conf import settings
 
 
@@ -10,6 +6,12 @@ TEMPLATE = os.path.join(settings.MEDIA_ROOT, "landecertififcate1.pdf")
 
 
 def generate_certificate(tx):
+    # imported here: only approvals need them, not every process loading the app
+    import qrcode
+    from PyPDF2 import PdfReader, PdfWriter
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+
     output_path = os.path.join(settings.MEDIA_ROOT, f"cert_{tx.id}.pdf")
 
     data = {
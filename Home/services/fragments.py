@@ -0,0 +1,55 @@
+"""
+Version counters for cached template fragments.
+
+Templates cache semi-static blocks with {% cache %}, passing a version from
+the `fragment_versions` context variable as part of the key. Signals bump
+the counter of a scope when its data changes, so the next render misses
+and the stale fragment simply ages out of the cache.
+
+Fragments and counters live in the "fragments" cache, which settings make a
+no-op unless the default cache is shared by all workers.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+
+# change with template releases so fragments from older templates are not reused
+RELEASE = str(getattr(settings, "FRAGMENT_CACHE_RELEASE", "1"))
+
+
+def _key(scope):
+    return f"fragver:{scope}"
+
+
+def version(scope):
+    return caches["fragments"].get_or_set(_key(scope), 1, None)
+
+
+def bump(*scopes):
+    cache = caches["fragments"]
+    for scope in scopes:
+        try:
+            cache.incr(_key(scope))
+        except ValueError:
+            cache.set(_key(scope), 2, None)
+
+
+def office_scope(office_id):
+    return f"office:{office_id}"
+
+
+class FragmentVersions:
+    """
+    Template-side access: fragment_versions.registrars, .office (the
+    requesting registrar's office) or .release. Counters are read lazily,
+    only for the fragments a template actually uses.
+    """
+
+    def __init__(self, office_id=None):
+        self.office_id = office_id
+
+    def __getitem__(self, name):
+        if name == "release":
+            return RELEASE
+        scope = office_scope(self.office_id) if name == "office" else name
+        return f"{RELEASE}.{version(scope)}"
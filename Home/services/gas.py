@@ -0,0 +1,183 @@
+"""
+Nonce allocation, fee estimation and stuck-transaction replacement for the
+registry's anchoring account.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from Home.models import AnchorBatch, ChainAccount
+from .chain import ChainError, get_client
+
+
+logger = logging.getLogger(__name__)
+
+FEE_CACHE_SECONDS = getattr(settings, "CHAIN_FEE_CACHE_SECONDS", 15)
+FEE_HISTORY_BLOCKS = getattr(settings, "CHAIN_FEE_HISTORY_BLOCKS", 20)
+STUCK_AFTER = timedelta(seconds=getattr(settings, "CHAIN_STUCK_AFTER_SECONDS", 300))
+# nodes refuse a replacement unless both fees rise by at least 10%
+FEE_BUMP_PERCENT = max(getattr(settings, "CHAIN_FEE_BUMP_PERCENT", 15), 10)
+MAX_FEE_PER_GAS = getattr(settings, "CHAIN_MAX_FEE_PER_GAS", 500 * 10**9)
+MIN_PRIORITY_FEE = getattr(settings, "CHAIN_MIN_PRIORITY_FEE", 10**9)
+# node errors meaning the nonce is already taken, on chain or in the pool
+NONCE_ERRORS = ("nonce too low", "already known", "known transaction", "nonce has already been used")
+
+
+# ---------------------------
+#   NONCES
+# ---------------------------
+def allocate_nonce(address, client=None):
+    """
+    Hand out the next nonce for `address`.
+
+    The counter row is created if needed and locked before anything is
+    read, so workers in different processes never get the same nonce. The
+    first allocation (and any after resync_nonce) starts from the node's
+    pending transaction count, read while the lock is held.
+    """
+    client = client or get_client()
+    address = address.lower()
+    with db_transaction.atomic():
+        ChainAccount.objects.get_or_create(address=address)
+        account = ChainAccount.objects.select_for_update().get(address=address)
+        if account.next_nonce is None:
+            account.next_nonce = int(client.call("eth_getTransactionCount", [address, "pending"]), 16)
+        nonce = account.next_nonce
+        account.next_nonce = nonce + 1
+        account.save(update_fields=["next_nonce", "updated_at"])
+    return nonce
+
+
+def resync_nonce(address):
+    """Forget the local counter, e.g. after a 'nonce too low' error."""
+    ChainAccount.objects.filter(address=address.lower()).update(next_nonce=None)
+
+
+def is_nonce_error(error):
+    message = str(error).lower()
+    return any(marker in message for marker in NONCE_ERRORS)
+
+
+# ---------------------------
+#   FEES
+# ---------------------------
+def estimate_fees(client=None):
+    """
+    (max_fee_per_gas, max_priority_fee_per_gas) in wei from eth_feeHistory.
+    Cached for CHAIN_FEE_CACHE_SECONDS so a burst of anchors costs one call.
+    """
+    cached = cache.get("chain:fees")
+    if cached:
+        return cached
+
+    client = client or get_client()
+    history = client.call("eth_feeHistory", [hex(FEE_HISTORY_BLOCKS), "latest", [50]])
+    next_base = int(history["baseFeePerGas"][-1], 16)
+    tips = sorted(int(r[0], 16) for r in history.get("reward") or [] if r)
+    tip = max(tips[len(tips) // 2] if tips else 0, MIN_PRIORITY_FEE)
+
+    # room for the base fee to double before the anchor stops being includable
+    fees = (min(2 * next_base + tip, MAX_FEE_PER_GAS), tip)
+    cache.set("chain:fees", fees, FEE_CACHE_SECONDS)
+    return fees
+
+
+def bumped(value):
+    return value + value * FEE_BUMP_PERCENT // 100 + 1
+
+
+# ---------------------------
+#   SENDING AND REPLACING
+# ---------------------------
+def send_anchor(batch, sender, to, data, client=None):
+    """
+    Send a batch's anchor transaction with a managed nonce and fees. A batch
+    that already has a tx_hash is being replaced and keeps its nonce.
+    """
+    client = client or get_client()
+    replacing = bool(batch.tx_hash)
+    if batch.nonce is None:
+        batch.nonce = allocate_nonce(sender, client)
+    if batch.max_fee_per_gas is None:
+        batch.max_fee_per_gas, batch.max_priority_fee_per_gas = estimate_fees(client)
+
+    try:
+        tx_hash = client.call("eth_sendTransaction", [{
+            "from": sender,
+            "to": to,
+            "data": data,
+            "value": "0x0",
+            "nonce": hex(batch.nonce),
+            "maxFeePerGas": hex(batch.max_fee_per_gas),
+            "maxPriorityFeePerGas": hex(batch.max_priority_fee_per_gas),
+        }])
+    except ChainError as e:
+        # the node already holds this nonce: re-read the counter from it next
+        # time. Other failures leave the counter alone, and a replacement
+        # keeps its nonce whatever happens, as the original is still in flight.
+        if not replacing and is_nonce_error(e):
+            resync_nonce(sender)
+            batch.nonce = None
+        raise
+    return tx_hash
+
+
+def replace_stuck(client=None, older_than=STUCK_AFTER):
+    """
+    Resend anchors that have sat unmined for `older_than` with the same
+    nonce and fees raised by CHAIN_FEE_BUMP_PERCENT. Transactions in the
+    batch move to the new hash; the old one is kept in superseded_hashes
+    because it can still be mined first, in which case
+    confirmations.poll_once() switches back to it. Returns the replaced
+    batches.
+    """
+    client = client or get_client()
+    cutoff = timezone.now() - older_than
+    stuck = (
+        AnchorBatch.objects
+        .filter(status="submitted", submitted_at__lt=cutoff, nonce__isnull=False)
+        .filter(transactions__chain_status="pending")
+        .distinct()
+    )
+
+    replaced = []
+    for batch in stuck:
+        if batch.max_fee_per_gas >= MAX_FEE_PER_GAS:
+            logger.warning("Batch %s is stuck at the fee cap", batch.pk)
+            continue
+        current_fee, current_tip = estimate_fees(client)
+        old_hash = batch.tx_hash
+        batch.max_priority_fee_per_gas = max(bumped(batch.max_priority_fee_per_gas), current_tip)
+        batch.max_fee_per_gas = min(max(bumped(batch.max_fee_per_gas), current_fee), MAX_FEE_PER_GAS)
+        batch.max_fee_per_gas = max(batch.max_fee_per_gas, batch.max_priority_fee_per_gas)
+
+        chain_tx = client.call("eth_getTransactionByHash", [old_hash]) or {}
+        try:
+            new_hash = send_anchor(
+                batch,
+                sender=chain_tx.get("from") or getattr(settings, "CHAIN_ANCHOR_ACCOUNT", ""),
+                # a dropped transaction is unknown to the node: fall back to the configured target
+                to=chain_tx.get("to") or getattr(settings, "CHAIN_ANCHOR_ADDRESS", None),
+                data="0x" + batch.merkle_root,
+                client=client,
+            )
+        except ChainError as e:
+            logger.warning("Replacing batch %s failed: %s", batch.pk, e)
+            continue
+
+        with db_transaction.atomic():
+            batch.superseded_hashes = [*batch.superseded_hashes, old_hash]
+            batch.tx_hash = new_hash
+            batch.replacements += 1
+            batch.submitted_at = timezone.now()
+            batch.save(update_fields=[
+                "tx_hash", "superseded_hashes", "replacements", "submitted_at",
+                "max_fee_per_gas", "max_priority_fee_per_gas",
+            ])
+            batch.transactions.filter(blockchain_hash=old_hash).update(blockchain_hash=new_hash, chain_status="pending")
+        replaced.append(batch)
+    return replaced
@@ -0,0 +1,208 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from Home.models import AnchorBatch, ChainEvent, IndexedBlock, IndexerCheckpoint, Transaction
+from .chain import ChainError, get_client
+
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT = "registry-events"
+ROLLBACK_WINDOW = getattr(settings, "CHAIN_INDEXER_ROLLBACK_WINDOW", 64)
+MAX_RANGE = getattr(settings, "CHAIN_INDEXER_MAX_RANGE", 2000)
+# blocks the index may trail the node's head and still count as healthy
+HEALTHY_LAG = getattr(settings, "CHAIN_INDEXER_HEALTHY_LAG", 12)
+# a node reading older than this means the indexer has stopped reporting
+NODE_STATUS_MAX_AGE = timedelta(seconds=getattr(settings, "CHAIN_NODE_STATUS_MAX_AGE_SECONDS", 120))
+
+
+def _checkpoint():
+    cp, _ = IndexerCheckpoint.objects.get_or_create(
+        name=CHECKPOINT,
+        defaults={"block_number": getattr(settings, "CHAIN_INDEXER_START_BLOCK", 0) - 1},
+    )
+    return cp
+
+
+def find_fork_point(client, checkpoint):
+    """
+    Highest stored block that is still on the canonical chain.
+
+    Only the checkpoint block is fetched in the common case; the rest of the
+    rollback window is fetched in one batch when its hash no longer matches.
+    """
+    tip = IndexedBlock.objects.filter(number=checkpoint).first()
+    if tip is None:
+        return checkpoint
+    block = client.call("eth_getBlockByNumber", [hex(tip.number), False])
+    if block and block["hash"] == tip.hash:
+        return checkpoint
+
+    stored = list(IndexedBlock.objects.filter(number__lt=checkpoint).order_by("-number")[:ROLLBACK_WINDOW])
+    chain_blocks = client.batch([("eth_getBlockByNumber", [hex(b.number), False]) for b in stored])
+    for ours, theirs in zip(stored, chain_blocks):
+        if isinstance(theirs, dict) and theirs.get("hash") == ours.hash:
+            return ours.number
+    # reorg deeper than the window: start over from the oldest block we still trust
+    return stored[-1].number - 1 if stored else checkpoint - ROLLBACK_WINDOW
+
+
+def rollback_to(block_number):
+    with db_transaction.atomic():
+        removed, _ = ChainEvent.objects.filter(block_number__gt=block_number).delete()
+        IndexedBlock.objects.filter(number__gt=block_number).delete()
+        IndexerCheckpoint.objects.filter(name=CHECKPOINT).update(block_number=block_number)
+    logger.warning("Reorg: rolled back to block %s, removed %s events", block_number, removed)
+
+
+def _link(events):
+    hashes = {e.tx_hash for e in events}
+    tx_by_hash = dict(
+        Transaction.objects.filter(blockchain_hash__in=hashes).values_list("blockchain_hash", "id")
+    )
+    batch_by_hash = dict(AnchorBatch.objects.filter(tx_hash__in=hashes).values_list("tx_hash", "id"))
+    for e in events:
+        e.anchor_batch_id = batch_by_hash.get(e.tx_hash)
+        if e.anchor_batch_id is None:
+            e.transaction_id = tx_by_hash.get(e.tx_hash)
+
+
+def index_once(client=None, contract=None, max_range=MAX_RANGE):
+    """
+    Pull the next block range of registry logs into ChainEvent.
+    Returns (from_block, to_block, events_added); to_block < from_block means
+    the indexer is already at the head.
+    """
+    client = client or get_client()
+    contract = contract or getattr(settings, "CHAIN_REGISTRY_CONTRACT", "")
+
+    cp = _checkpoint()
+    head = record_node_status(client, cp)
+    fork = find_fork_point(client, cp.block_number)
+    if fork != cp.block_number:
+        rollback_to(fork)
+        cp.refresh_from_db()
+
+    start, end = cp.block_number + 1, min(head, cp.block_number + max_range)
+    if end < start:
+        return start, end, 0
+
+    log_filter = {"fromBlock": hex(start), "toBlock": hex(end)}
+    if contract:
+        log_filter["address"] = contract
+    logs, end_block = client.batch([
+        ("eth_getLogs", [log_filter]),
+        ("eth_getBlockByNumber", [hex(end), False]),
+    ])
+    for result in (logs, end_block):
+        if isinstance(result, Exception):
+            raise result
+
+    events = [
+        ChainEvent(
+            block_number=int(log["blockNumber"], 16),
+            block_hash=log["blockHash"],
+            tx_hash=log["transactionHash"],
+            log_index=int(log["logIndex"], 16),
+            contract_address=log["address"],
+            topic0=(log.get("topics") or [""])[0],
+            topics=log.get("topics") or [],
+            data=log.get("data", ""),
+        )
+        for log in logs
+        if not log.get("removed")
+    ]
+    _link(events)
+
+    seen = {e.block_number: e.block_hash for e in events}
+    seen[end] = end_block["hash"]
+
+    with db_transaction.atomic():
+        ChainEvent.objects.bulk_create(events, ignore_conflicts=True)
+        IndexedBlock.objects.bulk_create(
+            [
+                IndexedBlock(
+                    number=n, hash=h,
+                    timestamp=int(end_block["timestamp"], 16) if n == end else 0,
+                )
+                for n, h in seen.items()
+            ],
+            update_conflicts=True, unique_fields=["number"], update_fields=["hash", "timestamp"],
+        )
+        IndexedBlock.objects.filter(number__lt=end - ROLLBACK_WINDOW).delete()
+        IndexerCheckpoint.objects.filter(pk=cp.pk).update(block_number=end)
+
+    return start, end, len(events)
+
+
+def _status(timed, latest):
+    block_time = None
+    if len(timed) == 2 and timed[0].number > timed[1].number:
+        block_time = timedelta(seconds=(timed[0].timestamp - timed[1].timestamp) / (timed[0].number - timed[1].number))
+    return {"last_block": latest, "block_time": block_time}
+
+
+def network_status():
+    """Head block and average block time from the local index — no RPC."""
+    timed = list(IndexedBlock.objects.exclude(timestamp=0).order_by("-number")[:2])
+    latest = IndexedBlock.objects.aggregate(n=Max("number"))["n"]
+    return _status(timed, latest)
+
+
+async def anetwork_status():
+    """network_status() for async views."""
+    timed = [block async for block in IndexedBlock.objects.exclude(timestamp=0).order_by("-number")[:2]]
+    latest = (await IndexedBlock.objects.aaggregate(n=Max("number")))["n"]
+    return _status(timed, latest)
+
+
+def record_node_status(client, checkpoint):
+    """
+    Ask the node for its head block and gas price in one batch and store
+    both on the checkpoint row for node_status(). A failure is stored too,
+    then raised. Returns the head block number.
+    """
+    now = timezone.now()
+    try:
+        head, gas_price = client.batch([("eth_blockNumber", None), ("eth_gasPrice", None)])
+        if isinstance(head, Exception):
+            raise head
+    except ChainError as e:
+        IndexerCheckpoint.objects.filter(pk=checkpoint.pk).update(node_error=str(e)[:255], node_checked_at=now)
+        raise
+
+    head = int(head, 16)
+    IndexerCheckpoint.objects.filter(pk=checkpoint.pk).update(
+        node_head=head,
+        node_gas_price_wei=None if isinstance(gas_price, Exception) or gas_price is None else int(gas_price, 16),
+        node_error="",
+        node_checked_at=now,
+    )
+    return head
+
+
+def node_status(now=None):
+    """
+    The node's head block and gas price in wei as the indexer last saw them
+    — no RPC. "error" is set if that attempt failed; None if the indexer has
+    not reported within CHAIN_NODE_STATUS_MAX_AGE_SECONDS.
+    """
+    cp = IndexerCheckpoint.objects.filter(name=CHECKPOINT).first()
+    if cp is None or cp.node_checked_at is None or cp.node_checked_at < (now or timezone.now()) - NODE_STATUS_MAX_AGE:
+        return None
+    return {"head": cp.node_head, "gas_price": cp.node_gas_price_wei, "error": cp.node_error}
+
+
+def index_health(last_block, head):
+    """'Excellent', 'Lagging' or 'Stalled' from how far the index trails the node."""
+    if last_block is None or head is None:
+        return "Unknown"
+    lag = max(head - last_block, 0)
+    if lag <= HEALTHY_LAG:
+        return "Excellent"
+    return "Lagging" if lag <= 10 * HEALTHY_LAG else "Stalled"
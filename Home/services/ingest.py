@@ -0,0 +1,226 @@
+"""
+Bulk loading of historical deeds from legacy registries into Transaction.
+
+Rows come from CSV or JSONL and are identified by `legacy_ref`, the record
+id in the source system. Customers are matched by Aadhaar number and
+offices by (district, name, locality), through lookup maps built once per
+process. Each batch is validated as a whole, written with bulk_create in
+one transaction, and rows already ingested are skipped, so a run can be
+repeated or resumed safely.
+
+bulk_create bypasses the rollup signals, so the daily statistics for the
+imported date range are rebuilt once the rows are in. Imported deeds keep
+their legacy_ref and are never Merkle-anchored: they were registered, and
+are vouched for, by the legacy registry.
+"""
+import csv
+import json
+import zlib
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from Home.models import Customer, SubRegistrarOffice, Transaction
+from . import stats
+
+
+REQUIRED = [
+    "legacy_ref", "customer_adhar", "office_district", "office_name",
+    "deed_type", "survey_number", "location", "valuation",
+    "party_name", "party_contact", "party_id",
+]
+DEED_TYPES = {key for key, _label in Transaction.DEED_TYPE_CHOICES}
+STATUSES = {key for key, _label in Transaction.STATUS_CHOICES}
+MAX_LENGTHS = {
+    f.name: f.max_length
+    for f in Transaction._meta.concrete_fields
+    if getattr(f, "max_length", None) and f.name in REQUIRED + ["status"]
+}
+
+
+def read_rows(path, fmt=None):
+    """
+    Yield (line_number, row, error) from a CSV or JSONL file without loading
+    it. A line that is not a JSON object comes back as its raw text with an
+    error message, so it can be rejected instead of ending the run.
+    """
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, newline="", encoding="utf-8") as fh:
+        if fmt == "jsonl":
+            for number, line in enumerate(fh, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield number, line.rstrip("\n"), f"invalid JSON: {e.msg}"
+                    continue
+                if not isinstance(row, dict):
+                    yield number, row, "not a JSON object"
+                    continue
+                yield number, row, None
+        else:
+            reader = csv.DictReader(fh)
+            for number, row in enumerate(reader, 2):
+                yield number, row, None
+
+
+def owns(legacy_ref, shard, shards):
+    """Whether worker `shard` of `shards` owns this key (a stable hash bucket)."""
+    return shards <= 1 or zlib.crc32(str(legacy_ref).encode("utf-8")) % shards == shard
+
+
+class Lookups:
+    """In-memory maps from legacy identifiers to primary keys."""
+
+    def __init__(self):
+        self.customers = dict(Customer.objects.values_list("adhar_no", "id").iterator())
+        self.offices = {
+            (district.lower(), name.lower(), locality.lower()): pk
+            for pk, district, name, locality in
+            SubRegistrarOffice.objects.values_list("id", "district", "name", "locality").iterator()
+        }
+
+    def office_id(self, row):
+        name = _text(row.get("office_name"))
+        locality = _text(row.get("office_locality")) or name
+        return self.offices.get((_text(row.get("office_district")).lower(), name.lower(), locality.lower()))
+
+
+def _text(value):
+    return " ".join(str(value or "").split())
+
+
+def _parse_date(value):
+    value = _text(value)
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def build_batch(rows, lookups, default_status):
+    """
+    Validate a batch of (line_number, row). Returns (transactions, rejects),
+    where rejects are dicts carrying the line, the row and its errors.
+    """
+    refs = [_text(row.get("legacy_ref")) for _n, row in rows]
+    already = set(Transaction.objects.filter(legacy_ref__in=[r for r in refs if r]).values_list("legacy_ref", flat=True))
+
+    txs, rejects, seen = [], [], set()
+    for (number, row), ref in zip(rows, refs):
+        errors = [f"missing {name}" for name in REQUIRED if not _text(row.get(name))]
+        values = {name: _text(row.get(name)) for name in REQUIRED}
+        status = _text(row.get("status")) or default_status
+
+        customer_id = lookups.customers.get(values["customer_adhar"])
+        office_id = lookups.office_id(row)
+        if values["customer_adhar"] and customer_id is None:
+            errors.append(f"unknown customer {values['customer_adhar']}")
+        if values["office_name"] and office_id is None:
+            errors.append("unknown office")
+        if values["deed_type"] and values["deed_type"] not in DEED_TYPES:
+            errors.append(f"invalid deed_type {values['deed_type']}")
+        if status not in STATUSES:
+            errors.append(f"invalid status {status}")
+        for name, limit in MAX_LENGTHS.items():
+            if len(status if name == "status" else values[name]) > limit:
+                errors.append(f"{name} longer than {limit}")
+
+        valuation = submitted = None
+        try:
+            valuation = Decimal(values["valuation"]) if values["valuation"] else None
+        except InvalidOperation:
+            errors.append("invalid valuation")
+        try:
+            submitted = _parse_date(row.get("submission_date"))
+        except ValueError:
+            errors.append("invalid submission_date")
+
+        if ref in already or ref in seen:
+            continue  # ingested by an earlier run, or repeated in this batch
+        if errors:
+            rejects.append({"line": number, "row": row, "errors": errors})
+            continue
+
+        seen.add(ref)
+        tx = Transaction(
+            legacy_ref=ref,
+            customer_id=customer_id,
+            office_id=office_id,
+            deed_type=values["deed_type"],
+            survey_number=values["survey_number"],
+            location=values["location"],
+            valuation=valuation,
+            party_name=values["party_name"],
+            party_contact=values["party_contact"],
+            party_id=values["party_id"],
+            status=status,
+            submission_date=submitted or timezone.now(),
+        )
+        tx.refresh_deed_hash()
+        txs.append(tx)
+    return txs, rejects
+
+
+def ingest(path, fmt=None, shard=0, shards=1, batch_size=1000, default_status="approved", reject_file=None,
+           progress=None, rebuild_stats=True):
+    """
+    Load every row of `path` owned by `shard`. Returns counts of inserted,
+    skipped (already present) and rejected rows, plus the (first, last)
+    submission dates of the inserted rows as "dates", or None.
+
+    The daily statistics for those dates are rebuilt at the end unless
+    rebuild_stats is False, e.g. when the caller rebuilds once for many shards.
+    """
+    lookups = Lookups()
+    counts = {"inserted": 0, "skipped": 0, "rejected": 0, "dates": None}
+
+    def reject(entry):
+        reject_file.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        counts["rejected"] += 1
+
+    def flush(rows):
+        txs, rejects = build_batch(rows, lookups, default_status)
+        inserted = 0
+        if txs:
+            refs = [tx.legacy_ref for tx in txs]
+            with db_transaction.atomic():
+                present = Transaction.objects.filter(legacy_ref__in=refs)
+                before = present.count()
+                # ignore_conflicts covers a concurrent run that got there first
+                Transaction.objects.bulk_create(txs, batch_size=batch_size, ignore_conflicts=True)
+                inserted = present.count() - before
+            days = [timezone.localdate(tx.submission_date) for tx in txs]
+            first, last = counts["dates"] or (min(days), max(days))
+            counts["dates"] = (min(first, *days), max(last, *days))
+        for entry in rejects:
+            reject(entry)
+        counts["inserted"] += inserted
+        counts["skipped"] += len(rows) - inserted - len(rejects)
+        if progress:
+            progress(counts)
+
+    rows = []
+    for number, row, error in read_rows(path, fmt):
+        if error:
+            # no legacy_ref to shard on: the line number decides which worker reports it
+            if owns(number, shard, shards):
+                reject({"line": number, "row": row, "errors": [error]})
+            continue
+        if not owns(_text(row.get("legacy_ref")), shard, shards):
+            continue
+        rows.append((number, row))
+        if len(rows) >= batch_size:
+            flush(rows)
+            rows = []
+    if rows:
+        flush(rows)
+
+    if rebuild_stats and counts["dates"]:
+        stats.reconcile(*counts["dates"])
+    return counts
@@ -0,0 +1,69 @@
+"""
+Binary SHA-256 Merkle tree used to anchor many deeds with one chain write.
+
+Leaves and inner nodes are hashed with different prefixes so a leaf can never
+be passed off as an inner node. A node without a sibling is carried up to the
+next level unchanged instead of being paired with itself.
+
+A proof is a list of [side, sibling_hex] steps from the leaf up to the root,
+where side says whether the sibling sits on the "left" or "right".
+"""
+import hashlib
+
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def hash_leaf(data: bytes) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + data).digest()
+
+
+def hash_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def build_levels(leaves):
+    """All tree levels, leaf hashes first and the root last."""
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+
+    levels = [[hash_leaf(leaf) for leaf in leaves]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        nxt = [hash_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        levels.append(nxt)
+    return levels
+
+
+def merkle_root(leaves) -> bytes:
+    return build_levels(leaves)[-1][0]
+
+
+def proof_for(levels, index):
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            side = "left" if sibling < index else "right"
+            proof.append([side, level[sibling].hex()])
+        index //= 2
+    return proof
+
+
+def all_proofs(levels):
+    return [proof_for(levels, i) for i in range(len(levels[0]))]
+
+
+def root_from_proof(leaf: bytes, proof) -> bytes:
+    node = hash_leaf(leaf)
+    for side, sibling_hex in proof:
+        sibling = bytes.fromhex(sibling_hex)
+        node = hash_node(sibling, node) if side == "left" else hash_node(node, sibling)
+    return node
+
+
+def verify_proof(leaf: bytes, proof, root_hex: str) -> bool:
+    return root_from_proof(leaf, proof).hex() == root_hex.lower().removeprefix("0x")
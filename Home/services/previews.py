@@ -0,0 +1,139 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction as db_transaction
+from django.utils import timezone
+
+from Home.models import StoredDocument
+
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = getattr(settings, "DOCUMENT_THUMBNAIL_SIZE", (320, 320))
+TEXT_MAX_PAGES = getattr(settings, "DOCUMENT_TEXT_MAX_PAGES", 5)
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tif", ".tiff", ".webp"}
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "DOCUMENT_PREVIEW_WORKERS", 2),
+    thread_name_prefix="doc-previews",
+)
+
+
+def preview_name(path):
+    return f"{path}.thumb.jpg"
+
+
+def text_name(path):
+    return f"{path}.txt"
+
+
+def _thumbnail(image):
+    from PIL import Image
+
+    image = image.convert("RGB")
+    image.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, format="JPEG", quality=70, optimize=True)
+    return out.getvalue()
+
+
+def _image_preview(fh):
+    from PIL import Image
+
+    with Image.open(fh) as image:
+        return _thumbnail(image), ""
+
+
+def _pdf_preview(fh):
+    """
+    Text from the first pages, plus a thumbnail of the first embedded image —
+    scanned deeds are a page-sized image, so that is effectively page one.
+    """
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(fh)
+    pages = reader.pages[:TEXT_MAX_PAGES]
+    text = "\n".join((page.extract_text() or "").strip() for page in pages).strip()
+
+    thumb = None
+    for page in pages:
+        images = list(page.images)
+        if images:
+            thumb = _thumbnail(images[0].image)
+            break
+    return thumb, text
+
+
+def build_previews(doc):
+    """Write the thumbnail and extracted text next to `doc.path`."""
+    ext = os.path.splitext(doc.path)[1].lower()
+    with default_storage.open(doc.path, "rb") as fh:
+        if ext == ".pdf":
+            thumb, text = _pdf_preview(fh)
+        elif ext in IMAGE_EXTENSIONS:
+            thumb, text = _image_preview(fh)
+        else:
+            thumb, text = None, ""
+
+    if thumb:
+        default_storage.delete(preview_name(doc.path))
+        doc.preview_path = default_storage.save(preview_name(doc.path), ContentFile(thumb))
+    if text:
+        default_storage.delete(text_name(doc.path))
+        doc.text_path = default_storage.save(text_name(doc.path), ContentFile(text.encode("utf-8")))
+
+    doc.previews_generated_at = timezone.now()
+    doc.save(update_fields=["preview_path", "text_path", "previews_generated_at"])
+
+
+def _run(doc_ids):
+    try:
+        for doc in StoredDocument.objects.filter(pk__in=doc_ids, previews_generated_at__isnull=True):
+            try:
+                build_previews(doc)
+            except Exception:
+                logger.exception("Preview generation failed for %s", doc.path)
+    finally:
+        close_old_connections()
+
+
+def schedule_previews(paths):
+    """
+    Queue preview generation for the given stored paths once the surrounding
+    transaction commits. Documents that already have previews are skipped,
+    so a deduplicated upload costs nothing.
+    """
+    doc_ids = list(
+        StoredDocument.objects
+        .filter(path__in=paths, previews_generated_at__isnull=True)
+        .values_list("pk", flat=True)
+    )
+    if doc_ids:
+        db_transaction.on_commit(lambda: _executor.submit(_run, doc_ids))
+
+
+def previews_for(paths, names=None):
+    """
+    Preview/text URLs for each path in a Transaction.documents list.
+    `names` is the transaction's document_names; paths missing from it fall
+    back to the stored copy's filename.
+    """
+    names = names or {}
+    docs = {d.path: d for d in StoredDocument.objects.filter(path__in=paths)}
+    result = []
+    for path in paths:
+        doc = docs.get(path)
+        result.append({
+            "path": path,
+            "url": default_storage.url(path),
+            "filename": names.get(path) or (doc.filename if doc else os.path.basename(path)),
+            "size": doc.size if doc else None,
+            "preview_url": default_storage.url(doc.preview_path) if doc and doc.preview_path else None,
+            "text_url": default_storage.url(doc.text_path) if doc and doc.text_path else None,
+        })
+    return result
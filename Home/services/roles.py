@@ -0,0 +1,119 @@
+"""
+Who the user is to the registry (superuser, sub-registrar or customer) and
+their profile row, resolved once per request.
+
+RoleMiddleware puts a lazy `request.role` on every request; decorators
+that only receive the user call get_role(user), which memoises on the user
+object, so both share one lookup. Async views use aget_role(user).
+
+Across requests the role is kept in the cache only when that cache is
+shared by every worker (LAND_CACHE=file on one host, or redis): the signals
+in Home.signals drop an entry whenever a profile, office or user changes,
+and with a per-process cache they could not reach the other workers, which
+would keep granting a removed registrar access until the entry expired.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from Home.models import Customer, SubRegistrar
+
+
+CACHE_SECONDS = getattr(settings, "ROLE_CACHE_SECONDS", 300)
+_MEMO_ATTR = "_land_role"
+
+
+class Role:
+    def __init__(self, is_superuser=False, customer=None, subregistrar=None):
+        self.is_superuser = is_superuser
+        self.customer = customer
+        self.subregistrar = subregistrar
+
+    @property
+    def is_registrar(self):
+        return self.subregistrar is not None
+
+    @property
+    def is_customer(self):
+        return self.customer is not None
+
+    @property
+    def is_admin(self):
+        return self.is_superuser or self.is_registrar
+
+    @property
+    def office(self):
+        return self.subregistrar.office if self.subregistrar else None
+
+
+ANONYMOUS = Role()
+
+
+def cache_key(user_id):
+    return f"role:{user_id}"
+
+
+def cache_is_shared():
+    backend = settings.CACHES["default"]["BACKEND"]
+    return not backend.endswith((".LocMemCache", ".DummyCache"))
+
+
+def _load(user):
+    return Role(
+        is_superuser=user.is_superuser,
+        customer=Customer.objects.filter(user_id=user.pk).first(),
+        subregistrar=SubRegistrar.objects.select_related("user", "office").filter(user_id=user.pk).first(),
+    )
+
+
+def get_role(user):
+    if not user.is_authenticated:
+        return ANONYMOUS
+    role = getattr(user, _MEMO_ATTR, None)
+    if role is None:
+        shared = cache_is_shared()
+        role = cache.get(cache_key(user.pk)) if shared else None
+        if role is None:
+            role = _load(user)
+            if shared:
+                cache.set(cache_key(user.pk), role, CACHE_SECONDS)
+        setattr(user, _MEMO_ATTR, role)
+    return role
+
+
+async def aget_role(user):
+    """get_role() for async views, where request.role cannot query the database."""
+    if not user.is_authenticated:
+        return ANONYMOUS
+    role = getattr(user, _MEMO_ATTR, None)
+    if role is None:
+        shared = cache_is_shared()
+        role = await cache.aget(cache_key(user.pk)) if shared else None
+        if role is None:
+            role = Role(
+                is_superuser=user.is_superuser,
+                customer=await Customer.objects.filter(user_id=user.pk).afirst(),
+                subregistrar=await SubRegistrar.objects.select_related("user", "office").filter(user_id=user.pk).afirst(),
+            )
+            if shared:
+                await cache.aset(cache_key(user.pk), role, CACHE_SECONDS)
+        setattr(user, _MEMO_ATTR, role)
+    return role
+
+
+def forget_role(*user_ids):
+    cache.delete_many([cache_key(pk) for pk in user_ids if pk])
+
+
+def customer_or_404(request):
+    customer = request.role.customer
+    if customer is None:
+        raise Http404("No Customer matches the given query.")
+    return customer
+
+
+def subregistrar_or_404(request):
+    subregistrar = request.role.subregistrar
+    if subregistrar is None:
+        raise Http404("No SubRegistrar matches the given query.")
+    return subregistrar
@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+
+
+REFRESH_SECONDS = getattr(settings, "SESSION_REFRESH_SECONDS", 60)
+
+
+def touch_session(session, expiry, **values):
+    """
+    Store `values` and keep a sliding `expiry` (seconds) on the session
+    without marking it modified when nothing changed.
+
+    Any assignment makes SessionMiddleware save the session, so values are
+    only written when they differ, and the expiry is renewed at most once per
+    SESSION_REFRESH_SECONDS. The session can therefore end up to that many
+    seconds before `expiry` after the last request.
+    """
+    for key, value in values.items():
+        if session.get(key) != value:
+            session[key] = value
+
+    now = int(time.time())
+    if session.get("_session_expiry") != expiry or now - session.get("_refreshed_at", 0) >= REFRESH_SECONDS:
+        session.set_expiry(expiry)
+        session["_refreshed_at"] = now
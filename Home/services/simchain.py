@@ -0,0 +1,336 @@
+"""
+An in-process Ethereum-like chain for development and load testing.
+
+SimulatedChain answers the JSON-RPC methods the registry uses (sending
+anchors, receipts, blocks, logs, nonces, fees, balances) without a node.
+Blocks are produced every `block_time` seconds by a background thread, or
+on demand with mine(). Hashes and failures come from a seeded RNG, so a run
+with the same seed and the same calls gives the same chain.
+
+Failures can be injected to exercise the recovery paths:
+- drop_rate: an accepted transaction silently leaves the mempool
+- revert_rate: a mined transaction gets status 0x0
+- reorg_rate / reorg_depth: the last blocks are replaced, their
+  transactions re-mined in different blocks
+"""
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .chain import ChainBackend, ChainError
+from .keccak import keccak256
+
+
+ANCHOR_TOPIC = "0x" + keccak256(b"RootAnchored(bytes32)").hex()
+GWEI = 10**9
+
+
+class SimulatedChain(ChainBackend):
+
+    def __init__(self, block_time=1.0, seed=0, drop_rate=0.0, revert_rate=0.0, reorg_rate=0.0,
+                 reorg_depth=2, block_tx_limit=500, base_fee=GWEI, latency=0.0, chain_id=1337,
+                 accounts=1):
+        self.block_time = block_time
+        self.drop_rate = drop_rate
+        self.revert_rate = revert_rate
+        self.reorg_rate = reorg_rate
+        self.reorg_depth = reorg_depth
+        self.block_tx_limit = block_tx_limit
+        self.base_fee = base_fee
+        self.latency = latency
+        self.chain_id = chain_id
+
+        self.requests_sent = 0
+        self.reorgs = 0
+        self.dropped = 0
+
+        self._seed = seed
+        self._rng = random.Random(seed)
+        self._counter = 0
+        self._forks = 0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.accounts = [self._hash("account", i)[:42] for i in range(accounts)]
+        self._nonces = {a: 0 for a in self.accounts}   # next nonce by mined state
+        self._balances = {a: 1000 * 10**18 for a in self.accounts}
+        self._mempool = OrderedDict()                   # (from, nonce) -> tx
+        self._txs = {}                                  # hash -> tx (pending and mined)
+        self._receipts = {}                             # hash -> receipt
+        self._blocks = [self._make_block(0, "0x" + "00" * 32, [])]
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            block_time=getattr(settings, "CHAIN_SIM_BLOCK_TIME", 1.0),
+            seed=getattr(settings, "CHAIN_SIM_SEED", 0),
+            drop_rate=getattr(settings, "CHAIN_SIM_DROP_RATE", 0.0),
+            revert_rate=getattr(settings, "CHAIN_SIM_REVERT_RATE", 0.0),
+            reorg_rate=getattr(settings, "CHAIN_SIM_REORG_RATE", 0.0),
+            reorg_depth=getattr(settings, "CHAIN_SIM_REORG_DEPTH", 2),
+        )
+
+    # ---- block production ----
+    def start(self):
+        if self._thread is None and self.block_time > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._produce, name="sim-chain", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _produce(self):
+        while not self._stop.wait(self.block_time):
+            self.mine()
+
+    @property
+    def head(self):
+        return self._blocks[-1]["number"]
+
+    def mine(self, count=1):
+        """Produce `count` blocks, possibly with an injected reorg first."""
+        with self._lock:
+            for _ in range(count):
+                if self.reorg_rate and self.head > self.reorg_depth and self._rng.random() < self.reorg_rate:
+                    self.reorg(self.reorg_depth)
+                self._mine_block()
+            return self.head
+
+    def reorg(self, depth):
+        """Replace the last `depth` blocks; their transactions go back to the mempool."""
+        with self._lock:
+            depth = min(depth, self.head)
+            orphaned = self._blocks[-depth:]
+            del self._blocks[-depth:]
+            self._forks += 1
+            self.reorgs += 1
+            for block in orphaned:
+                for tx_hash in block["transactions"]:
+                    tx = self._txs[tx_hash]
+                    self._receipts.pop(tx_hash, None)
+                    tx["blockNumber"] = tx["blockHash"] = None
+                    self._nonces[tx["from"]] = min(self._nonces[tx["from"]], int(tx["nonce"], 16))
+                    self._mempool[(tx["from"], int(tx["nonce"], 16))] = tx
+            for _ in range(depth):
+                self._mine_block()
+
+    def _mine_block(self):
+        number = self.head + 1
+        included = []
+        progressed = True
+        # follow each sender's nonce sequence; a gap holds back everything after it
+        while progressed and len(included) < self.block_tx_limit:
+            progressed = False
+            for sender in list(self._nonces):
+                tx = self._mempool.pop((sender, self._nonces[sender]), None)
+                if tx is None:
+                    continue
+                included.append(tx)
+                self._nonces[sender] += 1
+                progressed = True
+                if len(included) >= self.block_tx_limit:
+                    break
+
+        block = self._make_block(number, self._blocks[-1]["hash"], [tx["hash"] for tx in included])
+        self._blocks.append(block)
+        for index, tx in enumerate(included):
+            tx["blockNumber"], tx["blockHash"] = hex(number), block["hash"]
+            tx["transactionIndex"] = hex(index)
+            self._receipts[tx["hash"]] = self._receipt(tx, block, index)
+
+    def _make_block(self, number, parent, tx_hashes):
+        return {
+            "number": number,
+            "hash": self._hash("block", number, self._forks),
+            "parentHash": parent,
+            "timestamp": int(time.time()),
+            "baseFeePerGas": self.base_fee,
+            "transactions": tx_hashes,
+        }
+
+    def _receipt(self, tx, block, index):
+        reverted = self.revert_rate and self._rng.random() < self.revert_rate
+        logs = [] if reverted else [{
+            "address": tx["to"],
+            "topics": [ANCHOR_TOPIC],
+            "data": tx["input"],
+            "blockNumber": hex(block["number"]),
+            "blockHash": block["hash"],
+            "transactionHash": tx["hash"],
+            "transactionIndex": hex(index),
+            "logIndex": hex(index),
+            "removed": False,
+        }]
+        return {
+            "transactionHash": tx["hash"],
+            "transactionIndex": hex(index),
+            "blockNumber": hex(block["number"]),
+            "blockHash": block["hash"],
+            "from": tx["from"],
+            "to": tx["to"],
+            "status": "0x0" if reverted else "0x1",
+            "gasUsed": hex(21000 + 16 * (len(tx["input"]) - 2) // 2),
+            "effectiveGasPrice": hex(block["baseFeePerGas"] + int(tx["maxPriorityFeePerGas"], 16)),
+            "logs": logs,
+        }
+
+    def _hash(self, *parts):
+        return "0x" + hashlib.sha256(repr((self._seed,) + parts).encode()).hexdigest()
+
+    # ---- ChainBackend ----
+    def batch(self, calls):
+        if self.latency:
+            time.sleep(self.latency)
+        results = []
+        with self._lock:
+            self.requests_sent += 1
+            for method, params in calls:
+                handler = getattr(self, "_rpc_" + method, None)
+                try:
+                    if handler is None:
+                        raise ChainError(f"{method}: method not supported by the simulated chain")
+                    results.append(handler(*(params or [])))
+                except ChainError as e:
+                    results.append(e)
+        return results
+
+    # ---- JSON-RPC methods ----
+    def _rpc_eth_chainId(self):
+        return hex(self.chain_id)
+
+    def _rpc_net_version(self):
+        return str(self.chain_id)
+
+    def _rpc_eth_accounts(self):
+        return list(self.accounts)
+
+    def _rpc_eth_blockNumber(self):
+        return hex(self.head)
+
+    def _block_json(self, block, full=False):
+        if block is None:
+            return None
+        txs = block["transactions"]
+        return {
+            "number": hex(block["number"]),
+            "hash": block["hash"],
+            "parentHash": block["parentHash"],
+            "timestamp": hex(block["timestamp"]),
+            "baseFeePerGas": hex(block["baseFeePerGas"]),
+            "transactions": [dict(self._txs[h]) for h in txs] if full else list(txs),
+        }
+
+    def _block_at(self, tag):
+        if tag in ("latest", "pending", "safe", "finalized"):
+            return self._blocks[-1]
+        if tag == "earliest":
+            return self._blocks[0]
+        number = int(tag, 16)
+        return self._blocks[number] if 0 <= number <= self.head else None
+
+    def _rpc_eth_getBlockByNumber(self, tag, full=False):
+        return self._block_json(self._block_at(tag), full)
+
+    def _rpc_eth_getBlockByHash(self, block_hash, full=False):
+        block = next((b for b in reversed(self._blocks) if b["hash"] == block_hash), None)
+        return self._block_json(block, full)
+
+    def _rpc_eth_getTransactionByHash(self, tx_hash):
+        tx = self._txs.get(tx_hash)
+        return dict(tx) if tx else None
+
+    def _rpc_eth_getTransactionReceipt(self, tx_hash):
+        receipt = self._receipts.get(tx_hash)
+        return dict(receipt) if receipt else None
+
+    def _pending_nonce(self, address):
+        nonce = self._nonces.get(address, 0)
+        while (address, nonce) in self._mempool:
+            nonce += 1
+        return nonce
+
+    def _rpc_eth_getTransactionCount(self, address, tag="latest"):
+        address = address.lower()
+        if tag == "pending":
+            return hex(self._pending_nonce(address))
+        return hex(self._nonces.get(address, 0))
+
+    def _rpc_eth_getBalance(self, address, tag="latest"):
+        return hex(self._balances.get(address.lower(), 0))
+
+    def _rpc_eth_feeHistory(self, count, newest="latest", percentiles=None):
+        count = min(int(count, 16) if isinstance(count, str) else count, self.head + 1)
+        blocks = self._blocks[-count:]
+        return {
+            "oldestBlock": hex(blocks[0]["number"]),
+            "baseFeePerGas": [hex(b["baseFeePerGas"]) for b in blocks] + [hex(self.base_fee)],
+            "gasUsedRatio": [0.5 for _ in blocks],
+            "reward": [[hex(GWEI) for _ in (percentiles or [])] for _ in blocks],
+        }
+
+    def _rpc_eth_gasPrice(self):
+        # legacy price: next base fee plus the tip the simulated miners ask for
+        return hex(self.base_fee + GWEI)
+
+    def _rpc_eth_getLogs(self, log_filter):
+        start = int(log_filter.get("fromBlock", "0x0"), 16)
+        end = self._block_at(log_filter.get("toBlock", "latest"))["number"]
+        address = (log_filter.get("address") or "").lower()
+        logs = []
+        for block in self._blocks[start:end + 1]:
+            for tx_hash in block["transactions"]:
+                for log in self._receipts[tx_hash]["logs"]:
+                    if not address or (log["address"] or "").lower() == address:
+                        logs.append(dict(log))
+        return logs
+
+    def _rpc_eth_sendTransaction(self, tx):
+        sender = (tx.get("from") or "").lower()
+        if sender not in self._nonces:
+            raise ChainError("eth_sendTransaction: unknown account")
+        nonce = int(tx["nonce"], 16) if tx.get("nonce") else self._pending_nonce(sender)
+        if nonce < self._nonces[sender]:
+            raise ChainError("eth_sendTransaction: nonce too low")
+
+        tip = tx.get("maxPriorityFeePerGas") or hex(GWEI)
+        max_fee = tx.get("maxFeePerGas") or hex(2 * self.base_fee + int(tip, 16))
+        existing = self._mempool.get((sender, nonce))
+        if existing is not None:
+            # nodes only accept a replacement that raises both fees by 10%
+            for key, new in (("maxFeePerGas", max_fee), ("maxPriorityFeePerGas", tip)):
+                if int(new, 16) * 10 < int(existing[key], 16) * 11:
+                    raise ChainError("eth_sendTransaction: replacement transaction underpriced")
+            del self._mempool[(sender, nonce)]
+            del self._txs[existing["hash"]]
+
+        self._counter += 1
+        record = {
+            "hash": self._hash("tx", sender, nonce, self._counter),
+            "from": sender,
+            "to": (tx.get("to") or "").lower() or None,
+            "input": tx.get("data") or tx.get("input") or "0x",
+            "value": tx.get("value") or "0x0",
+            "nonce": hex(nonce),
+            "maxFeePerGas": max_fee,
+            "maxPriorityFeePerGas": tip,
+            "blockNumber": None,
+            "blockHash": None,
+            "transactionIndex": None,
+        }
+        if self.drop_rate and self._rng.random() < self.drop_rate:
+            # accepted by the node, then evicted before any block picks it up
+            self.dropped += 1
+            return record["hash"]
+        self._txs[record["hash"]] = record
+        self._mempool[(sender, nonce)] = record
+        return record["hash"]
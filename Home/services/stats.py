@@ -0,0 +1,169 @@
+"""
+Incremental daily rollup of Transaction counts and valuations.
+
+Every saved or deleted transaction moves one unit (and its valuation)
+between DailyTransactionStat buckets, so dashboards sum a few hundred
+rollup rows instead of scanning the transactions table. Writes that bypass
+signals (bulk_create, queryset.update of the bucket fields) are picked up
+by the nightly reconcile_daily_stats run, which also finds older dates
+whose totals no longer match.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from Home.models import Customer, DailyTransactionStat, Transaction
+
+
+CUSTOMER_COUNT_KEY = "stats:customer_count"
+
+
+def _apply(bucket, count, valuation):
+    day, office_id, deed_type, status, _valuation = bucket
+    if day is None:
+        return
+    key = {"date": day, "office_id": office_id, "deed_type": deed_type, "status": status}
+    updated = DailyTransactionStat.objects.filter(**key).update(
+        count=F("count") + count, valuation_sum=F("valuation_sum") + valuation,
+    )
+    if updated:
+        return
+    try:
+        with db_transaction.atomic():
+            DailyTransactionStat.objects.create(count=count, valuation_sum=valuation, **key)
+    except IntegrityError:
+        # another writer created the bucket first
+        DailyTransactionStat.objects.filter(**key).update(
+            count=F("count") + count, valuation_sum=F("valuation_sum") + valuation,
+        )
+
+
+def record_change(old, new):
+    """Move a transaction from bucket `old` to bucket `new`; either may be None."""
+    if old == new:
+        return
+    if old is not None and new is not None and old[:4] == new[:4]:
+        _apply(new, 0, new[4] - old[4])
+        return
+    if old is not None:
+        _apply(old, -1, -old[4])
+    if new is not None:
+        _apply(new, 1, new[4])
+
+
+# ---------------------------
+#   READING
+# ---------------------------
+def totals(**filters):
+    """{"count": n, "valuation": sum} over rollup rows matching `filters`."""
+    row = DailyTransactionStat.objects.filter(**filters).aggregate(count=Sum("count"), valuation=Sum("valuation_sum"))
+    return {"count": row["count"] or 0, "valuation": row["valuation"] or Decimal("0")}
+
+
+def breakdown(field, **filters):
+    """Totals grouped by one bucket field, e.g. breakdown("status")."""
+    return list(
+        DailyTransactionStat.objects.filter(**filters)
+        .values(field)
+        .annotate(count=Sum("count"), valuation=Sum("valuation_sum"))
+        .order_by(field)
+    )
+
+
+def daily_series(days=30, **filters):
+    start = timezone.localdate() - timedelta(days=days - 1)
+    return breakdown("date", date__gte=start, **filters)
+
+
+def customer_count():
+    """Registered customers, cached and dropped by the Customer signals."""
+    return cache.get_or_set(CUSTOMER_COUNT_KEY, Customer.objects.count, 3600)
+
+
+# ---------------------------
+#   RECONCILIATION
+# ---------------------------
+def _actual(start=None, end=None):
+    qs = Transaction.objects.all()
+    if start:
+        qs = qs.filter(submission_date__gte=timezone.make_aware(datetime.combine(start, time.min)))
+    if end:
+        qs = qs.filter(submission_date__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)))
+    return (
+        qs.order_by()
+        .annotate(day=TruncDate("submission_date"))
+        .values("day", "office_id", "deed_type", "status")
+        .annotate(n=Count("id"), total=Sum("valuation"))
+    )
+
+
+def reconcile(start=None, end=None):
+    """
+    Rebuild the rollup for [start, end] (dates, inclusive; None = unbounded)
+    from the transactions table. Returns the number of buckets that were wrong.
+    """
+    with db_transaction.atomic():
+        stored = DailyTransactionStat.objects.select_for_update()
+        if start:
+            stored = stored.filter(date__gte=start)
+        if end:
+            stored = stored.filter(date__lte=end)
+        before = {
+            (s.date, s.office_id, s.deed_type, s.status): (s.count, s.valuation_sum)
+            for s in stored
+        }
+        after = {
+            (row["day"], row["office_id"], row["deed_type"], row["status"]): (row["n"], row["total"] or Decimal("0"))
+            for row in _actual(start, end)
+        }
+        stored.delete()
+        DailyTransactionStat.objects.bulk_create([
+            DailyTransactionStat(date=day, office_id=office_id, deed_type=deed_type, status=status,
+                                 count=count, valuation_sum=total)
+            for (day, office_id, deed_type, status), (count, total) in after.items()
+        ], batch_size=1000)
+    return sum(1 for key in before.keys() | after.keys() if before.get(key) != after.get(key))
+
+
+def stale_dates():
+    """
+    Dates whose rollup disagrees with the transactions table on count or
+    valuation, e.g. history backfilled with bulk_create. Compares one
+    per-day total per table, so moves between buckets within a day are
+    left to the signals and the recent-days rebuild.
+    """
+    actual = {
+        row["day"]: (row["n"], row["total"] or Decimal("0"))
+        for row in (
+            Transaction.objects.order_by()
+            .annotate(day=TruncDate("submission_date"))
+            .values("day")
+            .annotate(n=Count("id"), total=Sum("valuation"))
+        )
+    }
+    stored = {
+        row["date"]: (row["n"], row["total"] or Decimal("0"))
+        for row in (
+            DailyTransactionStat.objects.order_by()
+            .values("date")
+            .annotate(n=Sum("count"), total=Sum("valuation_sum"))
+        )
+        if row["n"] or row["total"]
+    }
+    return sorted(day for day in actual.keys() | stored.keys() if day and actual.get(day) != stored.get(day))
+
+
+def date_ranges(days):
+    """Sorted dates grouped into inclusive (first, last) runs of consecutive days."""
+    ranges = []
+    for day in days:
+        if ranges and day == ranges[-1][1] + timedelta(days=1):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return [tuple(r) for r in ranges]
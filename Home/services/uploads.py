@@ -0,0 +1,217 @@
+import hashlib
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from Home.models import ChunkedUpload, StoredDocument
+
+
+CHUNK_SIZE = getattr(settings, "DOCUMENT_UPLOAD_CHUNK_SIZE", 1024 * 1024)
+UPLOAD_WORKERS = getattr(settings, "DOCUMENT_UPLOAD_WORKERS", 4)
+PARTIAL_DIR = "uploads/partial"
+STAGING_DIR = "uploads/staging"
+DOCUMENTS_DIR = "documents"
+
+
+class HashingFile(File):
+    """
+    Wraps an uploaded file so the storage backend pulls it chunk by chunk
+    while a SHA-256 digest is updated with every chunk that passes through.
+    """
+
+    def __init__(self, file, name=None):
+        super().__init__(file, name=name or getattr(file, "name", None))
+        self.hasher = hashlib.sha256()
+        self.bytes_written = 0
+
+    def chunks(self, chunk_size=None):
+        for chunk in super().chunks(chunk_size or CHUNK_SIZE):
+            self.hasher.update(chunk)
+            self.bytes_written += len(chunk)
+            yield chunk
+
+    @property
+    def sha256(self):
+        return self.hasher.hexdigest()
+
+
+# ---------------------------
+#   CONTENT-ADDRESSED STORAGE
+# ---------------------------
+def content_path(sha256, filename=""):
+    """documents/ab/abcdef....pdf — the extension is kept so files stay openable."""
+    ext = os.path.splitext(filename)[1].lower()
+    return f"{DOCUMENTS_DIR}/{sha256[:2]}/{sha256}{ext}"
+
+
+def _move(src, dst):
+    try:
+        src_path, dst_path = default_storage.path(src), default_storage.path(dst)
+    except NotImplementedError:
+        # remote storage: copy then drop the staged object
+        with default_storage.open(src, "rb") as fh:
+            default_storage.save(dst, fh)
+        default_storage.delete(src)
+        return
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    os.replace(src_path, dst_path)
+
+
+def intern_document(staged_name, sha256, size, filename):
+    """
+    Turn a staged file into its content-addressed copy.
+
+    If a document with the same digest is already stored the staged bytes are
+    discarded. Reference counts are maintained from Transaction.documents by
+    the signals in Home.signals, not here. Returns (storage_path, sha256,
+    size, filename); the filename is this upload's, whoever stored the bytes.
+    """
+    doc = StoredDocument.objects.filter(sha256=sha256).first()
+    if doc is not None and default_storage.exists(doc.path):
+        # keeps prune_documents off the copy until our transaction references it
+        StoredDocument.objects.filter(pk=doc.pk).update(last_used_at=timezone.now())
+        default_storage.delete(staged_name)
+        return doc.path, sha256, size, filename
+
+    path = content_path(sha256, filename)
+    _move(staged_name, path)
+    StoredDocument.objects.update_or_create(
+        sha256=sha256,
+        defaults={"path": path, "size": size, "filename": filename, "last_used_at": timezone.now()},
+    )
+    return path, sha256, size, filename
+
+
+def _stage(uploaded):
+    wrapped = HashingFile(uploaded)
+    staged = default_storage.save(f"{STAGING_DIR}/{uuid.uuid4().hex}", wrapped)
+    return staged, wrapped.sha256, wrapped.bytes_written, uploaded.name
+
+
+def store_document(uploaded):
+    """
+    Stream one uploaded file into content-addressed storage.
+    Returns (storage_path, sha256, size, filename).
+    """
+    return intern_document(*_stage(uploaded))
+
+
+def store_documents(uploads):
+    """
+    Store several uploads. The byte streaming runs in parallel; the database
+    lookups stay on the calling thread. Results keep the order of `uploads`.
+    """
+    if len(uploads) <= 1:
+        return [store_document(f) for f in uploads]
+
+    with ThreadPoolExecutor(max_workers=min(UPLOAD_WORKERS, len(uploads))) as pool:
+        staged = list(pool.map(_stage, uploads))
+    return [intern_document(*item) for item in staged]
+
+
+# ---------------------------
+#   RESUMABLE CHUNKED UPLOADS
+# ---------------------------
+def partial_name(upload_id):
+    return f"{PARTIAL_DIR}/{upload_id}.part"
+
+
+def new_upload_id():
+    return uuid.uuid4().hex
+
+
+class ChunkOverflow(ValueError):
+    """A chunk would take the upload past its declared total_bytes."""
+
+
+def append_chunk(upload, chunk, offset):
+    """
+    Append `chunk` to a ChunkedUpload at byte `offset`.
+
+    The offset must match what the server already holds, so a client that
+    lost its connection asks for the current offset and resumes from there.
+    The upload row stays locked while the bytes are written, so two requests
+    for the same offset cannot both land. Returns the new offset.
+    """
+    with db_transaction.atomic():
+        locked = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        upload.received_bytes = locked.received_bytes
+        if offset != locked.received_bytes:
+            raise ValueError(f"Expected offset {locked.received_bytes}, got {offset}")
+        if offset + chunk.size > locked.total_bytes:
+            raise ChunkOverflow(f"Chunk ends past the declared size of {locked.total_bytes} bytes")
+
+        # claim the range before touching the file; on SQLite, where
+        # select_for_update is a no-op, this UPDATE is what takes the lock
+        end = offset + chunk.size
+        if not ChunkedUpload.objects.filter(pk=upload.pk, received_bytes=offset).update(
+            received_bytes=end, updated_at=timezone.now(),
+        ):
+            raise ValueError("Another request is writing this upload; ask for the current offset")
+
+        path = default_storage.path(partial_name(upload.upload_id))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # write at the offset rather than appending, so bytes left by an
+        # interrupted request past the committed offset are overwritten
+        with open(path, "r+b" if os.path.exists(path) else "wb") as fh:
+            fh.seek(offset)
+            for piece in chunk.chunks(CHUNK_SIZE):
+                fh.write(piece)
+            fh.truncate()
+            received = fh.tell()
+        if received != end:
+            raise ValueError(f"Expected {chunk.size} bytes, received {received - offset}")
+
+    upload.received_bytes = received
+    return received
+
+
+def finish_chunked_upload(upload):
+    """
+    Hash a fully received ChunkedUpload and move it into content-addressed
+    storage without copying it. Returns (storage_path, sha256, size, filename).
+    """
+    if upload.total_bytes and upload.received_bytes != upload.total_bytes:
+        raise ValueError("Upload is not complete yet.")
+
+    name = partial_name(upload.upload_id)
+    hasher = hashlib.sha256()
+    with default_storage.open(name, "rb") as fh:
+        for piece in File(fh).chunks(CHUNK_SIZE):
+            hasher.update(piece)
+
+    result = intern_document(name, hasher.hexdigest(), upload.received_bytes, upload.filename)
+    upload.delete()
+    return result
+
+
+def prune_abandoned_uploads(cutoff):
+    """
+    Delete chunked uploads untouched since `cutoff` with their partial
+    files, and staged files left behind by requests that died between
+    staging and interning. Returns (uploads, staged files) removed.
+    """
+    uploads = 0
+    for upload in ChunkedUpload.objects.filter(updated_at__lt=cutoff):
+        default_storage.delete(partial_name(upload.upload_id))
+        upload.delete()
+        uploads += 1
+
+    staged = 0
+    try:
+        _dirs, names = default_storage.listdir(STAGING_DIR)
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        path = f"{STAGING_DIR}/{name}"
+        if default_storage.get_modified_time(path) < cutoff:
+            default_storage.delete(path)
+            staged += 1
+    return uploads, staged
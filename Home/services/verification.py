@@ -0,0 +1,43 @@
+from .anchoring import canonical_leaf
+from .chain import ChainError
+from .merkle import verify_proof
+
+
+def _calldata(chain_tx):
+    return (chain_tx or {}).get("input") or (chain_tx or {}).get("data") or ""
+
+
+def verify_chunk(client, txs):
+    """
+    Check a chunk of approved Transactions against the chain in one batched
+    round trip (receipts + transactions for every distinct hash).
+    Returns a list of mismatch dicts; an empty list means the chunk is clean.
+    """
+    hashes = list(dict.fromkeys(tx.blockchain_hash for tx in txs))
+    results = client.batch(
+        [("eth_getTransactionReceipt", [h]) for h in hashes]
+        + [("eth_getTransactionByHash", [h]) for h in hashes]
+    )
+    receipts = dict(zip(hashes, results[:len(hashes)]))
+    chain_txs = dict(zip(hashes, results[len(hashes):]))
+
+    problems = []
+    for tx in txs:
+        receipt, chain_tx = receipts[tx.blockchain_hash], chain_txs[tx.blockchain_hash]
+
+        def flag(kind, detail=""):
+            problems.append({"id": tx.id, "hash": tx.blockchain_hash, "problem": kind, "detail": detail})
+
+        if isinstance(receipt, ChainError) or isinstance(chain_tx, ChainError):
+            flag("rpc_error", str(receipt if isinstance(receipt, ChainError) else chain_tx))
+        elif receipt is None:
+            flag("missing")
+        elif receipt.get("status") == "0x0":
+            flag("reverted")
+        elif tx.anchor_batch_id:
+            root = tx.anchor_batch.merkle_root
+            if _calldata(chain_tx).lower().removeprefix("0x") != root:
+                flag("root_mismatch", f"chain calldata does not carry batch root {root}")
+            elif not verify_proof(canonical_leaf(tx, tx.anchor_batch.leaf_version), tx.merkle_proof, root):
+                flag("proof_mismatch", "deed data no longer matches its anchored leaf")
+    return problems
@@ -0,0 +1,101 @@
+import logging
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+
+from Home.models import Customer, WalletSnapshot
+from .chain import ChainError, get_client
+from .keccak import keccak256
+
+
+logger = logging.getLogger(__name__)
+
+WALLET_TTL = timedelta(seconds=getattr(settings, "CHAIN_WALLET_TTL_SECONDS", 300))
+_ADDRESS_RE = re.compile(r"^0x[0-9a-fA-F]{40}$")
+
+
+# ---------------------------
+#   EIP-55 ADDRESSES
+# ---------------------------
+def to_checksum_address(address):
+    if not _ADDRESS_RE.match(address or ""):
+        raise ValueError(f"Not an Ethereum address: {address!r}")
+    hex_part = address[2:].lower()
+    digest = keccak256(hex_part.encode("ascii")).hex()
+    return "0x" + "".join(
+        ch.upper() if ch.isalpha() and int(digest[i], 16) >= 8 else ch
+        for i, ch in enumerate(hex_part)
+    )
+
+
+def validate_eth_address(value):
+    """
+    Accept all-lowercase / all-uppercase addresses (no checksum given) and
+    mixed-case ones only when the EIP-55 checksum matches.
+    """
+    if not _ADDRESS_RE.match(value or ""):
+        raise ValidationError("Enter a valid Ethereum wallet address (0x followed by 40 hex characters).")
+    body = value[2:]
+    if body != body.lower() and body != body.upper() and value != to_checksum_address(value):
+        raise ValidationError("This wallet address has an invalid checksum — check for a typo.")
+
+
+# ---------------------------
+#   BALANCE / NONCE CACHE
+# ---------------------------
+def wallet_snapshot(address):
+    """Cached balance and nonce for `address`; never calls the chain."""
+    if not address:
+        return None
+    try:
+        key = to_checksum_address(address)
+    except ValueError:
+        return None
+    return WalletSnapshot.objects.filter(address=key).first()
+
+
+def refresh_wallets(client=None, batch_size=100, stale_only=True):
+    """
+    Refresh balances and nonces in JSON-RPC batches: every customer wallet
+    gets a snapshot row, and every snapshot row (including those of
+    addresses a customer has since replaced) is refreshed once it is older
+    than CHAIN_WALLET_TTL_SECONDS. Returns the number refreshed.
+    """
+    client = client or get_client()
+
+    addresses = {
+        to_checksum_address(a)
+        for a in Customer.objects.exclude(eth_address__isnull=True).exclude(eth_address="")
+        .values_list("eth_address", flat=True)
+        if _ADDRESS_RE.match(a)
+    }
+    for address in addresses:
+        WalletSnapshot.objects.get_or_create(address=address)
+
+    due = WalletSnapshot.objects.all()
+    if stale_only:
+        due = due.filter(Q(refreshed_at__isnull=True) | Q(refreshed_at__lt=timezone.now() - WALLET_TTL))
+    due = list(due.order_by("refreshed_at"))
+
+    refreshed = 0
+    for start in range(0, len(due), batch_size):
+        chunk = due[start:start + batch_size]
+        results = client.batch(
+            [("eth_getBalance", [s.address, "latest"]) for s in chunk]
+            + [("eth_getTransactionCount", [s.address, "latest"]) for s in chunk]
+        )
+        now = timezone.now()
+        for snap, balance, nonce in zip(chunk, results[:len(chunk)], results[len(chunk):]):
+            if isinstance(balance, ChainError) or isinstance(nonce, ChainError) or balance is None:
+                logger.warning("Wallet refresh failed for %s", snap.address)
+                continue
+            snap.balance_wei = int(balance, 16)
+            snap.nonce = int(nonce, 16)
+            snap.refreshed_at = now
+            refreshed += 1
+        WalletSnapshot.objects.bulk_update(chunk, ["balance_wei", "nonce", "refreshed_at"])
+    return refreshed
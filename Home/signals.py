@@ -1,11 +1,21 @@
 from pathlib import Path
 
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
 from django.conf import settings
+from django.contrib.auth.models import User
 
-from .models import Transaction
+from .models import Customer, StoredDocument, SubRegistrar, SubRegistrarOffice, Transaction
+from .services import stats
+from .services.fragments import bump as bump_fragments, office_scope
+from .services.roles import forget_role
 from .services.fill_certificate import generate_certificate
+from .services.previews import schedule_previews
 
 
 @receiver(post_save, sender=Transaction)
@@ -31,3 +41,123 @@ def auto_generate_certificate(sender, instance: Transaction, created, **kwargs):
     # save ONLY the file field (avoid re-triggering signal logic)
     instance.certificate_file = str(relative_path)
     instance.save(update_fields=["certificate_file"])
+
+
+# ---------------------------
+#   DOCUMENT REFERENCE COUNTS
+# ---------------------------
+def _release_documents(paths):
+    # files are removed by the prune_documents sweep, not here: an upload
+    # may have just matched this digest without its transaction being saved
+    if not paths:
+        return
+    StoredDocument.objects.filter(path__in=paths, ref_count__gt=0).update(
+        ref_count=F("ref_count") - 1, last_used_at=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=Transaction)
+def track_document_references(sender, instance: Transaction, created, **kwargs):
+    current = set(instance.documents or [])
+    previous = set(getattr(instance, "_loaded_documents", []))
+
+    added, removed = current - previous, previous - current
+    if added:
+        StoredDocument.objects.filter(path__in=added).update(ref_count=F("ref_count") + 1)
+        schedule_previews(added)
+    _release_documents(removed)
+
+    instance._loaded_documents = list(instance.documents or [])
+
+
+@receiver(post_delete, sender=Transaction)
+def release_document_references(sender, instance: Transaction, **kwargs):
+    _release_documents(set(getattr(instance, "_loaded_documents", instance.documents or [])))
+
+
+# ---------------------------
+#   DAILY STATISTICS ROLLUP
+# ---------------------------
+@receiver(post_save, sender=Transaction)
+def track_daily_stats(sender, instance: Transaction, created, **kwargs):
+    current = instance.stat_bucket()
+    if created:
+        stats.record_change(None, current)
+    elif getattr(instance, "_loaded_stat", None) is not None:
+        stats.record_change(instance._loaded_stat, current)
+    # otherwise the previous bucket is unknown (deferred fields); the nightly
+    # reconcile_daily_stats run corrects it
+    instance._loaded_stat = current
+
+
+@receiver(post_delete, sender=Transaction)
+def untrack_daily_stats(sender, instance: Transaction, **kwargs):
+    stats.record_change(getattr(instance, "_loaded_stat", None) or instance.stat_bucket(), None)
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def reset_customer_count(sender, instance, **kwargs):
+    # post_delete sends no "created"; profile edits leave the count alone
+    if kwargs.get("created", True):
+        cache.delete(stats.CUSTOMER_COUNT_KEY)
+
+
+# ---------------------------
+#   CACHED USER ROLES
+# ---------------------------
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_role(sender, instance, **kwargs):
+    forget_role(instance.pk)
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+@receiver(post_save, sender=SubRegistrar)
+@receiver(post_delete, sender=SubRegistrar)
+def forget_profile_role(sender, instance, **kwargs):
+    forget_role(instance.user_id)
+
+
+@receiver(post_save, sender=SubRegistrarOffice)
+def forget_office_roles(sender, instance, **kwargs):
+    # registrars carry their office in the cached role
+    forget_role(*instance.registrars.values_list("user_id", flat=True))
+
+
+# ---------------------------
+#   CACHED TEMPLATE FRAGMENTS
+# ---------------------------
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def expire_office_fragments(sender, instance: Transaction, **kwargs):
+    bump_fragments(office_scope(instance.office_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=SubRegistrar)
+@receiver(post_delete, sender=SubRegistrar)
+@receiver(post_save, sender=SubRegistrarOffice)
+@receiver(post_delete, sender=SubRegistrarOffice)
+def expire_registrar_fragments(sender, instance, **kwargs):
+    bump_fragments("registrars")
+
+
+# ---------------------------
+#   SQLITE CONNECTION TUNING
+# ---------------------------
+def apply_sqlite_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    """Apply settings.SQLITE_PRAGMAS (WAL, busy timeout, ...) to each new SQLite connection."""
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", None)
+    if connection.vendor != "sqlite" or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        apply_sqlite_pragmas(cursor, pragmas)
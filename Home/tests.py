@@ -1,3 +1,1064 @@
-from django.test import TestCase
+import csv
+import gzip
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.http import FileResponse, HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from Home import routers
+from Home.middleware import PIN_COOKIE, ReplicaPinningMiddleware
+from Home.models import (
+    AnchorBatch, ChainAccount, ChunkedUpload, Customer, StoredDocument, SubRegistrar, SubRegistrarOffice,
+    Transaction, WalletSnapshot,
+)
+from Home.services import (
+    anchoring, confirmations, gas, indexer, ingest, merkle, previews, roles, stats, uploads,
+)
+from Home.services.chain import ChainError, JsonRpcClient
+from Home.services.simchain import SimulatedChain
+
+
+def load_settings(**environ):
+    """A fresh copy of Land/settings.py evaluated with the given environment."""
+    spec = importlib.util.spec_from_file_location('_land_settings_probe', settings.BASE_DIR / 'Land' / 'settings.py')
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch.dict(os.environ, environ):
+        spec.loader.exec_module(module)
+    return module
+
+
+def make_deed(customer=None, **fields):
+    """An application with just enough fields filled in to be saved."""
+    if customer is None:
+        n = Customer.objects.count() + 1
+        customer = Customer.objects.create(
+            user=User.objects.create_user(f'resident{n}'),
+            adhar_no=f'{n:012d}',
+            phone_no=f'9{n:09d}',
+            office=SubRegistrarOffice.objects.get_or_create(name='SRO Kollam', district='kollam', locality='Kollam')[0],
+        )
+    values = dict(
+        customer=customer, office=customer.office, deed_type='sale', survey_number='101/2',
+        location='Kollam', valuation=100000, party_name='Party', party_contact='9000000000', party_id='P-1',
+    )
+    values.update(fields)
+    return Transaction.objects.create(**values)
+
+
+class TempMediaMixin:
+    """
+    Points MEDIA_ROOT at a throwaway directory for the class, so the
+    certificates, QR codes and uploads the tests produce stay out of media/.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+
+class SQLiteConcurrencyTests(SimpleTestCase):
+    """
+    Many threads running read-then-write atomic() blocks against one SQLite
+    file, as under concurrent approvals, through Django connections built
+    from the shipped LAND_DB_PROFILE=production settings.
+    """
+
+    ALIAS = 'production_probe'
+    WRITERS = 16
+    WRITES_PER_THREAD = 25
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        profile = load_settings(LAND_DB_PROFILE='production')
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        database = dict(profile.DATABASES['default'], NAME=os.path.join(cls.tmpdir.name, 'land.sqlite3'))
+        # registered after SimpleTestCase has fenced off the project databases
+        connections.settings[cls.ALIAS] = connections.configure_settings({'default': database})['default']
+        cls.databases = frozenset({cls.ALIAS})
+        # the connection_created receiver applies whatever the profile sets
+        cls.pragmas = override_settings(SQLITE_PRAGMAS=profile.SQLITE_PRAGMAS)
+        cls.pragmas.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pragmas.disable()
+        connections[cls.ALIAS].close()
+        del connections.settings[cls.ALIAS]
+        cls.tmpdir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        with connections[self.ALIAS].cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS counter')
+            cursor.execute('CREATE TABLE counter (id INTEGER PRIMARY KEY, n INTEGER)')
+            cursor.execute('INSERT INTO counter (id, n) VALUES (1, 0)')
+
+    def test_pragmas_applied(self):
+        with connections[self.ALIAS].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0].lower(), 'wal')
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 20000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_concurrent_read_then_write_blocks_do_not_hit_locks(self):
+        errors = []
+        start = threading.Barrier(self.WRITERS)
+
+        def writer():
+            start.wait(timeout=30)
+            try:
+                for _ in range(self.WRITES_PER_THREAD):
+                    # the read takes a snapshot; under a deferred BEGIN the
+                    # following write could not wait for the lock and would
+                    # fail with "database is locked"
+                    with transaction.atomic(using=self.ALIAS):
+                        with connections[self.ALIAS].cursor() as cursor:
+                            cursor.execute('SELECT n FROM counter WHERE id = 1')
+                            n = cursor.fetchone()[0]
+                            cursor.execute('UPDATE counter SET n = %s WHERE id = 1', [n + 1])
+            except Exception as e:
+                errors.append(repr(e))
+            finally:
+                connections[self.ALIAS].close()
+
+        threads = [threading.Thread(target=writer) for _ in range(self.WRITERS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        with connections[self.ALIAS].cursor() as cursor:
+            cursor.execute('SELECT n FROM counter WHERE id = 1')
+            self.assertEqual(cursor.fetchone()[0], self.WRITERS * self.WRITES_PER_THREAD)
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(routers, 'replica_alias', return_value='replica')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = routers.PrimaryReplicaRouter()
+
+    def request(self, method='get', cookies=None, write=False):
+        """Run a request through the pinning middleware; returns (read alias, response)."""
+        seen = []
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Transaction)
+            seen.append(self.router.db_for_read(Transaction))
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/')
+        request.COOKIES.update(cookies or {})
+        response = ReplicaPinningMiddleware(view)(request)
+        return seen[0], response
+
+    def test_reads_outside_a_request_stay_on_primary(self):
+        self.assertEqual(self.router.db_for_read(Transaction), 'default')
+
+    def test_plain_reads_go_to_the_replica(self):
+        alias, response = self.request()
+        self.assertEqual(alias, 'replica')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_a_write_pins_the_request_and_the_next_ones(self):
+        alias, response = self.request(write=True)
+        self.assertEqual(alias, 'default')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.DATABASE_REPLICA_PIN_SECONDS)
+
+        alias, _response = self.request(cookies={PIN_COOKIE: '1'})
+        self.assertEqual(alias, 'default')
+        self.assertEqual(self.request(method='post')[0], 'default')
+
+    def test_use_primary_only_pins_the_block_unless_it_writes(self):
+        token = routers.start_request(pinned=False)
+        try:
+            with routers.use_primary():
+                self.assertEqual(self.router.db_for_read(Transaction), 'default')
+            self.assertEqual(self.router.db_for_read(Transaction), 'replica')
+            with routers.use_primary():
+                self.router.db_for_write(Transaction)
+            self.assertEqual(self.router.db_for_read(Transaction), 'default')
+        finally:
+            self.assertTrue(routers.end_request(token))
+
+
+class ImportTimeTests(SimpleTestCase):
+    """Loading the views must not pull in the ML and PDF stacks."""
+
+    # cumulative microseconds for `import Home.views` after django.setup()
+    BUDGET_US = 500_000
+    HEAVY = ('catboost', 'joblib', 'numpy', 'pandas', 'qrcode', 'PyPDF2', 'reportlab')
+
+    def _importtime(self):
+        code = 'import django; django.setup(); import Home.views'
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='Land.settings')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, timeout=120,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        # lines look like "import time:   self [us] | cumulative | module"
+        rows = {}
+        for line in result.stderr.splitlines():
+            if line.startswith('import time:') and '|' in line:
+                _self, cumulative, module = line[len('import time:'):].split('|')
+                if cumulative.strip().isdigit():
+                    rows[module.strip()] = int(cumulative)
+        return rows
+
+    def test_views_import_within_budget(self):
+        rows = self._importtime()
+        self.assertIn('Home.views', rows)
+        loaded = [m for m in rows if m.split('.')[0] in self.HEAVY]
+        self.assertEqual(loaded, [], 'heavy modules imported at startup')
+        self.assertLess(rows['Home.views'], self.BUDGET_US)
+
+
+class MerkleTests(SimpleTestCase):
+    """Fixed vectors for Home.services.merkle; proofs already on chain depend on them."""
+
+    LEAVES = [b'deed-0', b'deed-1', b'deed-2']
+
+    @staticmethod
+    def leaf(data):
+        return hashlib.sha256(b'\x00' + data).digest()
+
+    @staticmethod
+    def node(left, right):
+        return hashlib.sha256(b'\x01' + left + right).digest()
+
+    def test_single_leaf_root(self):
+        self.assertEqual(
+            merkle.merkle_root([b'deed-0']).hex(),
+            '879efcee7e2b98d617e53821c8a945ccbd70b9c84bb325e88b5ea3a359857678',
+        )
+
+    def test_odd_leaf_is_carried_up(self):
+        l0, l1, l2 = (self.leaf(x) for x in self.LEAVES)
+        self.assertEqual(merkle.merkle_root(self.LEAVES), self.node(self.node(l0, l1), l2))
+
+    def test_root_vector(self):
+        self.assertEqual(
+            merkle.merkle_root(self.LEAVES).hex(),
+            '9f850d406193a974f25cab3fcbd11ca093af467137048f40493fd364d306c9e1',
+        )
+
+    def test_proofs(self):
+        l0, l1, l2 = (self.leaf(x) for x in self.LEAVES)
+        levels = merkle.build_levels(self.LEAVES)
+        proofs = merkle.all_proofs(levels)
+        self.assertEqual(proofs[0], [['right', l1.hex()], ['right', l2.hex()]])
+        self.assertEqual(proofs[1], [['left', l0.hex()], ['right', l2.hex()]])
+        self.assertEqual(proofs[2], [['left', self.node(l0, l1).hex()]])
+
+        root = levels[-1][0].hex()
+        for data, proof in zip(self.LEAVES, proofs):
+            self.assertTrue(merkle.verify_proof(data, proof, '0x' + root.upper()))
+        self.assertFalse(merkle.verify_proof(b'deed-3', proofs[0], root))
+        self.assertFalse(merkle.verify_proof(self.LEAVES[0], proofs[1], root))
+
+    def test_no_leaves(self):
+        with self.assertRaises(ValueError):
+            merkle.build_levels([])
+
+
+class AnchorQueueTests(TempMediaMixin, TestCase):
+
+    def test_directly_anchored_deeds_are_not_batched(self):
+        queued = make_deed(status='approved')
+        make_deed(customer=queued.customer, status='approved', blockchain_hash='0x' + 'ab' * 32)
+        make_deed(customer=queued.customer, status='pending')
+        self.assertEqual(list(anchoring.pending_transactions()), [queued])
+
+    def test_deeds_with_an_empty_hash_are_stamped_with_the_batch(self):
+        deed = make_deed(status='approved', blockchain_hash='')
+        batch = anchoring.anchor_batch(client=SimulatedChain(block_time=0))
+        deed.refresh_from_db()
+        self.assertEqual(deed.blockchain_hash, batch.tx_hash)
+        self.assertFalse(anchoring.pending_transactions().exists())
+
+    def test_identical_deeds_get_distinct_leaves(self):
+        first = make_deed(status='approved')
+        second = make_deed(customer=first.customer, status='approved')
+        self.assertEqual(first.deed_hash, second.deed_hash)
+
+        batch = anchoring.anchor_batch(client=SimulatedChain(block_time=0))
+        self.assertEqual(batch.status, 'submitted')
+        self.assertEqual(batch.leaf_version, AnchorBatch.LEAF_VERSION)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertNotEqual(first.merkle_proof, second.merkle_proof)
+        for deed in (first, second):
+            leaf = deed.id.to_bytes(8, 'big') + bytes.fromhex(deed.deed_hash)
+            self.assertTrue(merkle.verify_proof(leaf, deed.merkle_proof, batch.merkle_root))
+
+    def test_orphaned_batch_is_released(self):
+        deed = make_deed(status='approved')
+        batch = AnchorBatch.objects.create(merkle_root='00' * 32, leaf_count=1)
+        Transaction.objects.filter(pk=deed.pk).update(anchor_batch=batch, merkle_index=0, merkle_proof=[])
+
+        # a worker still submitting a fresh batch is left alone
+        self.assertEqual(anchoring.recover_orphans(), [])
+
+        later = timezone.now() + anchoring.ORPHAN_AFTER + timedelta(seconds=1)
+        self.assertEqual(anchoring.recover_orphans(now=later), [batch])
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, 'failed')
+        self.assertEqual(list(anchoring.pending_transactions()), [deed])
+
+
+class ChunkedUploadTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        self.customer = make_deed().customer
+        self.client.force_login(self.customer.user)
+        self.url = reverse('upload_document_chunk')
+        self.upload_id = self.client.post(self.url, {'filename': 'deed.pdf', 'total_bytes': 8}).json()['upload_id']
+
+    def send(self, offset, data=b'abcd'):
+        chunk = SimpleUploadedFile('chunk', data)
+        return self.client.post(self.url, {'upload_id': self.upload_id, 'offset': offset, 'chunk': chunk})
+
+    def test_malformed_offset_is_a_bad_request(self):
+        self.assertEqual(self.send('four').status_code, 400)
+
+    def test_offset_conflict(self):
+        self.assertEqual(self.send(0).json()['offset'], 4)
+        response = self.send(0)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 4)
+
+    def test_abandoned_uploads_are_pruned(self):
+        self.send(0)
+        staged = default_storage.save(f'{uploads.STAGING_DIR}/left-behind', io.BytesIO(b'x'))
+        later = timezone.now() + timedelta(days=2)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            call_command('prune_documents', stdout=io.StringIO())
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertFalse(default_storage.exists(uploads.partial_name(self.upload_id)))
+        self.assertFalse(default_storage.exists(staged))
+
+
+class StoredDocumentTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        self.first = make_deed()
+        self.second = make_deed()
+
+    def store(self, name, data=b'%PDF-1.4 scan'):
+        return uploads.store_document(SimpleUploadedFile(name, data))
+
+    def ref_count(self, path):
+        return StoredDocument.objects.get(path=path).ref_count
+
+    def test_identical_uploads_share_a_copy_but_keep_their_names(self):
+        path, _sha256, _size, name = self.store('sale-deed.pdf')
+        same_path, _sha256, _size, other_name = self.store('my scan.pdf')
+        self.assertEqual((path, name, other_name), (same_path, 'sale-deed.pdf', 'my scan.pdf'))
+
+        self.second.documents, self.second.document_names = [path], {path: other_name}
+        self.second.save()
+        self.assertEqual([d['filename'] for d in previews.previews_for([path], self.second.document_names)], ['my scan.pdf'])
+
+    def test_references_are_counted_per_transaction(self):
+        path = self.store('deed.pdf')[0]
+        self.assertEqual(self.ref_count(path), 0)
+
+        for deed in (self.first, self.second):
+            deed.documents = [path]
+            deed.save()
+        self.assertEqual(self.ref_count(path), 2)
+
+        self.first.documents = []
+        self.first.save()
+        self.assertEqual(self.ref_count(path), 1)
+        Transaction.objects.get(pk=self.second.pk).delete()
+        self.assertEqual(self.ref_count(path), 0)
+
+
+class DocumentPreviewTests(TempMediaMixin, TestCase):
+
+    def store(self, name, data):
+        return uploads.store_document(SimpleUploadedFile(name, data))[0]
+
+    def test_previews_are_queued_once_the_deed_commits(self):
+        path = self.store('plan.png', b'not really a png')
+        with mock.patch.object(previews._executor, 'submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                make_deed(documents=[path])
+        submit.assert_called_once_with(previews._run, [StoredDocument.objects.get(path=path).pk])
+
+    def test_thumbnail_and_text_are_written_next_to_the_document(self):
+        from PIL import Image
+        from reportlab.pdfgen import canvas
+
+        image = io.BytesIO()
+        Image.new('RGB', (1200, 900), 'white').save(image, format='PNG')
+        pdf = io.BytesIO()
+        page = canvas.Canvas(pdf)
+        page.drawString(72, 720, 'Survey number 101/2')
+        page.save()
+        scan, deed = self.store('plan.png', image.getvalue()), self.store('deed.pdf', pdf.getvalue())
+
+        call_command('generate_document_previews', stdout=io.StringIO())
+        scan_doc, deed_doc = StoredDocument.objects.get(path=scan), StoredDocument.objects.get(path=deed)
+        with default_storage.open(scan_doc.preview_path) as fh, Image.open(fh) as thumb:
+            self.assertEqual((thumb.format, thumb.size), ('JPEG', (320, 240)))
+        with default_storage.open(deed_doc.text_path) as fh:
+            self.assertIn('Survey number 101/2', fh.read().decode())
+        self.assertIsNotNone(deed_doc.previews_generated_at)
+
+
+class NodeStatusTests(TestCase):
+
+    def test_indexer_records_head_and_gas_price(self):
+        chain = SimulatedChain(block_time=0)
+        chain.mine(30)
+        indexer.index_once(chain)
+        with mock.patch.object(indexer, 'get_client', side_effect=AssertionError('node called')):
+            self.assertEqual(indexer.node_status(), {'head': 30, 'gas_price': 2 * 10**9, 'error': ''})
+
+    def test_unreachable_node_is_recorded_and_readings_expire(self):
+        chain = SimulatedChain(block_time=0)
+        indexer.index_once(chain)
+        with mock.patch.object(chain, 'batch', side_effect=ChainError('connection refused')):
+            with self.assertRaises(ChainError):
+                indexer.index_once(chain)
+        self.assertEqual(indexer.node_status()['error'], 'connection refused')
+
+        later = timezone.now() + indexer.NODE_STATUS_MAX_AGE * 2
+        self.assertIsNone(indexer.node_status(now=later))
+
+    def test_health_follows_index_lag(self):
+        self.assertEqual(indexer.index_health(100, 100 + indexer.HEALTHY_LAG), 'Excellent')
+        self.assertEqual(indexer.index_health(100, 101 + indexer.HEALTHY_LAG), 'Lagging')
+        self.assertEqual(indexer.index_health(100, 101 + 10 * indexer.HEALTHY_LAG), 'Stalled')
+        self.assertEqual(indexer.index_health(None, 100), 'Unknown')
+
+
+class SimulatedChainTests(SimpleTestCase):
+
+    def send(self, chain, nonce, tip=10**9, **tx):
+        sender = chain.accounts[0]
+        return chain.call('eth_sendTransaction', [dict(
+            {'from': sender, 'to': sender, 'data': '0x' + 'ab' * 32, 'nonce': hex(nonce),
+             'maxPriorityFeePerGas': hex(tip), 'maxFeePerGas': hex(3 * 10**9 + tip)}, **tx,
+        )])
+
+    def test_same_seed_and_calls_give_the_same_chain(self):
+        hashes = []
+        for _ in range(2):
+            chain = SimulatedChain(block_time=0, seed=7)
+            hashes.append([self.send(chain, n) for n in range(3)])
+            chain.mine()
+        self.assertEqual(hashes[0], hashes[1])
+        self.assertNotEqual(hashes[0], [self.send(SimulatedChain(block_time=0, seed=8), n) for n in range(3)])
+
+    def test_nonce_gap_holds_back_later_transactions(self):
+        chain = SimulatedChain(block_time=0)
+        later = self.send(chain, 1)
+        chain.mine()
+        self.assertIsNone(chain.call('eth_getTransactionReceipt', [later]))
+        first = self.send(chain, 0)
+        chain.mine()
+        receipts = chain.receipts([first, later])
+        self.assertEqual([r['blockNumber'] for r in receipts], ['0x2', '0x2'])
+        with self.assertRaisesMessage(ChainError, 'nonce too low'):
+            self.send(chain, 0)
+
+    def test_replacement_must_raise_fees_by_ten_percent(self):
+        chain = SimulatedChain(block_time=0)
+        original = self.send(chain, 0, tip=10**9)
+        with self.assertRaisesMessage(ChainError, 'underpriced'):
+            self.send(chain, 0, tip=10**9 + 1)
+        replacement = self.send(chain, 0, tip=2 * 10**9, maxFeePerGas=hex(10 * 10**9))
+        chain.mine()
+        self.assertIsNone(chain.call('eth_getTransactionByHash', [original]))
+        self.assertEqual(chain.call('eth_getTransactionReceipt', [replacement])['status'], '0x1')
+
+    def test_injected_drops_and_reorgs(self):
+        chain = SimulatedChain(block_time=0, drop_rate=1.0)
+        dropped = self.send(chain, 0)
+        chain.mine()
+        self.assertEqual(chain.dropped, 1)
+        self.assertIsNone(chain.call('eth_getTransactionByHash', [dropped]))
+
+        chain = SimulatedChain(block_time=0)
+        tx_hash = self.send(chain, 0)
+        chain.mine(3)
+        before = chain.call('eth_getTransactionReceipt', [tx_hash])['blockHash']
+        chain.reorg(3)
+        after = chain.call('eth_getTransactionReceipt', [tx_hash])
+        self.assertEqual((chain.head, chain.reorgs), (3, 1))
+        self.assertNotEqual(after['blockHash'], before)
+        self.assertEqual(chain.call('eth_getLogs', [{}])[0]['blockHash'], after['blockHash'])
+
+
+class JsonRpcRetryTests(SimpleTestCase):
+
+    def client_with_failing_transport(self):
+        client = JsonRpcClient('http://127.0.0.1:1', retries=3, backoff=0)
+        conn = mock.Mock()
+        conn.request.side_effect = ConnectionResetError('reset by peer')
+        client._checkout = mock.Mock(return_value=conn)
+        return client, conn
+
+    def test_reads_are_retried(self):
+        client, conn = self.client_with_failing_transport()
+        with self.assertRaises(ChainError):
+            client.call('eth_blockNumber')
+        self.assertEqual(conn.request.call_count, 4)
+
+    def test_writes_are_sent_once(self):
+        client, conn = self.client_with_failing_transport()
+        with self.assertRaises(ChainError):
+            client.call('eth_sendTransaction', [{'from': '0x' + '11' * 20}])
+        self.assertEqual(conn.request.call_count, 1)
+
+
+class ServerAnchorTests(TempMediaMixin, TestCase):
+    """Nonces, replacements and receipt tracking against the simulated chain."""
+
+    def setUp(self):
+        cache.delete('chain:fees')
+        self.chain = SimulatedChain(block_time=0)
+        self.account = self.chain.accounts[0]
+
+    def anchor(self):
+        make_deed(status='approved')
+        return anchoring.anchor_batch(client=self.chain)
+
+    def test_nonces_are_seeded_once_then_counted_locally(self):
+        with mock.patch.object(self.chain, 'call', wraps=self.chain.call) as call:
+            nonces = [gas.allocate_nonce(self.account, self.chain) for _ in range(3)]
+        self.assertEqual(nonces, [0, 1, 2])
+        self.assertEqual(call.call_count, 1)
+
+        gas.resync_nonce(self.account)
+        self.assertEqual(gas.allocate_nonce(self.account, self.chain), 0)
+
+    def test_stuck_anchor_is_replaced_and_the_old_hash_kept(self):
+        batch = self.anchor()
+        old_hash = batch.tx_hash
+        AnchorBatch.objects.filter(pk=batch.pk).update(submitted_at=timezone.now() - gas.STUCK_AFTER * 2)
+
+        self.assertEqual(gas.replace_stuck(self.chain), [batch])
+        batch.refresh_from_db()
+        self.assertNotEqual(batch.tx_hash, old_hash)
+        self.assertEqual(batch.superseded_hashes, [old_hash])
+        self.assertEqual(batch.nonce, 0)
+        self.assertEqual(set(batch.transactions.values_list('blockchain_hash', flat=True)), {batch.tx_hash})
+
+        self.chain.mine()
+        confirmations.poll_once(self.chain)
+        self.assertEqual(set(batch.transactions.values_list('chain_status', flat=True)), {'mined'})
+
+    def failing_sends(self, message):
+        def call(method, params=None):
+            if method == 'eth_sendTransaction':
+                raise ChainError(message)
+            return SimulatedChain.call(self.chain, method, params)
+        return mock.patch.object(self.chain, 'call', side_effect=call)
+
+    def next_nonce(self):
+        return ChainAccount.objects.get(address=self.account).next_nonce
+
+    def test_failed_replacement_keeps_its_nonce(self):
+        batch = self.anchor()
+        AnchorBatch.objects.filter(pk=batch.pk).update(submitted_at=timezone.now() - gas.STUCK_AFTER * 2)
+        for message in ('replacement transaction underpriced', 'connection reset', 'nonce too low'):
+            with self.failing_sends(message):
+                self.assertEqual(gas.replace_stuck(self.chain), [])
+            batch.refresh_from_db()
+            self.assertEqual((batch.nonce, self.next_nonce()), (0, 1))
+
+    def test_only_nonce_errors_resync_a_fresh_send(self):
+        self.anchor()
+        with self.failing_sends('connection reset'):
+            self.assertEqual(self.anchor().status, 'failed')
+        self.assertEqual(self.next_nonce(), 2)
+        with self.failing_sends('nonce too low'):
+            self.anchor()
+        self.assertIsNone(self.next_nonce())
+
+    def test_mined_original_wins_over_its_replacement(self):
+        batch = self.anchor()
+        original = batch.tx_hash
+        self.chain.mine()
+        # the replacement was sent through a node that had not seen the original mined yet
+        replacement = '0x' + 'ee' * 32
+        AnchorBatch.objects.filter(pk=batch.pk).update(tx_hash=replacement, superseded_hashes=[original])
+        batch.transactions.update(blockchain_hash=replacement)
+
+        confirmations.poll_once(self.chain)
+        batch.refresh_from_db()
+        self.assertEqual(batch.tx_hash, original)
+        self.assertEqual(batch.superseded_hashes, [replacement])
+        deed = batch.transactions.get()
+        self.assertEqual((deed.blockchain_hash, deed.chain_status), (original, 'mined'))
+
+
+class ConfirmationTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        cache.delete('chain:fees')
+        self.chain = SimulatedChain(block_time=0)
+        make_deed(status='approved')
+        self.batch = anchoring.anchor_batch(client=self.chain)
+
+    def deed(self):
+        return self.batch.transactions.get()
+
+    def test_depth_is_tracked_until_confirmed(self):
+        self.assertEqual(confirmations.poll_once(self.chain), {'pending': 1})
+
+        self.chain.mine()
+        self.assertEqual(confirmations.poll_once(self.chain), {'mined': 1})
+        deed = self.deed()
+        self.assertEqual((deed.chain_block_number, deed.chain_confirmations), (1, 1))
+
+        self.chain.mine(confirmations.REQUIRED_CONFIRMATIONS - 1)
+        self.assertEqual(confirmations.poll_once(self.chain), {'confirmed': 1})
+        self.assertEqual(self.deed().chain_confirmations, confirmations.REQUIRED_CONFIRMATIONS)
+        # confirmed hashes are no longer polled
+        self.assertEqual(confirmations.poll_once(self.chain), {})
+
+    def test_hash_unknown_to_the_node_is_dropped_only_after_the_grace_period(self):
+        lost = '0x' + 'cd' * 32
+        self.batch.transactions.update(blockchain_hash=lost)
+        self.assertEqual(confirmations.poll_once(self.chain), {'pending': 1})
+
+        self.batch.transactions.update(blockchain_anchored_at=timezone.now() - confirmations.DROP_AFTER * 2)
+        self.assertEqual(confirmations.poll_once(self.chain), {'dropped': 1})
+
+    def test_reverted_receipt(self):
+        self.chain.revert_rate = 1.0
+        self.chain.mine()
+        confirmations.poll_once(self.chain)
+        self.assertEqual(self.deed().chain_status, 'reverted')
+
+
+class VerifyChainTests(TempMediaMixin, TransactionTestCase):
+    """verify_chain reads in worker threads, so the rows must be committed."""
+
+    def setUp(self):
+        first = make_deed(status='approved', blockchain_hash='0x' + '01' * 32)
+        self.ids = [first.pk] + [
+            make_deed(customer=first.customer, status='approved', blockchain_hash='0x' + f'{n:02x}' * 32).pk
+            for n in (2, 3)
+        ]
+        self.report = os.path.join(self.media_root, 'audit.jsonl')
+        patcher = mock.patch('Home.management.commands.verify_chain.get_client', return_value=SimulatedChain(block_time=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def verify(self, *args):
+        call_command('verify_chain', '--report', self.report, '--chunk-size', '1', *args, stdout=io.StringIO())
+        with open(self.report, encoding='utf-8') as fh:
+            return [json.loads(line) for line in fh]
+
+    def test_every_unmined_hash_is_reported(self):
+        records = self.verify()
+        self.assertEqual(sorted(r['id'] for r in records if 'id' in r), self.ids)
+        self.assertEqual({r['problem'] for r in records if 'id' in r}, {'missing'})
+        self.assertEqual(max(r['checkpoint'] for r in records if 'checkpoint' in r), self.ids[-1])
+
+    def test_resume_does_not_repeat_rows_written_after_the_checkpoint(self):
+        first, _second, third = self.ids
+        # killed while the third chunk had finished but the second had not
+        with open(self.report, 'w', encoding='utf-8') as fh:
+            fh.write(json.dumps({'id': first, 'hash': '', 'problem': 'missing', 'detail': ''}) + '\n')
+            fh.write(json.dumps({'checkpoint': first}) + '\n')
+            fh.write(json.dumps({'id': third, 'hash': '', 'problem': 'missing', 'detail': ''}) + '\n')
+            fh.write('{"id": ')
+
+        records = self.verify('--resume')
+        flagged = [r['id'] for r in records if 'id' in r]
+        self.assertEqual(sorted(flagged), self.ids)
+
+
+class ProofCachingTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        deed = make_deed(status='approved')
+        batch = AnchorBatch.objects.create(merkle_root='aa' * 32, leaf_count=1, tx_hash='0x' + 'bb' * 32)
+        Transaction.objects.filter(pk=deed.pk).update(
+            anchor_batch=batch, merkle_index=0, merkle_proof=[], chain_status='confirmed',
+        )
+        self.url = reverse('certificate_proof', args=[deed.pk])
+
+    def test_final_proof_is_revalidated_not_immutable(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=300', response['Cache-Control'])
+
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_vary_only_when_negotiated(self):
+        self.assertEqual(self.client.get(self.url)['Vary'], 'Accept')
+        self.assertFalse(self.client.get(self.url, {'format': 'json'}).has_header('Vary'))
+
+
+class WalletTests(TempMediaMixin, TestCase):
+
+    ADDRESS = '0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed'
+
+    def test_address_is_stored_checksummed(self):
+        deed = make_deed()
+        deed.customer.eth_address = self.ADDRESS.lower()
+        deed.customer.save()
+        self.assertEqual(Customer.objects.get(pk=deed.customer.pk).eth_address, self.ADDRESS)
+
+    def test_invalid_address_is_refused(self):
+        customer = make_deed().customer
+        for bad in ('0x1234', self.ADDRESS.replace('aA', 'Aa')):
+            customer.eth_address = bad
+            with self.assertRaises(ValidationError):
+                customer.save()
+
+    def test_legacy_malformed_address_does_not_block_other_edits(self):
+        customer = make_deed().customer
+        Customer.objects.filter(pk=customer.pk).update(eth_address='0xnot-a-wallet')
+
+        customer = Customer.objects.get(pk=customer.pk)
+        customer.city = 'Kollam'
+        customer.full_clean()
+        customer.save()
+        self.assertEqual(Customer.objects.get(pk=customer.pk).city, 'Kollam')
+
+        customer.eth_address = '0xstill-not-a-wallet'
+        with self.assertRaises(ValidationError):
+            customer.save()
+
+    def test_transaction_page_shows_cached_balance(self):
+        deed = make_deed()
+        deed.customer.eth_address = self.ADDRESS
+        deed.customer.save()
+        WalletSnapshot.objects.create(
+            address=self.ADDRESS, balance_wei=15 * 10**17, nonce=4, refreshed_at=timezone.now(),
+        )
+        response = self.client.get(reverse('transaction_detail', args=[deed.pk]))
+        self.assertContains(response, '1.5000 ETH')
+        self.assertContains(response, 'nonce 4')
+
+
+class ExportTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        noon = datetime(2024, 1, 10, 12, tzinfo=timezone.get_current_timezone())
+        self.sale = make_deed(deed_type='sale', submission_date=noon)
+        self.gift = make_deed(
+            customer=self.sale.customer, deed_type='gift', status='rejected', submission_date=noon + timedelta(days=10),
+        )
+        self.client.force_login(User.objects.create_superuser('auditor'))
+
+    def export(self, **params):
+        response = self.client.get(reverse('admin_export_transactions'), params)
+        return response, b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_csv_follows_the_filters(self):
+        response, body = self.export(status='rejected')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual([row['id'] for row in rows], [str(self.gift.pk)])
+        self.assertEqual(rows[0]['office_name'], 'SRO Kollam')
+
+    def test_jsonl_date_range_is_inclusive(self):
+        _response, body = self.export(format='jsonl', date_from='2024-01-10', date_to='2024-01-19')
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], [self.sale.pk])
+        _response, body = self.export(format='jsonl', date_to='2024-01-20')
+        self.assertEqual(len(body.splitlines()), 2)
+
+    def test_gzip_holds_the_same_export(self):
+        _response, plain = self.export(deed_type='sale')
+        response, packed = self.export(deed_type='sale', gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('.csv.gz"'))
+        self.assertEqual(gzip.decompress(packed), plain)
+
+    async def test_asgi_export_is_streamed_not_buffered(self):
+        _response, plain = await sync_to_async(self.export)()
+        client = AsyncClient()
+        await client.aforce_login(await User.objects.aget(username='auditor'))
+        response = await client.get(reverse('admin_export_transactions'))
+        self.assertTrue(response.is_async)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), plain)
+
+    def test_malformed_filters_are_refused(self):
+        for params in ({'status': 'lost'}, {'date_from': '10/01/2024'}, {'format': 'xml'}):
+            self.assertEqual(self.export(**params)[0].status_code, 400)
+
+
+class CertificateDownloadTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        self.deed = make_deed(status='approved')
+        self.owner = self.deed.customer.user
+        self.url = reverse('certificate_download', args=[self.deed.pk])
+        self.deed.refresh_from_db()
+        with self.deed.certificate_file.open('rb') as fh:
+            self.pdf = fh.read()
+
+    def test_certificate_is_streamed_from_the_file(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(self.url)
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(response['Content-Length'], str(len(self.pdf)))
+        self.assertIn(f'certificate-{self.deed.pk}.pdf', response['Content-Disposition'])
+        self.assertEqual(b''.join(response.streaming_content), self.pdf)
+
+    async def test_asgi_download_is_streamed(self):
+        client = AsyncClient()
+        await client.aforce_login(self.owner)
+        response = await client.get(self.url)
+        self.assertTrue(response.is_async)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), self.pdf)
+
+    def test_other_customers_get_404(self):
+        self.client.force_login(make_deed().customer.user)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class AdminChangelistTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        self.deed = make_deed(survey_number='55/7')
+        self.client.force_login(User.objects.create_superuser('admin'))
+
+    def changelist(self, model, **params):
+        return self.client.get(reverse(f'admin:Home_{model}_changelist'), params)
+
+    def queries_for(self, model):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.changelist(model).status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_the_rows(self):
+        counts = {model: self.queries_for(model) for model in ('transaction', 'customer')}
+        for _ in range(5):
+            make_deed()
+        self.assertEqual({model: self.queries_for(model) for model in counts}, counts)
+
+    def found(self, term):
+        return list(self.changelist('transaction', q=term).context['cl'].result_list)
+
+    def test_search_matches_exact_indexed_values(self):
+        self.assertEqual(self.found('55/7'), [self.deed])
+        self.assertEqual(self.found('55'), [])
+        self.assertEqual(self.found('0x' + self.deed.deed_hash.upper()), [self.deed])
+        self.assertEqual(self.found(str(self.deed.pk)), [self.deed])
+
+
+class ImportSubregistrarsTests(TestCase):
+
+    def import_offices(self):
+        out = io.StringIO()
+        call_command('import_subregistrars', '--path', str(settings.BASE_DIR / 'Home' / 'subregistrars.csv'), stdout=out)
+        rows = list(SubRegistrarOffice.objects.order_by('pk').values())
+        return rows, out.getvalue()
+
+    def test_second_run_leaves_the_same_rows(self):
+        first, _out = self.import_offices()
+        second, out = self.import_offices()
+        self.assertGreater(len(first), 0)
+        self.assertEqual(first, second)
+        self.assertIn('0 inserted, 0 updated', out)
+
+
+class IngestTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        self.customer = make_deed().customer
+        Transaction.objects.all().delete()
+        self.row = {
+            'customer_adhar': self.customer.adhar_no, 'office_district': 'kollam', 'office_name': 'SRO Kollam',
+            'office_locality': 'Kollam', 'deed_type': 'sale', 'survey_number': '7/1', 'location': 'Kollam',
+            'valuation': '2500', 'party_name': 'Seller', 'party_contact': '9000000001', 'party_id': 'S-1',
+            'submission_date': '2019-06-01T10:00:00',
+        }
+
+    def run_ingest(self, lines):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as fh:
+            fh.write('\n'.join(lines) + '\n')
+        self.addCleanup(os.unlink, fh.name)
+        rejects = io.StringIO()
+        counts = ingest.ingest(fh.name, reject_file=rejects)
+        return counts, [json.loads(line) for line in rejects.getvalue().splitlines()]
+
+    def test_malformed_lines_are_rejected_with_their_line_number(self):
+        good = json.dumps(dict(self.row, legacy_ref='OLD-1'))
+        counts, rejects = self.run_ingest(['{"legacy_ref": "OLD-2"', '[1, 2]', good])
+        self.assertEqual((counts['inserted'], counts['rejected']), (1, 2))
+        self.assertEqual([r['line'] for r in rejects], [1, 2])
+
+    def test_repeated_run_counts_nothing_as_inserted(self):
+        lines = [json.dumps(dict(self.row, legacy_ref=f'OLD-{i}')) for i in range(3)]
+        self.assertEqual(self.run_ingest(lines)[0]['inserted'], 3)
+        counts, _rejects = self.run_ingest(lines)
+        self.assertEqual((counts['inserted'], counts['skipped']), (0, 3))
+
+    def test_imported_history_reaches_the_rollup_but_not_anchoring(self):
+        self.run_ingest([json.dumps(dict(self.row, legacy_ref='OLD-1'))])
+        self.assertEqual(stats.totals(status='approved', date__year=2019)['count'], 1)
+        self.assertFalse(anchoring.pending_transactions().exists())
+
+
+class ReconcileTests(TempMediaMixin, TestCase):
+
+    def test_backfilled_history_outside_the_window_is_rebuilt(self):
+        deed = make_deed()
+        old = datetime(2018, 3, 4, 12, tzinfo=timezone.get_current_timezone())
+        Transaction.objects.bulk_create([
+            Transaction(customer=deed.customer, office=deed.office, deed_type='gift', survey_number='9/9',
+                        location='Kollam', valuation=500, party_name='P', party_contact='1', party_id='X',
+                        status='approved', submission_date=old)
+        ])
+        self.assertEqual(stats.stale_dates(), [old.date()])
+
+        call_command('reconcile_daily_stats', stdout=io.StringIO())
+        self.assertEqual(stats.stale_dates(), [])
+        self.assertEqual(stats.totals(date=old.date())['count'], 1)
+
+    def test_date_ranges(self):
+        days = [date(2020, 1, 1), date(2020, 1, 2), date(2020, 1, 5)]
+        self.assertEqual(
+            stats.date_ranges(days),
+            [(date(2020, 1, 1), date(2020, 1, 2)), (date(2020, 1, 5), date(2020, 1, 5))],
+        )
+
+
+class SessionTests(TempMediaMixin, TestCase):
+
+    def test_sessions_are_cached_only_in_a_shared_cache(self):
+        backends = 'django.contrib.sessions.backends.'
+        self.assertEqual(load_settings().SESSION_ENGINE, backends + 'db')
+        self.assertEqual(load_settings(LAND_CACHE='file').SESSION_ENGINE, backends + 'cached_db')
+        self.assertEqual(load_settings(LAND_SESSION_ENGINE='cache').SESSION_ENGINE, backends + 'cache')
+
+    def test_unchanged_session_is_not_written_again(self):
+        deed = make_deed()
+        url = reverse('transaction_detail', args=[deed.pk])
+        self.client.get(url)
+
+        def session_writes():
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            return [q['sql'] for q in queries if 'django_session' in q['sql'] and not q['sql'].startswith('SELECT')]
+
+        self.assertEqual(session_writes(), [])
+        with mock.patch('time.time', return_value=time.time() + 120):
+            self.assertEqual(len(session_writes()), 1)
+
+
+class RoleCacheTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        self.user = make_deed().customer.user
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_per_process_cache_is_not_used_across_requests(self):
+        roles.get_role(self.fresh_user())
+        self.assertIsNone(cache.get(roles.cache_key(self.user.pk)))
+        user = self.fresh_user()
+        with self.assertNumQueries(2):
+            roles.get_role(user)
+
+    def test_shared_cache_holds_roles_until_a_profile_changes(self):
+        location = tempfile.mkdtemp()
+        shared = {
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+            'fragments': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+        }
+        with override_settings(CACHES=shared):
+            self.addCleanup(cache.clear)
+            role = roles.get_role(self.fresh_user())
+            user = self.fresh_user()
+            with self.assertNumQueries(0):
+                self.assertEqual(roles.get_role(user).customer, role.customer)
+
+            self.user.customer.delete()
+            self.assertIsNone(roles.get_role(self.fresh_user()).customer)
+
+
+class RegistrarDashboardTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        deed = make_deed(deed_type='sale')
+        make_deed(customer=deed.customer, deed_type='gift')
+        registrar = SubRegistrar.objects.create(user=User.objects.create_user('registrar'), office=deed.office)
+        self.client.force_login(registrar.user)
+
+    def pending_count(self, **filters):
+        return self.client.get(reverse('registrar_dashboard'), filters).context['pending_count']()
+
+    def test_overview_counts_follow_the_filters(self):
+        self.assertEqual(self.pending_count(), 2)
+        self.assertEqual(self.pending_count(deed_type='gift'), 1)
+
+    def test_overview_is_cached_per_filter_set_in_a_shared_cache(self):
+        shared = {
+            name: {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp()}
+            for name in ('default', 'fragments')
+        }
+        with override_settings(CACHES=shared):
+            self.assertEqual(self.rendered_pending(), '2')
+            self.assertEqual(self.rendered_pending(deed_type='gift'), '1')
+
+            # a write that skips the signals leaves the cached cards alone...
+            deed = Transaction.objects.first()
+            deed.pk = None
+            Transaction.objects.bulk_create([deed])
+            self.assertEqual(self.rendered_pending(), '2')
+            # ...and a saved one expires the office's fragments
+            make_deed(customer=deed.customer)
+            self.assertEqual(self.rendered_pending(), '4')
+
+    def rendered_pending(self, **filters):
+        html = self.client.get(reverse('registrar_dashboard'), filters).content.decode()
+        return re.search(r'text-yellow-400 transition-colors">\s*(\d+)', html).group(1)
@@ -11,10 +11,12 @@ urlpatterns = [
     path('logout/', views.customer_logout, name='customer_logout'),
     path('customer_dashboard', views.customer_dashboard, name='customer_dashboard'),
     path('admin_dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin_dashboard/reports/export/', views.admin_export_transactions, name='admin_export_transactions'),
     path('create_subregistrar/', views.create_subregistrar, name='create_subregistrar'),
     path('registrar_login/', views.registrar_login, name='registrar_login'),
     path('registrar_dashboard/', views.registrar_dashboard, name='registrar_dashboard'),
     path('customer/submit-transaction/', views.submit_transaction, name='submit_transaction'),
+    path('customer/upload-chunk/', views.upload_document_chunk, name='upload_document_chunk'),
     path('property-valuation/', views.property_valuation, name='property_valuation'),
     path('get-localities/', views.get_localities_ajax, name='get_localities'),
     path("applications/", views.applications_list, name="applications_list"),
@@ -28,6 +30,10 @@ urlpatterns = [
     path("transactions/<int:pk>/",views.transaction_detail,name="transaction_detail"),
      path("auto-logout/",views.auto_logout,name="auto_logout"),
     path("profile/edit/",views.edit_customer_profile,name="edit_customer_profile"),
+    path("verify/<int:pk>/", views.certificate_proof, name="certificate_proof"),
+    path("verify/proofs/", views.certificate_proofs, name="certificate_proofs"),
+    path("verify/chain-status/", views.chain_status, name="chain_status"),
+    path("my-certificates/<int:pk>/download/", views.certificate_download, name="certificate_download"),
 
 
     
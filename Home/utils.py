@@ -1,9 +1,10 @@
-import joblib
-import numpy as np
-import pandas as pd
-from catboost import CatBoostRegressor
 import os
+import threading
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+# catboost, joblib, numpy and pandas take seconds to import, so they are
+# imported where they are used rather than whenever the views are loaded
 
 class LandPricePrediction:
     def __init__(self):
@@ -14,6 +15,10 @@ class LandPricePrediction:
         self.load_models()
         
     def load_models(self):
+        import joblib
+        import pandas as pd
+        from catboost import CatBoostRegressor
+
         models_dir = os.path.join(settings.BASE_DIR, "models")
         
         # Load CatBoost model
@@ -49,6 +54,9 @@ class LandPricePrediction:
         return []
     
     def predict_price(self, district, locality):
+        import numpy as np
+        import pandas as pd
+
         district = district.strip().lower()
         locality = locality.strip().lower()
         
@@ -101,5 +109,18 @@ class LandPricePrediction:
             "locality": locality.title(),
         }
 
-# Singleton predictor instance
-predictor = LandPricePrediction()
+_load_lock = threading.Lock()
+_instance = None
+
+
+def _load_predictor():
+    # async views call the predictor from executor threads; load it only once
+    global _instance
+    with _load_lock:
+        if _instance is None:
+            _instance = LandPricePrediction()
+    return _instance
+
+
+# Singleton predictor instance, loaded on first use
+predictor = SimpleLazyObject(_load_predictor)
@@ -1,16 +1,36 @@
+import os
 from decimal import Decimal, InvalidOperation
+from asgiref.sync import sync_to_async
 from .services.fill_certificate import generate_certificate
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout as auth_logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
-from django.core.files.storage import default_storage
+from django.contrib.sessions.models import Session
+from django.core.exceptions import ValidationError
 from django.db import transaction as db_transaction
+from django.db.models import Count, Sum
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.defaultfilters import filesizeformat
 from django.urls import reverse_lazy
-from django.http import HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
 
-from .models import Customer, SubRegistrar, SubRegistrarOffice, Transaction, assign_group
+from .models import (
+    ChunkedUpload, Customer, StoredDocument, SubRegistrar, SubRegistrarOffice, Transaction, assign_group,
+)
+from .services import stats
+from .services.exports import export_chunks, export_filename, export_queryset
+from .services.indexer import (
+    anetwork_status, index_health, network_status as chain_network_status, node_status as chain_node_status,
+)
+from .services.previews import previews_for
+from .services.roles import aget_role, customer_or_404, get_role, subregistrar_or_404
+from .services.sessions import touch_session
+from .services.proofs import is_final, proof_document, proof_rows
+from .services.wallets import validate_eth_address, wallet_snapshot
+from .services.uploads import ChunkOverflow, append_chunk, finish_chunked_upload, new_upload_id, store_documents
 from .utils import predictor  # assuming existing module
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
@@ -51,8 +71,10 @@ def customer_register(request):
             return render(request, 'auth/register.html')
         
         if eth_address:
-            if not (eth_address.startswith("0x") and len(eth_address) == 42):
-                messages.error(request, "Please enter a valid Ethereum wallet address.")
+            try:
+                validate_eth_address(eth_address)
+            except ValidationError as e:
+                messages.error(request, e.messages[0])
                 return render(request, 'auth/register.html')
 
 
@@ -160,7 +182,7 @@ def registrar_login(request):
 
 @login_required
 def customer_dashboard(request):
-    customer = get_object_or_404(Customer, user=request.user)
+    customer = customer_or_404(request)
     stats = {
         'pending_transactions': customer.transactions.filter(status='pending').count(),
         'under_review_transactions': customer.transactions.filter(status='pending').count(),
@@ -183,16 +205,17 @@ def is_superuser(user):
 
 # ✅ Access control: allow superuser or linked SubRegistrar
 def is_admin_user(user):
-    return user.is_superuser or SubRegistrar.objects.filter(user=user).exists()
+    return get_role(user).is_admin
 
 def admin_dashboard(request):
     # Fetch all SubRegistrars with related office and user details
     subregistrars = SubRegistrar.objects.select_related('user', 'office').all()
 
     context = {
-        'total_customers': Customer.objects.count(),
-        'total_registrars': subregistrars.count(),
-        'pending_transactions': Transaction.objects.filter(status='pending').count(),
+        # counts come from the cached customer total and the daily rollup
+        'total_customers': stats.customer_count(),
+        'total_registrars': subregistrars.count,  # callable: counted only if rendered
+        'pending_transactions': stats.totals(status='pending')['count'],
         'blockchain_uptime': 99.8,
         'system_alerts': [
             {
@@ -272,11 +295,51 @@ def admin_system_config(request):
 @login_required
 @user_passes_test(is_superuser, login_url='/')
 def admin_blockchain_management(request):
+    # deed states come from the poll_receipts worker and the node's head and
+    # gas price from index_chain_events; this page never calls the node
+    unsettled = (
+        Transaction.objects
+        .filter(status="approved")
+        .filter(Q(chain_status__in=["", "pending", "mined", "dropped", "reverted"]) | Q(blockchain_hash__isnull=True))
+        .only("id", "deed_type", "chain_status", "chain_confirmations", "blockchain_hash")
+        .order_by("-verified_at")[:50]
+    )
+    descriptions = {
+        "": "Not yet checked by the confirmation worker",
+        "pending": "Awaiting blockchain confirmation",
+        "mined": "Mined, waiting for more confirmations",
+        "dropped": "Dropped from the network - resubmit",
+        "reverted": "Reverted on chain - resubmit",
+    }
+    indexed = chain_network_status()
+    node = chain_node_status()
+    if node is None:
+        health, node = 'Indexer not reporting', {}
+    elif node['error']:
+        health, node = 'Node unreachable', {}
+    else:
+        health = index_health(indexed['last_block'], node['head'])
+    gas_price = node.get('gas_price')
     context = {
-        'network_status': {'health': 'Excellent', 'last_block': '#2,547,891', 'confirmation_time': '~15 seconds', 'gas_price': '0.002 ETH'},
+        'network_status': {
+            'health': health,
+            'last_block': f"#{indexed['last_block']:,}" if indexed['last_block'] is not None else '—',
+            'chain_head': f"#{node['head']:,}" if node else '—',
+            'confirmation_time': f"~{indexed['block_time'].total_seconds():.0f} seconds" if indexed['block_time'] else '—',
+            'gas_price': f"{gas_price / 10**9:,.2f} gwei" if gas_price is not None else '—',
+        },
         'pending_anchoring': [
-            {'tx_id': 'TX2025045', 'type': 'Sale deed', 'status': 'Pending', 'description': 'Awaiting blockchain confirmation'},
-            {'tx_id': 'TX2025044', 'type': 'Gift deed', 'status': 'Failed', 'description': 'Failed to anchor - network congestion'},
+            {
+                'tx_id': f'TX{tx.id}',
+                'type': tx.get_deed_type_display(),
+                'status': 'Failed' if tx.chain_status in ("dropped", "reverted") else 'Pending',
+                'description': (
+                    descriptions[tx.chain_status] if tx.blockchain_hash
+                    else "Waiting for the next anchor batch"
+                ),
+                'confirmations': tx.chain_confirmations,
+            }
+            for tx in unsettled
         ]
     }
     return render(request, 'admin/blockchain_management.html', context)
@@ -284,21 +347,100 @@ def admin_blockchain_management(request):
 @login_required
 @user_passes_test(is_superuser, login_url='/')
 def admin_data_management(request):
-    context = {'storage_stats': {'total_storage': '2.4 TB', 'documents_stored': 45234, 'active_records': 12890, 'archived_records': 32344}}
+    by_status = {row['status']: row['count'] for row in stats.breakdown('status')}
+    documents = StoredDocument.objects.aggregate(n=Count('id'), size=Sum('size'))
+    context = {'storage_stats': {
+        'total_storage': filesizeformat(documents['size'] or 0),
+        'documents_stored': documents['n'],
+        'active_records': by_status.get('pending', 0) + by_status.get('approved', 0),
+        'archived_records': by_status.get('rejected', 0) + by_status.get('draft', 0),
+    }}
     return render(request, 'admin/data_management.html', context)
 
+def _active_sessions():
+    # only database-backed sessions can be counted; the cache engine keeps none
+    if settings.SESSION_ENGINE.rsplit('.', 1)[-1] not in ('db', 'cached_db'):
+        return None
+    return Session.objects.filter(expire_date__gt=timezone.now()).count()
+
 @login_required
 @user_passes_test(is_superuser, login_url='/')
 def admin_analytics(request):
-    context = {'realtime_metrics': {'active_sessions': 847, 'success_rate': 98.7, 'avg_response': '156ms', 'uptime': 99.9}}
+    by_status = {row['status']: row for row in stats.breakdown('status')}
+    approved = by_status.get('approved', {}).get('count', 0)
+    decided = approved + by_status.get('rejected', {}).get('count', 0)
+    context = {
+        'realtime_metrics': {
+            'active_sessions': _active_sessions(),
+            'success_rate': round(100 * approved / decided, 1) if decided else None,
+        },
+        'status_totals': list(by_status.values()),
+        'deed_type_totals': stats.breakdown('deed_type'),
+        'daily_submissions': stats.daily_series(30),
+        'total_valuation': stats.totals(status='approved')['valuation'],
+    }
     return render(request, 'admin/analytics.html', context)
 
 @login_required
 @user_passes_test(is_superuser, login_url='/')
 def admin_reports(request):
-    context = {'recent_reports': [{'name': 'Monthly Transaction Report - Jan 2025', 'type': 'Compliance', 'generated': 'Jan 30, 2025', 'size': '2.4 MB'}]}
+    context = {
+        'recent_reports': [{'name': 'Monthly Transaction Report - Jan 2025', 'type': 'Compliance', 'generated': 'Jan 30, 2025', 'size': '2.4 MB'}],
+        # filter options for the transaction export form
+        'offices': SubRegistrarOffice.objects.order_by('district', 'name').values('id', 'district', 'name'),
+        'statuses': Transaction.STATUS_CHOICES,
+        'deed_types': Transaction.DEED_TYPE_CHOICES,
+    }
     return render(request, 'admin/reports.html', context)
 
+async def _pull_in_thread(chunks, thread_sensitive):
+    iterator = iter(chunks)
+    done = object()
+    while True:
+        chunk = await sync_to_async(next, thread_sensitive=thread_sensitive)(iterator, done)
+        if chunk is done:
+            return
+        yield chunk
+
+
+def streamed(request, response, thread_sensitive=True):
+    """
+    Under ASGI Django reads a synchronous streaming response whole before
+    sending it; hand it the chunks one at a time from a worker thread
+    instead. thread_sensitive keeps database cursors on the thread that
+    opened them. Under WSGI the response is returned as it is.
+    """
+    if isinstance(request, ASGIRequest):
+        response.streaming_content = _pull_in_thread(response.streaming_content, thread_sensitive)
+    return response
+
+
+@login_required
+@user_passes_test(is_superuser, login_url='/')
+def admin_export_transactions(request):
+    """
+    Stream matching transactions as CSV or JSONL (?format=jsonl), gzipped with
+    ?gzip=1. Filters: office, status, deed_type, date_from, date_to.
+    """
+    fmt = request.GET.get('format', 'csv')
+    compress = request.GET.get('gzip') == '1'
+    try:
+        qs = export_queryset(
+            office=request.GET.get('office'),
+            status=request.GET.get('status'),
+            deed_type=request.GET.get('deed_type'),
+            date_from=request.GET.get('date_from'),
+            date_to=request.GET.get('date_to'),
+        )
+        chunks = export_chunks(qs, fmt, compress)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(chunks, content_type='application/gzip' if compress else content_type)
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(fmt, compress)}"'
+    return streamed(request, response)
+
 @login_required
 @user_passes_test(is_superuser, login_url='/')
 def admin_security(request):
@@ -394,7 +536,7 @@ from django.utils import timezone
 
 @login_required
 def registrar_dashboard(request):
-    subregistrar = get_object_or_404(SubRegistrar, user=request.user)
+    subregistrar = subregistrar_or_404(request)
 
     # Transactions belonging to this sub-registrar's office
     applications = Transaction.objects.filter(office=subregistrar.office)
@@ -419,12 +561,19 @@ def registrar_dashboard(request):
             Q(customer__user__last_name__icontains=customer_name)
         )
 
-    stats = {
-        'pending_transactions': applications.filter(status='pending').count(),
-        'under_review_transactions': applications.filter(status='under_review').count(),
-        'approved_transactions': applications.filter(status='approved').count(),
+    # The overview cards are cached per office and filter set ({% cache %} in
+    # the template), so the counts are callables that only run on a miss.
+    overview_filters = '|'.join(request.GET.get(name, '') for name in ('deed_type', 'from_date', 'to_date', 'customer_name'))
+
+    def count(**filters):
+        return applications.filter(**filters).count
+
+    overview = {
+        'pending_transactions': count(status='pending'),
+        'under_review_transactions': count(status='under_review'),
+        'approved_transactions': count(status='approved'),
         'notifications_count': 4,
-        'total_transactions': applications.count(),
+        'total_transactions': applications.count,
     }
 
     recent_activities = [
@@ -435,7 +584,12 @@ def registrar_dashboard(request):
 
     context = {
         'registrar': subregistrar,
-        'stats': stats,
+        'stats': overview,
+        'pending_count': overview['pending_transactions'],
+        'approved_count': overview['approved_transactions'],
+        'rejected_count': count(status='rejected'),
+        'notifications_count': overview['notifications_count'],
+        'overview_filters': overview_filters,
         'recent_activities': recent_activities,
         'applications': applications.order_by('-submission_date'),  # <-- pass to template
         'today_date': timezone.now().date(),
@@ -468,7 +622,7 @@ def get_form_context():
 
 @login_required
 def submit_transaction(request):
-    customer = get_object_or_404(Customer, user=request.user)
+    customer = customer_or_404(request)
     offices = SubRegistrarOffice.objects.all().order_by('district', 'locality')
 
     if request.method == "POST":
@@ -481,8 +635,12 @@ def submit_transaction(request):
         party_id = request.POST.get('party_id', '').strip()
         office_id = request.POST.get('office_id', '').strip()
         documents = request.FILES.getlist('documents')
+        chunked = ChunkedUpload.objects.filter(
+            customer=customer,
+            upload_id__in=request.POST.getlist('upload_ids'),
+        )
 
-        if not all([deed_type, survey_no, location, valuation_raw, party_name, party_contact, party_id, office_id]) or len(documents) == 0:
+        if not all([deed_type, survey_no, location, valuation_raw, party_name, party_contact, party_id, office_id]) or (len(documents) == 0 and not chunked):
             messages.error(request, "Please fill all required fields and select an office, and upload at least one document.")
             return render(request, "customer/submit.html", {'customer': customer, 'offices': offices})
 
@@ -494,10 +652,18 @@ def submit_transaction(request):
 
         office = get_object_or_404(SubRegistrarOffice, pk=office_id)
 
-        saved_files = []
-        for doc in documents:
-            path = default_storage.save(f'transactions/{customer.id}/{doc.name}', doc)
-            saved_files.append(path)
+        if any(not upload.is_complete for upload in chunked):
+            messages.error(request, "One of your documents has not finished uploading.")
+            return render(request, "customer/submit.html", {'customer': customer, 'offices': offices})
+
+        # files stream to storage in parallel; large scans arrive via upload_document_chunk
+        stored = store_documents(documents)
+        stored += [finish_chunked_upload(upload) for upload in chunked]
+        # identical scans share one stored copy, so list each path once
+        saved_files = list(dict.fromkeys(path for path, _sha256, _size, _filename in stored))
+        document_names = {}
+        for path, _sha256, _size, filename in stored:
+            document_names.setdefault(path, filename)
 
         tx = Transaction.objects.create(
          customer=customer,
@@ -510,7 +676,8 @@ def submit_transaction(request):
         party_id=party_id,
         office=office,   # <-- Use the selected office
         status='pending',
-        documents=saved_files
+        documents=saved_files,
+        document_names=document_names,
 
 
 )
@@ -522,14 +689,66 @@ def submit_transaction(request):
     return render(request, "customer/submit.html", {'customer': customer, 'offices': offices})
 
 
+@login_required
+@require_POST
+def upload_document_chunk(request):
+    """
+    Resumable upload for large deed scans.
+
+    The first call sends `filename` and `total_bytes` and gets an `upload_id`
+    back. Every call after that sends `upload_id`, the byte `offset` and a
+    `chunk` file; a call without a chunk just returns the offset the
+    server holds so an interrupted client can resume from it.
+    """
+    customer = customer_or_404(request)
+    upload_id = request.POST.get('upload_id', '').strip()
+
+    if not upload_id:
+        filename = os.path.basename(request.POST.get('filename', '').strip())
+        try:
+            total_bytes = int(request.POST.get('total_bytes', '0'))
+        except ValueError:
+            total_bytes = 0
+        if not filename or total_bytes <= 0:
+            return JsonResponse({"error": "filename and total_bytes are required"}, status=400)
+
+        upload = ChunkedUpload.objects.create(
+            upload_id=new_upload_id(),
+            customer=customer,
+            filename=filename,
+            total_bytes=total_bytes,
+        )
+    else:
+        upload = get_object_or_404(ChunkedUpload, upload_id=upload_id, customer=customer)
+
+    chunk = request.FILES.get('chunk')
+    if chunk is not None:
+        try:
+            offset = int(request.POST.get('offset', '0'))
+        except ValueError:
+            return JsonResponse({"error": "offset must be a whole number of bytes", "upload_id": upload.upload_id, "offset": upload.received_bytes}, status=400)
+        try:
+            append_chunk(upload, chunk, offset)
+        except ChunkOverflow as e:
+            return JsonResponse({"error": str(e), "upload_id": upload.upload_id, "offset": upload.received_bytes}, status=400)
+        except ValueError as e:
+            return JsonResponse({"error": str(e), "upload_id": upload.upload_id, "offset": upload.received_bytes}, status=409)
+
+    return JsonResponse({
+        "upload_id": upload.upload_id,
+        "offset": upload.received_bytes,
+        "complete": upload.is_complete,
+    })
+
+
 @login_required
 def transaction_wallet(request):
-    customer = get_object_or_404(Customer, user=request.user)
+    customer = customer_or_404(request)
     return render(request, 'dashboard/transaction_wallet.html', {'customer': customer})
 
 @login_required
 def verify_certificate(request):
-    customer = get_object_or_404(Customer, user=request.user)
+    customer = customer_or_404(request)
     return render(request, 'dashboard/verify_certificate.html', {'customer': customer})
 
 @login_required
@@ -545,10 +764,11 @@ def property_valuation(request):
             return render(request, 'prediction.html', {'districts': districts, 'error': str(e)})
     return render(request, 'prediction.html', {'districts': districts})
 
-def get_localities_ajax(request):
+async def get_localities_ajax(request):
     district = request.GET.get('district', '')
-    localities = predictor.get_localities(district)
-    return JsonResponse({'localities': localities})
+    # pandas work (and the model load on first use) runs in a worker thread
+    localities = await sync_to_async(predictor.get_localities, thread_sensitive=False)(district)
+    return JsonResponse({'localities': list(localities)})
 
 def list_subregistrars(request):
     offices = SubRegistrarOffice.objects.all()
@@ -597,7 +817,7 @@ def application_detail(request, pk):
     Display all details for a single transaction for the registrar.
     """
     # Ensure the logged-in user is a sub-registrar
-    subregistrar = get_object_or_404(SubRegistrar, user=request.user)
+    subregistrar = subregistrar_or_404(request)
 
     # Fetch the transaction and ensure it belongs to the sub-registrar's office
     application = get_object_or_404(Transaction, pk=pk, office=subregistrar.office)
@@ -616,8 +836,10 @@ def application_detail(request, pk):
         "status": application.status,
         "rejection_reason": application.rejection_reason,
         "documents": application.documents,
+        # thumbnails and extracted text, so reviewers don't pull every full file
+        "document_previews": previews_for(application.documents, application.document_names),
     }
-    return render(request, "customer/detail.html", context)
+    return render(request, "auth/application_detail.html", context)
 
 
 @require_POST
@@ -626,7 +848,7 @@ def application_reject(request, pk):
 
     tx.status = "rejected"
     tx.rejection_reason = "Rejected by registrar"   # (later: add form)
-    tx.verified_by = request.user.subregistrar_profile
+    tx.verified_by = subregistrar_or_404(request)
     tx.verified_at = timezone.now()
     tx.save()
 
@@ -643,19 +865,22 @@ def application_approve(request, pk):
     except Exception:
         return JsonResponse({"error": "Invalid JSON body"}, status=400)
 
+    # with server-side anchoring the deed goes into the next Merkle batch,
+    # so the browser no longer has to send its own chain transaction
     tx_hash = data.get("tx_hash")
-    if not tx_hash:
+    if not tx_hash and not getattr(settings, "CHAIN_SERVER_ANCHORING", False):
         return JsonResponse({"error": "Missing tx hash"}, status=400)
 
     # --- ensure registrar ---
-    if not hasattr(request.user, "subregistrar_profile"):
+    if not request.role.is_registrar:
         return JsonResponse({"error": "Unauthorized user"}, status=403)
 
     # --- update transaction ---
-    tx.blockchain_hash = tx_hash
+    tx.blockchain_hash = tx_hash or None
     tx.status = "approved"
-    tx.blockchain_anchored_at = timezone.now()
-    tx.verified_by = request.user.subregistrar_profile
+    tx.blockchain_anchored_at = timezone.now() if tx_hash else None
+    tx.chain_status = "pending" if tx_hash else ""
+    tx.verified_by = request.role.subregistrar
     tx.verified_at = timezone.now()
     tx.save()
 
@@ -666,7 +891,7 @@ def application_approve(request, pk):
 
 @login_required
 def my_certificates(request):
-    customer = get_object_or_404(Customer, user=request.user)
+    customer = customer_or_404(request)
 
     certificates = (
         customer.transactions
@@ -681,6 +906,37 @@ def my_certificates(request):
     })
 
 
+@login_required
+async def certificate_download(request, pk):
+    user = await request.auser()
+    role = await aget_role(user)
+    tx = await (
+        Transaction.objects.select_related("customer__user", "office")
+        .filter(pk=pk, status="approved")
+        .afirst()
+    )
+    if tx is None or not (
+        role.is_superuser
+        or (role.customer and role.customer.pk == tx.customer_id)
+        or (role.subregistrar and role.subregistrar.office_id == tx.office_id)
+    ):
+        raise Http404("No certificate matches the given query.")
+
+    if not tx.certificate_file:
+        # normally written by the approval signal; render it now if that failed
+        await sync_to_async(generate_certificate)(tx)
+
+    certificate = tx.certificate_file
+    try:
+        fh = await sync_to_async(certificate.storage.open, thread_sensitive=False)(certificate.name, "rb")
+    except FileNotFoundError:
+        raise Http404("Certificate file is missing.")
+    response = FileResponse(
+        fh, as_attachment=True, filename=f"certificate-{tx.pk}.pdf", content_type="application/pdf",
+    )
+    return streamed(request, response, thread_sensitive=False)
+
+
 @login_required
 def transactions_view(request):
     user = request.user
@@ -698,8 +954,8 @@ def transactions_view(request):
 
 
 def transaction_detail(request, pk):
-    request.session.set_expiry(300)
-    request.session["last_transaction_id"] = pk
+    # a 5-minute sliding timeout; the session row is only rewritten when it changes
+    touch_session(request.session, 300, last_transaction_id=pk)
 
     tx = get_object_or_404(
         Transaction.objects.select_related(
@@ -718,6 +974,8 @@ def transaction_detail(request, pk):
         "registration_fee": REGISTRATION_FEE,
         "total_amount": total_amount,
         "expired": request.GET.get("expired") == "1",
+        # cached by the refresh_wallets worker; no RPC on this request
+        "wallet": wallet_snapshot(tx.customer.eth_address),
     }
 
     return render(request, "auth/detail.html", context)
@@ -762,6 +1020,16 @@ def edit_customer_profile(request):
         customer.pincode = request.POST.get("pincode", "").strip()
         customer.eth_address = request.POST.get("eth_address", "").strip()
 
+        if customer.eth_address:
+            try:
+                validate_eth_address(customer.eth_address)
+            except ValidationError as e:
+                messages.error(request, e.messages[0])
+                return render(request, "customer/detail.html", {
+                    "user_obj": user,
+                    "customer": customer,
+                })
+
         # --- Save ---
         user.save()
         customer.save()
@@ -772,4 +1040,80 @@ def edit_customer_profile(request):
     return render(request, "customer/detail.html", {
         "user_obj": user,
         "customer": customer,
-    })
\ No newline at end of file
+    })
+
+# ---------------------------
+#   PUBLIC INCLUSION PROOFS
+# ---------------------------
+from django.utils.cache import get_conditional_response, patch_vary_headers, set_response_etag
+
+MAX_PROOFS_PER_REQUEST = 500
+# a confirmed proof can still change (replacement mined, reorg, deed edit),
+# so it is only cached briefly and then revalidated against its ETag
+PROOF_MAX_AGE_FINAL = 300
+PROOF_MAX_AGE_PENDING = 30
+
+
+def _proof_response(request, payload, final):
+    """
+    JSON by default; CBOR when asked for and cbor2 is installed. ?format=
+    decides on its own when given, otherwise the Accept header does.
+    """
+    requested = request.GET.get("format")
+    if requested:
+        wants_cbor = requested == "cbor"
+    else:
+        wants_cbor = "application/cbor" in request.headers.get("Accept", "")
+    cbor2 = None
+    if wants_cbor:
+        try:
+            import cbor2
+        except ImportError:
+            pass
+
+    if cbor2 is not None:
+        response = HttpResponse(cbor2.dumps(payload(binary=True)), content_type="application/cbor")
+    else:
+        response = JsonResponse(payload(binary=False), safe=False, json_dumps_params={"separators": (",", ":")})
+
+    response["Cache-Control"] = f"public, max-age={PROOF_MAX_AGE_FINAL if final else PROOF_MAX_AGE_PENDING}"
+    if not requested:
+        patch_vary_headers(response, ["Accept"])
+    set_response_etag(response)
+    return get_conditional_response(request, etag=response["ETag"], response=response)
+
+
+async def certificate_proof(request, pk):
+    rows = [row async for row in proof_rows([pk])]
+    if not rows:
+        return JsonResponse({"error": "No anchored proof for this certificate yet"}, status=404)
+    row = rows[0]
+    return _proof_response(request, lambda binary: proof_document(row, binary), is_final(row))
+
+
+async def certificate_proofs(request):
+    """Batch endpoint for banks: /verify/proofs/?ids=1,2,3"""
+    try:
+        ids = [int(i) for i in request.GET.get("ids", "").split(",") if i.strip()]
+    except ValueError:
+        return JsonResponse({"error": "ids must be a comma separated list of integers"}, status=400)
+    if not ids or len(ids) > MAX_PROOFS_PER_REQUEST:
+        return JsonResponse({"error": f"Ask for between 1 and {MAX_PROOFS_PER_REQUEST} ids"}, status=400)
+
+    rows = [row async for row in proof_rows(ids)]
+    return _proof_response(
+        request,
+        lambda binary: [proof_document(row, binary) for row in rows],
+        final=bool(rows) and len(rows) == len(set(ids)) and all(is_final(r) for r in rows),
+    )
+
+
+async def chain_status(request):
+    """Head of the local chain index, for verifiers polling for finality."""
+    status = await anetwork_status()
+    response = JsonResponse({
+        "last_block": status["last_block"],
+        "block_time_seconds": status["block_time"].total_seconds() if status["block_time"] else None,
+    })
+    response["Cache-Control"] = "public, max-age=5"
+    return response
@@ -2,6 +2,9 @@
 ASGI config for Land project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server, e.g. ``uvicorn Land.asgi:application --workers 4``;
+the async views (localities, certificate downloads, proofs, chain status)
+then run on the event loop and sync views in Django's thread pool.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,10 +43,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'Home.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'Home.middleware.RoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -63,11 +66,15 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'Home.context_processors.fragment_cache',
             ],
         },
     },
 ]
 
+# bump to discard every cached dashboard fragment after a template release
+FRAGMENT_CACHE_RELEASE = '1'
+
 WSGI_APPLICATION = 'Land.wsgi.application'
 
 
@@ -81,6 +88,93 @@ DATABASES = {
     }
 }
 
+# Set LAND_DB_PROFILE=production to run SQLite with WAL, a busy timeout and
+# persistent connections. The pragmas are applied to every new connection by
+# the connection_created receiver in Home/signals.py.
+DB_PROFILE = os.environ.get('LAND_DB_PROFILE', 'development')
+
+SQLITE_PRAGMAS = {}
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # take the write lock when atomic() begins: a transaction that
+            # reads and then writes cannot wait for the lock under WAL, it
+            # fails at once with "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+        },
+    })
+    SQLITE_PRAGMAS = {
+        # busy_timeout first, so the switch to WAL waits on a busy file too
+        'busy_timeout': 20000,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'cache_size': -20000,
+    }
+
+
+# Read replica
+# Set LAND_REPLICA_DB to a second database file (SQLite) to send dashboard and
+# list reads there. That file must be a real replica of the primary SQLite
+# file, kept current by a replication layer such as LiteFS;
+# Django does not copy anything into it, and an unrelated or stale file
+# would serve wrong data. In tests the replica mirrors `default`, so the
+# same connection serves both and no replication is needed.
+DATABASE_ROUTERS = ['Home.routers.PrimaryReplicaRouter']
+DATABASE_REPLICA_ALIAS = 'replica'
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+if os.environ.get('LAND_REPLICA_DB'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['LAND_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Cache and sessions
+# LAND_CACHE picks the cache: "locmem" (default, per process; also used by
+# tests), "file" (LAND_CACHE_DIR, shared by processes on one host) or
+# "redis" (LAND_CACHE_URL). LAND_SESSION_ENGINE is "cached_db" (reads from
+# the cache, writes through to django_session), "cache" (no database
+# writes) or "db". Both cache-backed engines need a cache shared by all
+# workers, or a logout in one process leaves the session alive in the
+# others, so the default is "cached_db" with a file or redis cache and
+# "db" otherwise.
+CACHE_PROFILE = os.environ.get('LAND_CACHE', 'locmem')
+
+if CACHE_PROFILE == 'file':
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('LAND_CACHE_DIR', str(BASE_DIR / '.cache')),
+    }}
+elif CACHE_PROFILE == 'redis':
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('LAND_CACHE_URL', 'redis://127.0.0.1:6379/1'),
+    }}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Dashboard fragments and their version counters (Home/services/fragments.py)
+# must be shared by every worker, or a process keeps serving a block that a
+# signal in another process invalidated; with a per-process cache they are
+# not cached at all.
+if CACHE_PROFILE in ('file', 'redis'):
+    CACHES['fragments'] = {**CACHES['default'], 'KEY_PREFIX': 'fragments'}
+else:
+    CACHES['fragments'] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.environ.get(
+    'LAND_SESSION_ENGINE', 'cached_db' if CACHE_PROFILE in ('file', 'redis') else 'db',
+)
+# sliding session expiry is re-saved at most this often (see Home/services/sessions.py)
+SESSION_REFRESH_SECONDS = 60
+# user roles and profiles (Home/services/roles.py); signals drop stale entries.
+# Only used with a shared cache: under locmem roles are resolved per request.
+ROLE_CACHE_SECONDS = 300
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -126,3 +220,52 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+
+
+# Document uploads
+# Uploads go straight to a temp file on disk instead of being buffered in
+# memory; storage then streams them in DOCUMENT_UPLOAD_CHUNK_SIZE pieces.
+FILE_UPLOAD_HANDLERS = [
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2 * 1024 * 1024
+DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
+
+DOCUMENT_UPLOAD_CHUNK_SIZE = 1024 * 1024
+DOCUMENT_UPLOAD_WORKERS = 4
+
+
+# Blockchain
+# Point CHAIN_RPC_URL at a local Ganache/Anvil node for development; its
+# first unlocked account is used when CHAIN_ANCHOR_ACCOUNT is empty.
+# CHAIN_BACKEND=simulated swaps the node for the in-process chain in
+# Home/services/simchain.py (blocks every CHAIN_SIM_BLOCK_TIME seconds, with
+# optional injected drops, reverts and reorgs). See also the
+# load_test_anchoring command.
+CHAIN_BACKEND = os.environ.get('CHAIN_BACKEND', 'rpc')
+CHAIN_SIM_BLOCK_TIME = 1.0
+CHAIN_SIM_SEED = 0
+CHAIN_SIM_DROP_RATE = 0.0
+CHAIN_SIM_REVERT_RATE = 0.0
+CHAIN_SIM_REORG_RATE = 0.0
+CHAIN_SIM_REORG_DEPTH = 2
+CHAIN_RPC_URL = os.environ.get('CHAIN_RPC_URL', 'http://127.0.0.1:8545')
+CHAIN_RPC_TIMEOUT = 10
+CHAIN_ANCHOR_ACCOUNT = os.environ.get('CHAIN_ANCHOR_ACCOUNT', '')
+CHAIN_ANCHOR_ADDRESS = os.environ.get('CHAIN_ANCHOR_ADDRESS', '')
+
+# Approvals are collected into Merkle batches and only the root goes on
+# chain (manage.py anchor_transactions). A batch is sent when it is full or
+# its oldest approval has waited ANCHOR_MAX_WAIT_SECONDS.
+CHAIN_SERVER_ANCHORING = os.environ.get('CHAIN_SERVER_ANCHORING', '') == '1'
+ANCHOR_BATCH_SIZE = 256
+ANCHOR_MAX_WAIT_SECONDS = 600
+
+# Fees and nonces for server-side anchors (Home/services/gas.py). Anchors left
+# unmined for CHAIN_STUCK_AFTER_SECONDS are resent with the same nonce and
+# fees raised by CHAIN_FEE_BUMP_PERCENT, never above CHAIN_MAX_FEE_PER_GAS.
+CHAIN_FEE_CACHE_SECONDS = 15
+CHAIN_STUCK_AFTER_SECONDS = 300
+CHAIN_FEE_BUMP_PERCENT = 15
+CHAIN_MAX_FEE_PER_GAS = 500 * 10**9
+CHAIN_WALLET_TTL_SECONDS = 300